@@ -5,8 +5,8 @@ Uses Hugging Face Inference API when HF_TOKEN is available, falls back to templa
 from fastapi import APIRouter
 from pydantic import BaseModel
 import os
-import random
 from datetime import datetime, timedelta
+from app.services.seeded_random import seeded_rng
 
 router = APIRouter(prefix="/api/ai", tags=["AI"])
 
@@ -110,6 +110,8 @@ def generate_forecast(avg_aqi: float) -> list[ForecastDay]:
     """Generate 5-day AI-enhanced forecast."""
     forecasts = []
     today = datetime.now()
+    # Seed from the inputs and the day so the same request yields the same forecast
+    rng = seeded_rng("ai_forecast", round(avg_aqi, 2), today.date())
     
     # Simulate realistic variations based on current AQI
     base_aqi = avg_aqi
@@ -121,7 +123,7 @@ def generate_forecast(avg_aqi: float) -> list[ForecastDay]:
         date_str = day.strftime("%b %d")
         
         # Calculate forecasted AQI with some variation
-        forecast_aqi = base_aqi + variations[i] + random.randint(-5, 5)
+        forecast_aqi = base_aqi + variations[i] + rng.randint(-5, 5)
         forecast_aqi = max(10, min(300, forecast_aqi))  # Clamp values
         
         # Determine status
@@ -155,7 +157,7 @@ def generate_forecast(avg_aqi: float) -> list[ForecastDay]:
             dayName=day_name[:3] if i > 0 else "Today",
             status=status,
             statusClass=status_class,
-            aiInsight=random.choice(insights)
+            aiInsight=rng.choice(insights)
         ))
     
     return forecasts
@@ -165,6 +167,7 @@ def generate_template_dashboard_insights(data: DashboardInsightsRequest) -> Dash
     """Generate AI-enhanced insights for all dashboard cards using templates."""
     
     aqi_category, _ = get_aqi_category(data.avgAQI)
+    rng = seeded_rng("ai_dashboard_insights", data.model_dump_json(), datetime.now().date())
     
     # Planetary Breath Score insights
     if data.avgBreathability >= 80:
@@ -225,19 +228,19 @@ def generate_template_dashboard_insights(data: DashboardInsightsRequest) -> Dash
     # Generate forecast
     forecast = generate_forecast(data.avgAQI)
     
-    forecast_summary = f"5-day outlook: {'Mostly favorable' if sum(1 for f in forecast if f.status == 'Good') >= 3 else 'Mixed conditions expected'}. {random.choice(['Best days:', 'Pack masks:'])} {', '.join([f.dayName for f in forecast if f.status == 'Good'][:2]) or 'Limited good days ahead'}."
+    forecast_summary = f"5-day outlook: {'Mostly favorable' if sum(1 for f in forecast if f.status == 'Good') >= 3 else 'Mixed conditions expected'}. {rng.choice(['Best days:', 'Pack masks:'])} {', '.join([f.dayName for f in forecast if f.status == 'Good'][:2]) or 'Limited good days ahead'}."
     
     return DashboardInsightsResponse(
         breathScoreAdvice=breath_advice,
         healthStatus=health_status,
-        vitalSignsInsight=random.choice(vital_insights),
-        trendAnalysis=random.choice(trend_analysis),
+        vitalSignsInsight=rng.choice(vital_insights),
+        trendAnalysis=rng.choice(trend_analysis),
         forecast=forecast,
         forecastSummary=forecast_summary,
-        pollutedAnalysis=random.choice(polluted_insights),
-        cleanAnalysis=random.choice(clean_insights),
-        populationInsight=random.choice(pop_insights),
-        healthRecommendation=random.choice(health_recs),
+        pollutedAnalysis=rng.choice(polluted_insights),
+        cleanAnalysis=rng.choice(clean_insights),
+        populationInsight=rng.choice(pop_insights),
+        healthRecommendation=rng.choice(health_recs),
         aiPowered=False,
         timestamp=datetime.now().strftime("%Y-%m-%d %H:%M UTC")
     )
@@ -315,6 +318,7 @@ def generate_template_summary(data: CitySummaryRequest) -> AISummaryResponse:
     """Generate summary using templates (fallback)."""
     
     aqi_category, health_note = get_aqi_category(data.avgAQI)
+    rng = seeded_rng("ai_summary", data.model_dump_json(), datetime.now().date())
     
     # Build contextual insights
     insights = []
@@ -345,7 +349,7 @@ def generate_template_summary(data: CitySummaryRequest) -> AISummaryResponse:
         recommendation = "Consider limiting outdoor exposure in high-AQI regions. Check local forecasts before outdoor plans."
     
     return AISummaryResponse(
-        summary=random.choice(summary_templates),
+        summary=rng.choice(summary_templates),
         highlights=insights[:4],
         recommendation=recommendation,
         dataTimestamp=datetime.now().strftime("%Y-%m-%d %H:%M UTC"),
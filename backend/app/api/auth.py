@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 import bcrypt
 from app.db.database import get_db
+from app.db.write_queue import write_queue
 from app.models.user import User
 import json
 
@@ -100,10 +103,10 @@ def user_to_response(user: User) -> UserResponse:
     )
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
+async def signup(user_data: UserSignup, db: AsyncSession = Depends(get_db)):
     try:
         # Check if user already exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
+        existing_user = await db.scalar(select(User).filter(User.email == user_data.email))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -125,26 +128,34 @@ async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
         if user_data.triggerFactors:
             trigger_factors_json = json.dumps(user_data.triggerFactors)
         
-        new_user = User(
-            name=user_data.name,
-            email=user_data.email,
-            password_hash=hashed_password,
-            has_asthma=user_data.hasAsthma,
-            asthma_severity=user_data.asthmaSeverity,
-            trigger_factors=trigger_factors_json,
-            symptom_frequency=user_data.symptomFrequency,
-            medication_usage=user_data.medicationUsage,
-            asthma_control=user_data.asthmaControl,
-            zip_code=user_data.zipCode,
-            selected_hospital=user_data.selectedHospital,
-            emergency_contact=user_data.emergencyContact,
-            emergency_phone=user_data.emergencyPhone,
-        )
-        
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        
+        async def insert(session: AsyncSession) -> User:
+            new_user = User(
+                name=user_data.name,
+                email=user_data.email,
+                password_hash=hashed_password,
+                has_asthma=user_data.hasAsthma,
+                asthma_severity=user_data.asthmaSeverity,
+                trigger_factors=trigger_factors_json,
+                symptom_frequency=user_data.symptomFrequency,
+                medication_usage=user_data.medicationUsage,
+                asthma_control=user_data.asthmaControl,
+                zip_code=user_data.zipCode,
+                selected_hospital=user_data.selectedHospital,
+                emergency_contact=user_data.emergencyContact,
+                emergency_phone=user_data.emergencyPhone,
+            )
+            session.add(new_user)
+            await session.flush()
+            return new_user
+
+        try:
+            new_user = await write_queue.submit(insert)
+        except IntegrityError:
+            # Registered by a concurrent signup since the check above
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
         return user_to_response(new_user)
     except HTTPException:
         raise
@@ -158,8 +169,8 @@ async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
         )
 
 @router.post("/login", response_model=UserResponse)
-async def login(login_data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == login_data.email).first()
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).filter(User.email == login_data.email))
     
     if not user or not verify_password(login_data.password, user.password_hash):
         raise HTTPException(
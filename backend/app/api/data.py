@@ -1,10 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import exists, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from typing import List, Literal, Optional, Union
 from datetime import date
 from pydantic import BaseModel
+from app.api.dimensions import dimension_list_response
+from app.api.pagination import decode_cursor, paginate
 from app.db.database import get_db
+from app.db.filters import dimension_id, gas_data_filters
+from app.db.write_queue import write_queue
 from app.models.gas_data import GasData
+from app.models.gas_dimension import GasRegion, GasType
+from app.models.rollup import GasRollup
+from app.services.dimension_cache import bump_data_version
+from app.services.downsample import cached_downsample, downsample_rows
+from app.services.gas_analytics import MAX_ANALYTICS_WINDOW, get_gas_analytics
+from app.services.gas_ingest import encode_gas_rows, ingest_gas_stream
+from app.services.rollups import bucket_start, refresh_gas_rollups
 
 router = APIRouter(prefix="/api/data", tags=["data"])
 
@@ -31,65 +44,247 @@ class GasDataResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class GasRollupResponse(BaseModel):
+    gas_type: str
+    region: str
+    bucket: str
+    bucket_start: date
+    unit: Optional[str] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    count: int
+
+class GasAnalyticsPoint(BaseModel):
+    bucket_start: date
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    count: int
+    rolling_mean: Optional[float] = None
+    change: Optional[float] = None
+    change_pct: Optional[float] = None
+    yoy_change: Optional[float] = None
+    yoy_change_pct: Optional[float] = None
+
+class GasAnalyticsResponse(BaseModel):
+    gas_type: str
+    region: str
+    bucket: str
+    window: int
+    unit: Optional[str] = None
+    points: List[GasAnalyticsPoint]
+
+class GasBulkRowError(BaseModel):
+    line: int
+    error: str
+
+class GasBulkChunkReport(BaseModel):
+    chunk: int
+    first_line: int
+    last_line: int
+    rows: int
+    valid_rows: int
+    written: int
+    error_count: int
+    errors: List[GasBulkRowError]
+    error: Optional[str] = None
+
+class GasBulkIngestResponse(BaseModel):
+    rows: int
+    written: int
+    rejected: int
+    chunks: List[GasBulkChunkReport]
+
 @router.post("/gas", response_model=GasDataResponse, status_code=201)
-async def create_gas_data(data: GasDataCreate, db: Session = Depends(get_db)):
+async def create_gas_data(data: GasDataCreate):
     """Create new gas data entry"""
-    new_data = GasData(**data.dict())
-    db.add(new_data)
-    db.commit()
-    db.refresh(new_data)
-    return new_data
+    async def insert(session: AsyncSession) -> GasDataResponse:
+        new_data = GasData(**(await encode_gas_rows(session, [data.dict()]))[0])
+        session.add(new_data)
+        await session.flush()
+        await session.run_sync(refresh_gas_rollups, [(data.gas_type, data.region, data.date)])
+        await session.execute(bump_data_version(session.get_bind().dialect.name, GasData.__tablename__))
+        return GasDataResponse(id=new_data.id, **data.dict())
+
+    try:
+        return await write_queue.submit(insert)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Gas data for this gas type, region and date already exists")
 
-@router.get("/gas", response_model=List[GasDataResponse])
+@router.post("/gas/bulk", response_model=GasBulkIngestResponse)
+async def bulk_ingest_gas_data(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(None, description="Body format; defaults to csv for a text/csv Content-Type, otherwise ndjson"),
+    on_conflict: Literal["update", "skip"] = Query("update", description="For an existing gas type, region and date: overwrite it or keep it")
+):
+    """
+    Bulk-load gas data from a streamed NDJSON or CSV body (fields as in POST /gas; CSV needs a
+    header row). Rows are written in chunks; invalid rows are reported per chunk and skipped.
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    return await ingest_gas_stream(request.stream(), format, on_conflict)
+
+@router.get("/gas", response_model=Union[List[GasDataResponse], List[GasRollupResponse]])
 async def get_gas_data(
+    response: Response,
     gas_type: Optional[str] = Query(None, description="Filter by gas type (CO2, CH4, N2O, SF6)"),
     region: Optional[str] = Query(None, description="Filter by region"),
     start_date: Optional[date] = Query(None, description="Start date filter"),
     end_date: Optional[date] = Query(None, description="End date filter"),
-    skip: int = Query(0, ge=0),
+    bucket: Optional[Literal["day", "week", "month"]] = Query(None, description="Return per-bucket min/max/mean/count instead of raw rows"),
+    max_points: Optional[int] = Query(None, ge=3, le=10000, description="Downsample each gas type/region series over the whole range to at most this many rows (LTTB on value)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated: offset paging; use cursor"),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get gas data with optional filters"""
-    query = db.query(GasData)
+    """Get gas data with optional filters, newest first; pages continue via the X-Next-Cursor header"""
+    if max_points:
+        if bucket or cursor:
+            raise HTTPException(status_code=400, detail="max_points cannot be combined with bucket or cursor")
+        return await _get_gas_downsampled(gas_type, region, start_date, end_date, max_points)
+
+    after = decode_cursor(cursor, ["date", "id"], date_fields=["date"]) if cursor else None
+    if bucket:
+        return await _get_gas_rollups(db, bucket, gas_type, region, start_date, end_date, after, skip, limit, response)
+
+    query = select(GasData).filter(*gas_data_filters(gas_type, region, start_date, end_date))
+    
+    if after:
+        query = query.filter(tuple_(GasData.date, GasData.id) < tuple_(after["date"], after["id"]))
     
+    result = await db.execute(
+        query.order_by(GasData.date.desc(), GasData.id.desc()).offset(skip).limit(limit + 1)
+    )
+    return paginate(result.scalars().all(), limit, response, lambda row: {"date": row.date, "id": row.id})
+
+async def _get_gas_rollups(
+    db: AsyncSession,
+    bucket: str,
+    gas_type: Optional[str],
+    region: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    after: Optional[dict],
+    skip: int,
+    limit: int,
+    response: Response
+) -> List[GasRollupResponse]:
+    """Rollup buckets overlapping the date range, newest first"""
+    query = select(GasRollup).filter(GasRollup.bucket == bucket)
+
     if gas_type:
-        query = query.filter(GasData.gas_type == gas_type.upper())
+        query = query.filter(GasRollup.gas_type == gas_type.upper())
     if region:
-        query = query.filter(GasData.region == region)
+        query = query.filter(GasRollup.region == region)
     if start_date:
-        query = query.filter(GasData.date >= start_date)
+        query = query.filter(GasRollup.bucket_start >= bucket_start(start_date, bucket))
     if end_date:
-        query = query.filter(GasData.date <= end_date)
-    
-    data = query.order_by(GasData.date.desc()).offset(skip).limit(limit).all()
-    return data
+        query = query.filter(GasRollup.bucket_start <= end_date)
+    if after:
+        query = query.filter(tuple_(GasRollup.bucket_start, GasRollup.id) < tuple_(after["date"], after["id"]))
+
+    rollups = await db.scalars(
+        query.order_by(GasRollup.bucket_start.desc(), GasRollup.id.desc())
+        .offset(skip)
+        .limit(limit + 1)
+    )
+    rollups = paginate(rollups.all(), limit, response, lambda row: {"date": row.bucket_start, "id": row.id})
+    return [
+        GasRollupResponse(
+            gas_type=rollup.gas_type,
+            region=rollup.region,
+            bucket=rollup.bucket,
+            bucket_start=rollup.bucket_start,
+            unit=rollup.unit,
+            min=rollup.min,
+            max=rollup.max,
+            mean=rollup.sum / rollup.count if rollup.count else None,
+            count=rollup.count
+        )
+        for rollup in rollups
+    ]
+
+async def _get_gas_downsampled(
+    gas_type: Optional[str],
+    region: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    max_points: int
+) -> List[GasDataResponse]:
+    """LTTB-downsampled rows of each matching series, newest first"""
+    async def compute(session: AsyncSession) -> List[GasDataResponse]:
+        rows = await downsample_rows(
+            session,
+            GasData,
+            gas_data_filters(gas_type, region, start_date, end_date),
+            [GasData.gas_type_id, GasData.region_id],
+            GasData.value,
+            max_points
+        )
+        rows.sort(key=lambda row: (row.date, row.id), reverse=True)
+        return [GasDataResponse.model_validate(row) for row in rows]
+
+    key = ("gas", gas_type.upper() if gas_type else None, region, start_date, end_date, max_points)
+    return await cached_downsample(key, GasData.__tablename__, compute)
+
+@router.get("/gas/analytics", response_model=GasAnalyticsResponse)
+async def get_gas_analytics_series(
+    gas_type: str = Query(..., description="Gas type (CO2, CH4, N2O, SF6)"),
+    region: str = Query(..., description="Region"),
+    bucket: Literal["day", "week", "month", "year"] = Query("month", description="Resampling bucket"),
+    window: int = Query(12, ge=1, le=MAX_ANALYTICS_WINDOW, description="Rolling mean window, in buckets"),
+    start_date: Optional[date] = Query(None, description="Start date filter"),
+    end_date: Optional[date] = Query(None, description="End date filter"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Resampled series of one gas and region, oldest first, with a rolling mean and the change
+    against the previous bucket and the same bucket a year earlier
+    """
+    points = await get_gas_analytics(db, gas_type, region, bucket, window, start_date, end_date)
+    return GasAnalyticsResponse(
+        gas_type=gas_type.upper(),
+        region=region,
+        bucket=bucket,
+        window=window,
+        unit=points[-1]["unit"] if points else None,
+        points=points
+    )
 
 @router.get("/gas/{data_id}", response_model=GasDataResponse)
-async def get_gas_data_by_id(data_id: int, db: Session = Depends(get_db)):
+async def get_gas_data_by_id(data_id: int, db: AsyncSession = Depends(get_db)):
     """Get gas data by ID"""
-    data = db.query(GasData).filter(GasData.id == data_id).first()
+    data = await db.get(GasData, data_id)
     if not data:
         raise HTTPException(status_code=404, detail="Gas data not found")
     return data
 
 @router.get("/gas/types/list", response_model=List[str])
-async def get_gas_types(db: Session = Depends(get_db)):
-    """Get list of available gas types"""
-    types = db.query(GasData.gas_type).distinct().all()
-    return [t[0] for t in types]
+async def get_gas_types(request: Request, db: AsyncSession = Depends(get_db)):
+    """Get list of available gas types (ETag / If-None-Match supported)"""
+    query = (
+        select(GasType.name)
+        .filter(exists().where(GasData.gas_type_id == GasType.id))
+        .order_by(GasType.name)
+    )
+    return await dimension_list_response(request, db, GasData.__tablename__, ("gas_types",), query)
 
 @router.get("/gas/regions/list", response_model=List[str])
 async def get_regions(
+    request: Request,
     gas_type: Optional[str] = Query(None, description="Filter regions by gas type"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get list of available regions"""
-    query = db.query(GasData.region).distinct()
+    """Get list of available regions (ETag / If-None-Match supported)"""
+    has_data = exists().where(GasData.region_id == GasRegion.id)
     if gas_type:
-        query = query.filter(GasData.gas_type == gas_type.upper())
-    regions = query.all()
-    return [r[0] for r in regions]
+        gas_type = gas_type.upper()
+        has_data = has_data.where(GasData.gas_type_id == dimension_id(GasType, gas_type))
+    query = select(GasRegion.name).filter(has_data).order_by(GasRegion.name)
+    return await dimension_list_response(request, db, GasData.__tablename__, ("gas_regions", gas_type), query)
 
 
 
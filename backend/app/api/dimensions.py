@@ -0,0 +1,38 @@
+"""
+Lookup-list responses served from the dimension cache
+
+Each list carries a strong ETag of its values and, in X-Data-Version, the write counter of
+the table it was read at. A request whose If-None-Match matches the ETag gets an empty 304,
+so clients revalidate a cached list without downloading it again.
+"""
+from typing import Hashable
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services.dimension_cache import dimension_cache
+
+DATA_VERSION_HEADER = "X-Data-Version"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+async def dimension_list_response(
+    request: Request,
+    db: AsyncSession,
+    table_name: str,
+    key: Hashable,
+    query
+) -> Response:
+    """JSON list of the query's values from the dimension cache, or 304 if the client's copy is current"""
+    dimension = await dimension_cache.get(db, table_name, key, query)
+    headers = {
+        "ETag": dimension.etag,
+        DATA_VERSION_HEADER: str(dimension.version),
+        "Cache-Control": "no-cache",
+    }
+    if _etag_matches(request.headers.get("if-none-match", ""), dimension.etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(dimension.values, headers=headers)
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Literal, Optional, Sequence
+from datetime import date
+from app.db.database import AsyncSessionLocal
+from app.db.filters import climate_data_filters, gas_data_filters
+from app.models.gas_data import GasData
+from app.models.nyc_climate import NYCClimateData
+from app.services.export import EXPORT_FORMATS, export_available, stream_export
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+def _export_response(model, conditions: Sequence[Any], fmt: str, name: str) -> StreamingResponse:
+    if not export_available():
+        raise HTTPException(status_code=501, detail="Export requires pyarrow on the server (pip install pyarrow)")
+
+    async def body() -> AsyncIterator[bytes]:
+        # Own session: the export outlives the request handler while the body streams
+        async with AsyncSessionLocal() as db:
+            async for chunk in stream_export(db, model, conditions, fmt):
+                if chunk:
+                    yield chunk
+
+    media_type, extension = EXPORT_FORMATS[fmt]
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{extension}"'}
+    )
+
+@router.get("/gas")
+async def export_gas_data(
+    format: Literal["parquet", "arrow"] = Query("parquet", description="parquet or arrow (Arrow IPC stream)"),
+    gas_type: Optional[str] = Query(None, description="Filter by gas type (CO2, CH4, N2O, SF6)"),
+    region: Optional[str] = Query(None, description="Filter by region"),
+    start_date: Optional[date] = Query(None, description="Start date filter"),
+    end_date: Optional[date] = Query(None, description="End date filter")
+):
+    """Stream all matching gas data rows as Parquet or Arrow IPC"""
+    return _export_response(GasData, gas_data_filters(gas_type, region, start_date, end_date), format, "gas_data")
+
+@router.get("/climate")
+async def export_climate_data(
+    format: Literal["parquet", "arrow"] = Query("parquet", description="parquet or arrow (Arrow IPC stream)"),
+    zip_code: Optional[str] = Query(None, description="Filter by ZIP code"),
+    start_date: Optional[date] = Query(None, description="Start date filter"),
+    end_date: Optional[date] = Query(None, description="End date filter")
+):
+    """Stream all matching NYC climate data rows as Parquet or Arrow IPC"""
+    return _export_response(
+        NYCClimateData, climate_data_filters(zip_code, start_date, end_date), format, "nyc_climate_data"
+    )
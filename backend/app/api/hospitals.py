@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
+from app.api.dimensions import dimension_list_response
+from app.api.pagination import decode_cursor, paginate
 from app.db.database import get_db
+from app.db.write_queue import write_queue
 from app.models.hospital import Hospital
+from app.services.dimension_cache import bump_data_version
+from app.services.hospital_index import hospital_index
 
 router = APIRouter(prefix="/api/hospitals", tags=["hospitals"])
 
@@ -42,51 +48,84 @@ class HospitalResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class HospitalNearbyResponse(HospitalResponse):
+    distance_km: float  # Great-circle distance from the query point
+
 @router.post("/", response_model=HospitalResponse, status_code=201)
-async def create_hospital(hospital: HospitalCreate, db: Session = Depends(get_db)):
+async def create_hospital(hospital: HospitalCreate):
     """Create a new hospital entry"""
-    new_hospital = Hospital(**hospital.dict())
-    db.add(new_hospital)
-    db.commit()
-    db.refresh(new_hospital)
-    return new_hospital
+    async def insert(session: AsyncSession) -> Hospital:
+        new_hospital = Hospital(**hospital.dict())
+        session.add(new_hospital)
+        await session.flush()
+        await session.execute(bump_data_version(session.get_bind().dialect.name, Hospital.__tablename__))
+        return new_hospital
+
+    return await write_queue.submit(insert)
 
 @router.get("/", response_model=List[HospitalResponse])
 async def get_hospitals(
+    response: Response,
     borough: Optional[str] = Query(None, description="Filter by borough (Manhattan, Brooklyn, Queens, Bronx, Staten Island)"),
     specialty: Optional[str] = Query(None, description="Filter by specialty"),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated: offset paging; use cursor"),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get hospitals with optional filters"""
-    query = db.query(Hospital)
+    """Get hospitals with optional filters, by id; pages continue via the X-Next-Cursor header"""
+    query = select(Hospital)
     
     if borough:
         query = query.filter(Hospital.borough == borough)
     if specialty:
         query = query.filter(Hospital.specialty.contains(specialty))
     
-    hospitals = query.offset(skip).limit(limit).all()
-    return hospitals
+    if cursor:
+        query = query.filter(Hospital.id > decode_cursor(cursor, ["id"])["id"])
+    
+    hospitals = await db.scalars(query.order_by(Hospital.id).offset(skip).limit(limit + 1))
+    return paginate(hospitals.all(), limit, response, lambda row: {"id": row.id})
+
+@router.get("/nearby", response_model=List[HospitalNearbyResponse])
+async def get_nearby_hospitals(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    limit: int = Query(10, ge=1, le=100, description="Most hospitals to return"),
+    radius_km: Optional[float] = Query(None, gt=0, description="Only hospitals within this distance"),
+    specialty: Optional[str] = Query(None, description="Filter by specialty"),
+    emergency: Optional[bool] = Query(None, description="Only hospitals with (true) or without (false) an emergency department"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Nearest hospitals to a point by great-circle distance, from the in-memory spatial index"""
+    await hospital_index.refresh(db)
+    return [
+        HospitalNearbyResponse(**hospital, distance_km=round(distance_km, 3))
+        for hospital, distance_km in hospital_index.search(latitude, longitude, limit, radius_km, specialty, emergency)
+    ]
 
 @router.get("/{hospital_id}", response_model=HospitalResponse)
-async def get_hospital(hospital_id: int, db: Session = Depends(get_db)):
+async def get_hospital(hospital_id: int, db: AsyncSession = Depends(get_db)):
     """Get hospital by ID"""
-    hospital = db.query(Hospital).filter(Hospital.id == hospital_id).first()
+    hospital = await db.get(Hospital, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
     return hospital
 
 @router.get("/boroughs/list", response_model=List[str])
-async def get_boroughs(db: Session = Depends(get_db)):
-    """Get list of available boroughs"""
-    boroughs = db.query(Hospital.borough).distinct().all()
-    return [b[0] for b in boroughs]
+async def get_boroughs(request: Request, db: AsyncSession = Depends(get_db)):
+    """Get list of available boroughs (ETag / If-None-Match supported)"""
+    query = select(Hospital.borough).distinct().order_by(Hospital.borough)
+    return await dimension_list_response(request, db, Hospital.__tablename__, ("boroughs",), query)
 
 @router.get("/specialties/list", response_model=List[str])
-async def get_specialties(db: Session = Depends(get_db)):
-    """Get list of available specialties"""
-    specialties = db.query(Hospital.specialty).filter(Hospital.specialty.isnot(None)).distinct().all()
-    return [s[0] for s in specialties if s[0]]
+async def get_specialties(request: Request, db: AsyncSession = Depends(get_db)):
+    """Get list of available specialties (ETag / If-None-Match supported)"""
+    query = (
+        select(Hospital.specialty)
+        .filter(Hospital.specialty.isnot(None), Hospital.specialty != "")
+        .distinct()
+        .order_by(Hospital.specialty)
+    )
+    return await dimension_list_response(request, db, Hospital.__tablename__, ("specialties",), query)
 
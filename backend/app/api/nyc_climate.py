@@ -1,18 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, List, Literal, Optional, Set, Union
 from datetime import date, datetime
 from pydantic import BaseModel
+import asyncio
+import json
 import logging
-from app.db.database import get_db
-from app.models.nyc_climate import NYCClimateData
+from app.api.dimensions import dimension_list_response
+from app.db.database import AsyncSessionLocal, get_db
+from app.db.filters import climate_data_filters
+from app.db.upsert import insert_on_conflict
+from app.db.write_queue import write_queue
+from app.models.nyc_climate import NYCClimateData, SOURCE_SEED
+from app.models.rollup import ClimateRollup
 from app.db.seed_nyc_data import generate_climate_data
-from app.services.climate_data_service import ClimateDataService
+from app.services.climate_data_service import ClimateDataService, failed_fetches
+from app.services.climate_ingest import OBSERVATION_COLUMNS, ingest_climate_list, ingest_climate_stream
+from app.services.dimension_cache import bump_data_version
+from app.services.downsample import cached_downsample, downsample_rows
+from app.services.risk_broadcaster import risk_broadcaster
+from app.services.rollups import bucket_start, refresh_climate_rollups
+from app.services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/nyc/climate", tags=["nyc-climate"])
 
+# One upstream fetch per (zip_code, date) at a time; concurrent /latest calls share its result
+_today_row_flights = SingleFlight()
+_seed_refresh_flights = SingleFlight()
+
+# Background retries of seed rows, referenced until they finish
+_seed_refresh_tasks: Set[asyncio.Task] = set()
+
+# Columns overwritten when fetched data replaces a stored seed row
+_CLIMATE_VALUE_COLUMNS = [
+    column.name for column in NYCClimateData.__table__.columns
+    if column.name not in ("id", "zip_code", "date", "created_at", "updated_at")
+]
+
 # Pydantic models
 class NYCClimateDataCreate(BaseModel):
     zip_code: str
@@ -32,6 +60,7 @@ class NYCClimateDataCreate(BaseModel):
     uv_index: Optional[float] = None
     pollen_count: Optional[int] = None
     asthma_index: Optional[float] = None
+    source: Optional[str] = None
 
 class NYCClimateDataResponse(BaseModel):
     id: int
@@ -52,86 +81,293 @@ class NYCClimateDataResponse(BaseModel):
     uv_index: Optional[float] = None
     pollen_count: Optional[int] = None
     asthma_index: Optional[float] = None
+    source: Optional[str] = None
     
     class Config:
         from_attributes = True
 
+class RollupMetric(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    count: int
+
+class NYCClimateRollupResponse(BaseModel):
+    zip_code: str
+    bucket: str
+    bucket_start: date
+    metrics: Dict[str, RollupMetric]
+
+class ClimateBulkRowError(BaseModel):
+    line: int
+    error: str
+
+class ClimateBulkChunkReport(BaseModel):
+    chunk: int
+    first_line: int
+    last_line: int
+    rows: int
+    valid_rows: int
+    inserted: int
+    updated: int
+    error_count: int
+    errors: List[ClimateBulkRowError]
+    error: Optional[str] = None
+
+class ClimateBulkIngestResponse(BaseModel):
+    rows: int
+    inserted: int
+    updated: int
+    rejected: int
+    chunks: List[ClimateBulkChunkReport]
+
 @router.post("/", response_model=NYCClimateDataResponse, status_code=201)
-async def create_climate_data(data: NYCClimateDataCreate, db: Session = Depends(get_db)):
+async def create_climate_data(data: NYCClimateDataCreate):
     """Create new NYC climate data entry"""
-    new_data = NYCClimateData(**data.dict())
-    db.add(new_data)
-    db.commit()
-    db.refresh(new_data)
+    async def insert(session: AsyncSession) -> NYCClimateData:
+        new_data = NYCClimateData(**data.dict())
+        session.add(new_data)
+        await session.flush()
+        await session.run_sync(refresh_climate_rollups, [(new_data.zip_code, new_data.date)])
+        await session.execute(bump_data_version(session.get_bind().dialect.name, NYCClimateData.__tablename__))
+        return new_data
+
+    try:
+        new_data = await write_queue.submit(insert)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Climate data for this ZIP code and date already exists")
+    risk_broadcaster.notify(new_data.zip_code)
     return new_data
 
-@router.get("/", response_model=List[NYCClimateDataResponse])
+@router.post("/bulk", response_model=ClimateBulkIngestResponse)
+async def bulk_ingest_climate_data(request: Request):
+    """
+    Upsert many observations on (zip_code, date): a JSON array (Content-Type: application/json)
+    or a streamed NDJSON body. Fields left out or null keep their stored values; stored seed
+    rows are replaced. Invalid rows are reported per chunk and skipped.
+    """
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            records = json.loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+        if not isinstance(records, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of observations")
+        return await ingest_climate_list(records)
+    return await ingest_climate_stream(request.stream())
+
+@router.get("/", response_model=Union[List[NYCClimateDataResponse], List[NYCClimateRollupResponse]])
 async def get_climate_data(
     zip_code: Optional[str] = Query(None, description="Filter by ZIP code"),
     start_date: Optional[date] = Query(None, description="Start date filter"),
     end_date: Optional[date] = Query(None, description="End date filter"),
+    bucket: Optional[Literal["day", "week", "month"]] = Query(None, description="Return per-bucket min/max/mean/count instead of raw rows"),
+    max_points: Optional[int] = Query(None, ge=3, le=10000, description="Downsample each ZIP code's series over the whole range to at most this many rows (LTTB)"),
+    max_points_metric: str = Query("aqi", description="Metric whose shape max_points preserves"),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get NYC climate data with optional filters"""
-    query = db.query(NYCClimateData)
-    
+    if max_points:
+        if bucket:
+            raise HTTPException(status_code=400, detail="max_points cannot be combined with bucket")
+        if max_points_metric not in OBSERVATION_COLUMNS:
+            raise HTTPException(status_code=400, detail=f"Unknown metric: {max_points_metric}")
+        return await _get_climate_downsampled(zip_code, start_date, end_date, max_points, max_points_metric)
+    if bucket:
+        return await _get_climate_rollups(db, bucket, zip_code, start_date, end_date, limit)
+
+    query = select(NYCClimateData).filter(*climate_data_filters(zip_code, start_date, end_date))
+    data = await db.scalars(query.order_by(NYCClimateData.date.desc()).limit(limit))
+    return data.all()
+
+async def _get_climate_downsampled(
+    zip_code: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    max_points: int,
+    metric: str
+) -> List[NYCClimateDataResponse]:
+    """LTTB-downsampled rows of each matching ZIP code, newest first"""
+    async def compute(session: AsyncSession) -> List[NYCClimateDataResponse]:
+        rows = await downsample_rows(
+            session,
+            NYCClimateData,
+            climate_data_filters(zip_code, start_date, end_date),
+            [NYCClimateData.zip_code],
+            getattr(NYCClimateData, metric),
+            max_points
+        )
+        rows.sort(key=lambda row: (row.date, row.zip_code), reverse=True)
+        return [NYCClimateDataResponse.model_validate(row) for row in rows]
+
+    key = ("climate", zip_code, start_date, end_date, max_points, metric)
+    return await cached_downsample(key, NYCClimateData.__tablename__, compute)
+
+async def _get_climate_rollups(
+    db: AsyncSession,
+    bucket: str,
+    zip_code: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    limit: int
+) -> List[NYCClimateRollupResponse]:
+    """Rollup buckets overlapping the date range, newest first; limit counts buckets, not metric rows"""
+    keys = select(ClimateRollup.zip_code, ClimateRollup.bucket_start).filter(ClimateRollup.bucket == bucket)
     if zip_code:
-        query = query.filter(NYCClimateData.zip_code == zip_code)
+        keys = keys.filter(ClimateRollup.zip_code == zip_code)
     if start_date:
-        query = query.filter(NYCClimateData.date >= start_date)
+        keys = keys.filter(ClimateRollup.bucket_start >= bucket_start(start_date, bucket))
     if end_date:
-        query = query.filter(NYCClimateData.date <= end_date)
+        keys = keys.filter(ClimateRollup.bucket_start <= end_date)
+    keys = (
+        keys.distinct()
+        .order_by(ClimateRollup.bucket_start.desc(), ClimateRollup.zip_code)
+        .limit(limit)
+    )
+
+    rollups = await db.scalars(
+        select(ClimateRollup)
+        .filter(
+            ClimateRollup.bucket == bucket,
+            tuple_(ClimateRollup.zip_code, ClimateRollup.bucket_start).in_(keys)
+        )
+        .order_by(ClimateRollup.bucket_start.desc(), ClimateRollup.zip_code)
+    )
+
+    results: Dict[tuple, NYCClimateRollupResponse] = {}
+    for rollup in rollups:
+        key = (rollup.zip_code, rollup.bucket_start)
+        if key not in results:
+            results[key] = NYCClimateRollupResponse(
+                zip_code=rollup.zip_code, bucket=bucket, bucket_start=rollup.bucket_start, metrics={}
+            )
+        results[key].metrics[rollup.metric] = RollupMetric(
+            min=rollup.min,
+            max=rollup.max,
+            mean=rollup.sum / rollup.count if rollup.count else None,
+            count=rollup.count
+        )
+    return list(results.values())
+
+async def _save_today_row(climate_data_dict: dict, replace_seed: bool = False) -> NYCClimateData:
+    """
+    Insert a climate row through the write queue; if the (zip_code, date) key already exists,
+    return the stored row instead. With replace_seed, a stored seed row is overwritten.
+    """
+    async def upsert(session: AsyncSession) -> NYCClimateData:
+        # Atomic insert-if-absent on the (zip_code, date) unique index
+        result = await session.execute(insert_on_conflict(
+            session.get_bind().dialect.name,
+            NYCClimateData,
+            [climate_data_dict],
+            index_elements=["zip_code", "date"],
+            update_columns=[c for c in _CLIMATE_VALUE_COLUMNS if c in climate_data_dict] if replace_seed else None,
+            update_where=NYCClimateData.source == SOURCE_SEED
+        ))
+        row = await session.scalar(
+            select(NYCClimateData)
+            .filter(
+                NYCClimateData.zip_code == climate_data_dict["zip_code"],
+                NYCClimateData.date == climate_data_dict["date"]
+            )
+            .execution_options(populate_existing=True)
+        )
+        if result.rowcount:
+            await session.run_sync(refresh_climate_rollups, [(row.zip_code, row.date)])
+            await session.execute(bump_data_version(session.get_bind().dialect.name, NYCClimateData.__tablename__))
+        return row
+
+    return await write_queue.submit(upsert)
+
+async def _fetch_and_save_today_row(zip_code: str, today: date) -> NYCClimateData:
+    """Fetch today's climate data for a ZIP code and store it; runs once per key at a time"""
+    # A previous leader may have stored the row between our read and taking the key
+    async with AsyncSessionLocal() as db:
+        data = await db.scalar(
+            select(NYCClimateData)
+            .filter(
+                NYCClimateData.zip_code == zip_code,
+                NYCClimateData.date == today
+            )
+        )
+    if data:
+        return data
+    
+    # Fetch phase: no connection held while waiting on the upstream APIs
+    try:
+        climate_service = ClimateDataService()
+        climate_data_dict = await climate_service.get_nyc_climate_data(zip_code, today)
+        logger.info(f"Fetched new climate data for ZIP {zip_code} from APIs")
+    except Exception as e:
+        logger.error(f"Error fetching climate data from API: {e}")
+        # Fallback to seed data
+        climate_data_dict = generate_climate_data(zip_code, today)
     
-    data = query.order_by(NYCClimateData.date.desc()).limit(limit).all()
-    return data
+    # Write phase: short upsert on the writer (another process may have saved today's row meanwhile)
+    new_data = await _save_today_row(climate_data_dict)
+    risk_broadcaster.notify(zip_code)
+    return new_data
+
+async def _refresh_seed_row(zip_code: str, today: date) -> None:
+    """Retry the upstream fetch for a stored seed row and replace it if real data came back"""
+    try:
+        climate_data_dict = await ClimateDataService().get_nyc_climate_data(zip_code, today)
+        if climate_data_dict.get("source") == SOURCE_SEED:
+            # Still failing; the negative cache spaces out the next attempt
+            return
+        await _save_today_row(climate_data_dict, replace_seed=True)
+        risk_broadcaster.notify(zip_code)
+        logger.info(f"Replaced seed climate data for ZIP {zip_code} with API data")
+    except Exception as e:
+        logger.error(f"Error refreshing seed climate data for ZIP {zip_code}: {e}")
+
+def _schedule_seed_refresh(zip_code: str, today: date) -> None:
+    """Retry a seed row in the background, unless the APIs failed for it recently"""
+    if failed_fetches.is_failing((zip_code, today)):
+        return
+    task = asyncio.create_task(_seed_refresh_flights.run(
+        (zip_code, today),
+        lambda: _refresh_seed_row(zip_code, today)
+    ))
+    _seed_refresh_tasks.add(task)
+    task.add_done_callback(_seed_refresh_tasks.discard)
 
 @router.get("/latest", response_model=NYCClimateDataResponse)
 async def get_latest_climate_data(
     zip_code: str = Query(..., description="ZIP code to get latest data for"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get latest climate data for a specific ZIP code. Uses real API data with seed data fallback."""
     today = date.today()
     
-    # Check if we have fresh data in database (today's data)
-    data = db.query(NYCClimateData)\
+    # Read phase: check if we have fresh data in database (today's data)
+    data = await db.scalar(
+        select(NYCClimateData)
         .filter(
             NYCClimateData.zip_code == zip_code,
             NYCClimateData.date == today
-        )\
-        .first()
+        )
+    )
     
-    # If we have fresh data, return it
+    # If we have fresh data, return it; seed rows are served now and retried in the background
     if data:
+        if data.source == SOURCE_SEED:
+            _schedule_seed_refresh(zip_code, today)
         return data
     
-    # Otherwise, fetch from API and save to database
-    try:
-        climate_service = ClimateDataService()
-        climate_data_dict = await climate_service.get_nyc_climate_data(zip_code, today)
-        
-        # Save to database
-        new_data = NYCClimateData(**climate_data_dict)
-        db.add(new_data)
-        db.commit()
-        db.refresh(new_data)
-        
-        logger.info(f"Fetched and saved new climate data for ZIP {zip_code} from APIs")
-        return new_data
-    except Exception as e:
-        logger.error(f"Error fetching climate data from API: {e}")
-        # Fallback to seed data
-        climate_data_dict = generate_climate_data(zip_code, today)
-        new_data = NYCClimateData(**climate_data_dict)
-        db.add(new_data)
-        db.commit()
-        db.refresh(new_data)
-        return new_data
+    # Release the connection; nothing below reads through this session
+    await db.close()
+    
+    # Otherwise fetch and save it; concurrent requests for the same key wait for one fetch
+    return await _today_row_flights.run(
+        (zip_code, today),
+        lambda: _fetch_and_save_today_row(zip_code, today)
+    )
 
 @router.get("/zipcodes", response_model=List[str])
-async def get_zipcodes(db: Session = Depends(get_db)):
-    """Get list of available ZIP codes"""
-    zipcodes = db.query(NYCClimateData.zip_code).distinct().all()
-    return [z[0] for z in zipcodes]
+async def get_zipcodes(request: Request, db: AsyncSession = Depends(get_db)):
+    """Get list of available ZIP codes (ETag / If-None-Match supported)"""
+    query = select(NYCClimateData.zip_code).distinct().order_by(NYCClimateData.zip_code)
+    return await dimension_list_response(request, db, NYCClimateData.__tablename__, ("zipcodes",), query)
 
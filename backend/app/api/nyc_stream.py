@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
+from app.services.risk_broadcaster import risk_broadcaster
+
+router = APIRouter(prefix="/api/nyc/stream", tags=["nyc-stream"])
+
+MAX_STREAM_ZIP_CODES = 50
+KEEPALIVE_SECONDS = 15
+
+
+@router.get("/risk")
+async def stream_risk_changes(
+    request: Request,
+    zip_codes: str = Query(..., description="Comma-separated ZIP codes to subscribe to"),
+):
+    """
+    Server-sent events stream of climate and travel-risk changes per ZIP code.
+
+    Sends a `snapshot` event with the current climate row and today's recommendation for
+    each ZIP, then a `delta` event containing only the changed part whenever either changes.
+    """
+    requested = list(dict.fromkeys(z.strip() for z in zip_codes.split(',') if z.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="Provide at least one ZIP code")
+    if len(requested) > MAX_STREAM_ZIP_CODES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_STREAM_ZIP_CODES} ZIP codes per stream")
+
+    async def event_stream():
+        queue = risk_broadcaster.subscribe(requested)
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            risk_broadcaster.unsubscribe(queue, requested)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,56 @@
+"""
+Keyset (cursor) pagination for list endpoints
+
+A page is read with WHERE (sort key) < (last key of the previous page) instead of OFFSET,
+so every page costs one index seek regardless of depth and rows inserted meanwhile do not
+shift later pages. The cursor is an opaque URL-safe token of the last row's sort key; the
+next one is returned in the X-Next-Cursor response header (absent on the last page).
+"""
+import base64
+import json
+from datetime import date
+from typing import Any, Dict, List, Sequence
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Opaque token for a sort key; dates are stored as ISO strings"""
+    payload = {k: v.isoformat() if isinstance(v, date) else v for k, v in values.items()}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, fields: Sequence[str], date_fields: Sequence[str] = ()) -> Dict[str, Any]:
+    """Sort key from a token made by encode_cursor; a malformed token or missing field is a 400"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, dict):
+            raise ValueError("cursor is not an object")
+        values = {field: values[field] for field in fields}
+        for field in date_fields:
+            values[field] = date.fromisoformat(values[field])
+        return values
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(rows: List[Any], limit: int, response: Response, cursor_values) -> List[Any]:
+    """
+    Trim a page queried with limit + 1 rows and set the next-page cursor header
+
+    Args:
+        rows: Query result fetched with .limit(limit + 1)
+        limit: Requested page size
+        response: Response to set the X-Next-Cursor header on
+        cursor_values: Function returning the sort-key dict of a row
+
+    Returns:
+        At most limit rows
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(cursor_values(rows[-1]))
+    return rows
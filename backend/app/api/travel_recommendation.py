@@ -1,19 +1,29 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, List, Optional, Tuple
 from datetime import date, timedelta
 from pydantic import BaseModel
 from app.db.database import get_db
+from app.db.write_queue import write_queue
 from app.models.travel_recommendation import TravelRecommendation
 from app.models.user import User
 from app.db.seed_nyc_data import generate_travel_recommendation
 from app.services.travel_recommendation_service import TravelRecommendationService
+from app.services.nyc_zip_codes import zip_codes_for_borough
+from app.services.risk_broadcaster import risk_broadcaster
 
 router = APIRouter(prefix="/api/nyc/travel", tags=["nyc-travel"])
 
 # Initialize service
 travel_service = TravelRecommendationService()
 
+# Limits for the bulk forecast endpoint
+MAX_BULK_ZIP_CODES = 200
+BULK_FORECAST_CONCURRENCY = 4  # ZIP codes generated at once, to stay under upstream API rate limits
+
 # Pydantic models
 class TravelRecommendationCreate(BaseModel):
     zip_code: str
@@ -53,13 +63,27 @@ class TravelRecommendationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BulkForecastResponse(BaseModel):
+    """Compact zip x day matrix; risk_score[i][j] is for zip_codes[i] on dates[j]"""
+    dates: List[date]
+    zip_codes: List[str]
+    risk_score: List[List[float]]
+    recommendation_level: List[List[str]]
+
 @router.post("/", response_model=TravelRecommendationResponse, status_code=201)
-async def create_travel_recommendation(data: TravelRecommendationCreate, db: Session = Depends(get_db)):
+async def create_travel_recommendation(data: TravelRecommendationCreate):
     """Create new travel recommendation entry"""
-    new_rec = TravelRecommendation(**data.dict())
-    db.add(new_rec)
-    db.commit()
-    db.refresh(new_rec)
+    async def insert(session: AsyncSession) -> TravelRecommendation:
+        new_rec = TravelRecommendation(**data.dict())
+        session.add(new_rec)
+        await session.flush()
+        return new_rec
+
+    try:
+        new_rec = await write_queue.submit(insert)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Travel recommendation for this ZIP code and date already exists")
+    risk_broadcaster.notify(new_rec.zip_code)
     return new_rec
 
 @router.get("/", response_model=List[TravelRecommendationResponse])
@@ -69,10 +93,10 @@ async def get_travel_recommendations(
     end_date: Optional[date] = Query(None, description="End date filter"),
     days: Optional[int] = Query(None, description="Number of days from today"),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get travel recommendations with optional filters"""
-    query = db.query(TravelRecommendation)
+    query = select(TravelRecommendation)
     
     if zip_code:
         query = query.filter(TravelRecommendation.zip_code == zip_code)
@@ -89,14 +113,14 @@ async def get_travel_recommendations(
             TravelRecommendation.date <= future_date
         )
     
-    data = query.order_by(TravelRecommendation.date.asc()).limit(limit).all()
-    return data
+    data = await db.scalars(query.order_by(TravelRecommendation.date.asc()).limit(limit))
+    return data.all()
 
 @router.get("/today", response_model=List[TravelRecommendationResponse])
 async def get_today_recommendations(
     zip_code: str = Query(..., description="ZIP code to get today's recommendations for"),
     user_id: Optional[int] = Query(None, description="Optional user ID for personalized recommendations"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get today's travel recommendations for a specific ZIP code. Generates data if not found. Supports personalization."""
     today = date.today()
@@ -104,18 +128,22 @@ async def get_today_recommendations(
     # Try to get user for personalization
     user = None
     if user_id:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
     
     # Check if we have existing data
-    data = db.query(TravelRecommendation)\
+    data = (await db.scalars(
+        select(TravelRecommendation)
         .filter(
             TravelRecommendation.zip_code == zip_code,
             TravelRecommendation.date == today
-        )\
-        .all()
+        )
+    )).all()
     
     # If no data exists for today, or if we need personalized data, generate it
     if not data or user:
+        # End of read phase: release the connection before the (possibly upstream-bound) generation
+        await db.close()
+        
         # Use new service for personalized recommendations if user is provided
         if user:
             rec_data = await travel_service.generate_travel_recommendation(
@@ -124,23 +152,44 @@ async def get_today_recommendations(
         else:
             rec_data = generate_travel_recommendation(zip_code, today, 0)
         
+        # Create new record (another request may have created it meanwhile)
+        async def insert(session: AsyncSession) -> TravelRecommendation:
+            new_rec = TravelRecommendation(**rec_data)
+            try:
+                async with session.begin_nested():
+                    session.add(new_rec)
+            except IntegrityError:
+                return await session.scalar(
+                    select(TravelRecommendation)
+                    .filter(
+                        TravelRecommendation.zip_code == zip_code,
+                        TravelRecommendation.date == today
+                    )
+                )
+            return new_rec
+        
         # If we have existing data but need to personalize, update it
         if data and user:
-            existing_rec = data[0]
-            # Update with personalized risk_score
-            existing_rec.risk_score = rec_data['risk_score']
-            existing_rec.recommendation_level = rec_data['recommendation_level']
-            existing_rec.general_advice = rec_data['general_advice']
-            existing_rec.overall_message = rec_data['overall_message']
-            db.commit()
-            db.refresh(existing_rec)
+            existing_id = data[0].id
+            
+            async def update(session: AsyncSession) -> TravelRecommendation:
+                existing_rec = await session.get(TravelRecommendation, existing_id)
+                if existing_rec is None:
+                    # Deleted since it was read
+                    return await insert(session)
+                # Update with personalized risk_score
+                existing_rec.risk_score = rec_data['risk_score']
+                existing_rec.recommendation_level = rec_data['recommendation_level']
+                existing_rec.general_advice = rec_data['general_advice']
+                existing_rec.overall_message = rec_data['overall_message']
+                return existing_rec
+            
+            existing_rec = await write_queue.submit(update)
+            risk_broadcaster.notify(zip_code)
             return [existing_rec]
         elif not data:
-            # Create new record
-            new_rec = TravelRecommendation(**rec_data)
-            db.add(new_rec)
-            db.commit()
-            db.refresh(new_rec)
+            new_rec = await write_queue.submit(insert)
+            risk_broadcaster.notify(zip_code)
             return [new_rec]
     
     return data
@@ -150,7 +199,7 @@ async def get_forecast_recommendations(
     zip_code: str = Query(..., description="ZIP code to get forecast for"),
     days: int = Query(7, ge=1, le=30, description="Number of days to forecast"),
     user_id: Optional[int] = Query(None, description="Optional user ID for personalized recommendations"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get forecast travel recommendations for a specific ZIP code. 
@@ -162,17 +211,18 @@ async def get_forecast_recommendations(
     # Try to get user for personalization
     user = None
     if user_id:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
     
     # Get existing data
-    existing_data = db.query(TravelRecommendation)\
+    existing_data = (await db.scalars(
+        select(TravelRecommendation)
         .filter(
             TravelRecommendation.zip_code == zip_code,
             TravelRecommendation.date >= today,
             TravelRecommendation.date <= future_date
-        )\
-        .order_by(TravelRecommendation.date.asc())\
-        .all()
+        )
+        .order_by(TravelRecommendation.date.asc())
+    )).all()
     
     # If we have all the data we need and no personalization, return it
     existing_dates = {rec.date for rec in existing_data}
@@ -181,27 +231,35 @@ async def get_forecast_recommendations(
     
     # Generate missing data or regenerate for personalization
     if missing_dates or user:
-        # Use new service for personalized recommendations
-        for target_date in sorted(required_dates):
-            day_offset = (target_date - today).days
-            
-            # Check if we need to generate/update this date
-            needs_generation = target_date in missing_dates
-            needs_personalization = user and target_date in existing_dates
-            
-            if needs_generation or needs_personalization:
-                # Use new service with prediction (from database) and personalization
-                rec_data = await travel_service.generate_travel_recommendation(
-                    zip_code, target_date, day_offset, user=user, use_prediction=True
-                )
-                
-                if needs_generation:
-                    # Create new record
-                    new_rec = TravelRecommendation(**rec_data)
-                    db.add(new_rec)
-                elif needs_personalization:
+        # End of read phase: release the connection while generation waits on upstream APIs
+        await db.close()
+        
+        # Dates that need generation, plus existing dates when personalizing
+        dates_to_generate = sorted(missing_dates | existing_dates) if user else sorted(missing_dates)
+        
+        # Use new service with prediction (from database) and personalization, batched per ZIP
+        generated = await travel_service.generate_travel_recommendations(
+            zip_code, dates_to_generate, user=user, use_prediction=True
+        )
+        
+        existing_ids = {rec.date: rec.id for rec in existing_data}
+        
+        async def upsert(session: AsyncSession) -> None:
+            for rec_data in generated:
+                target_date = rec_data['date']
+                existing_rec = None
+                if target_date not in missing_dates:
+                    # None if deleted since it was read
+                    existing_rec = await session.get(TravelRecommendation, existing_ids[target_date])
+                if existing_rec is None:
+                    # Create new record, unless a concurrent request already stored it
+                    try:
+                        async with session.begin_nested():
+                            session.add(TravelRecommendation(**rec_data))
+                    except IntegrityError:
+                        pass
+                else:
                     # Update existing record with personalized data
-                    existing_rec = next(rec for rec in existing_data if rec.date == target_date)
                     existing_rec.risk_score = rec_data['risk_score']
                     existing_rec.recommendation_level = rec_data['recommendation_level']
                     existing_rec.general_advice = rec_data['general_advice']
@@ -209,18 +267,127 @@ async def get_forecast_recommendations(
                     existing_rec.air_quality_message = rec_data['air_quality_message']
                     existing_rec.weather_message = rec_data['weather_message']
         
-        db.commit()
+        # Write phase: one short transaction on the writer
+        await write_queue.submit(upsert)
+        risk_broadcaster.notify(zip_code)
         
         # Fetch all data again (including newly generated/updated)
-        data = db.query(TravelRecommendation)\
+        data = await db.scalars(
+            select(TravelRecommendation)
             .filter(
                 TravelRecommendation.zip_code == zip_code,
                 TravelRecommendation.date >= today,
                 TravelRecommendation.date <= future_date
-            )\
-            .order_by(TravelRecommendation.date.asc())\
-            .all()
-        return data
+            )
+            .order_by(TravelRecommendation.date.asc())
+        )
+        return data.all()
     
     return existing_data
 
+@router.get("/forecast/bulk", response_model=BulkForecastResponse)
+async def get_bulk_forecast(
+    zip_codes: Optional[str] = Query(None, description="Comma-separated ZIP codes"),
+    borough: Optional[str] = Query(None, description="Borough name; expands to all of its ZIP codes"),
+    days: int = Query(7, ge=1, le=30, description="Number of days to forecast"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get forecast risk scores for many ZIP codes (or a whole borough) in one round trip.
+    Existing rows are read with a single IN query; missing cells are generated in a batch per ZIP.
+    """
+    requested: List[str] = []
+    if zip_codes:
+        requested.extend(z.strip() for z in zip_codes.split(',') if z.strip())
+    if borough:
+        borough_zip_codes = zip_codes_for_borough(borough)
+        if borough_zip_codes is None:
+            raise HTTPException(status_code=404, detail=f"Unknown borough: {borough}")
+        requested.extend(borough_zip_codes)
+    
+    # De-duplicate while keeping the requested order
+    requested = list(dict.fromkeys(requested))
+    if not requested:
+        raise HTTPException(status_code=400, detail="Provide zip_codes or borough")
+    if len(requested) > MAX_BULK_ZIP_CODES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ZIP_CODES} ZIP codes per request")
+    
+    today = date.today()
+    future_date = today + timedelta(days=days - 1)
+    required_dates = [today + timedelta(days=i) for i in range(days)]
+    
+    # One query for every existing cell, answered from the (zip, date, risk, level) covering index
+    existing_data = (await db.execute(
+        select(
+            TravelRecommendation.zip_code,
+            TravelRecommendation.date,
+            TravelRecommendation.risk_score,
+            TravelRecommendation.recommendation_level
+        )
+        .filter(
+            TravelRecommendation.zip_code.in_(requested),
+            TravelRecommendation.date >= today,
+            TravelRecommendation.date <= future_date
+        )
+    )).all()
+    
+    cells = {(rec.zip_code, rec.date): (rec.risk_score, rec.recommendation_level) for rec in existing_data}
+    
+    missing_by_zip = {}
+    for zip_code in requested:
+        missing = [d for d in required_dates if (zip_code, d) not in cells]
+        if missing:
+            missing_by_zip[zip_code] = missing
+    
+    # Generate missing cells, one batch per ZIP, a few ZIPs at a time
+    if missing_by_zip:
+        # End of read phase: release the connection while generation waits on upstream APIs
+        await db.close()
+        
+        semaphore = asyncio.Semaphore(BULK_FORECAST_CONCURRENCY)
+        
+        async def generate(zip_code: str, target_dates: List[date]) -> List[dict]:
+            async with semaphore:
+                return await travel_service.generate_travel_recommendations(
+                    zip_code, target_dates, use_prediction=True
+                )
+        
+        batches = await asyncio.gather(*(generate(z, d) for z, d in missing_by_zip.items()))
+        new_rows = [rec_data for batch in batches for rec_data in batch]
+        for rec_data in new_rows:
+            cells[(rec_data['zip_code'], rec_data['date'])] = (rec_data['risk_score'], rec_data['recommendation_level'])
+        
+        async def insert(session: AsyncSession) -> Dict[Tuple[str, date], Tuple[float, str]]:
+            conflicts = []
+            for rec_data in new_rows:
+                try:
+                    async with session.begin_nested():
+                        session.add(TravelRecommendation(**rec_data))
+                except IntegrityError:
+                    conflicts.append((rec_data['zip_code'], rec_data['date']))
+            if not conflicts:
+                return {}
+            # Stored first by a concurrent request (possibly personalized, or from other
+            # upstream data): respond with the stored values
+            stored = await session.execute(
+                select(
+                    TravelRecommendation.zip_code,
+                    TravelRecommendation.date,
+                    TravelRecommendation.risk_score,
+                    TravelRecommendation.recommendation_level
+                )
+                .filter(tuple_(TravelRecommendation.zip_code, TravelRecommendation.date).in_(conflicts))
+            )
+            return {(rec.zip_code, rec.date): (rec.risk_score, rec.recommendation_level) for rec in stored}
+        
+        # Write phase: one short transaction on the writer
+        cells.update(await write_queue.submit(insert))
+        for zip_code in missing_by_zip:
+            risk_broadcaster.notify(zip_code)
+    
+    return BulkForecastResponse(
+        dates=required_dates,
+        zip_codes=requested,
+        risk_score=[[cells[(z, d)][0] for d in required_dates] for z in requested],
+        recommendation_level=[[cells[(z, d)][1] for d in required_dates] for z in requested],
+    )
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
+from app.api.pagination import decode_cursor, paginate
 from app.db.database import get_db
+from app.db.write_queue import write_queue
 from app.models.user import User
 from app.api.auth import UserResponse, user_to_response
 import json
@@ -24,15 +28,24 @@ class UserProfileUpdate(BaseModel):
     emergencyPhone: Optional[str] = None
 
 @router.get("/", response_model=List[UserResponse])
-async def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all users (for admin/testing purposes)"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    return [user_to_response(user) for user in users]
+async def get_users(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated: offset paging; use cursor"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get all users by id (for admin/testing purposes); pages continue via the X-Next-Cursor header"""
+    query = select(User)
+    if cursor:
+        query = query.filter(User.id > decode_cursor(cursor, ["id"])["id"])
+    users = await db.scalars(query.order_by(User.id).offset(skip).limit(limit + 1))
+    return [user_to_response(user) for user in paginate(users.all(), limit, response, lambda row: {"id": row.id})]
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """Get user by ID"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -41,9 +54,9 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
     return user_to_response(user)
 
 @router.get("/by-email/{email}", response_model=UserResponse)
-async def get_user_by_email(email: str, db: Session = Depends(get_db)):
+async def get_user_by_email(email: str, db: AsyncSession = Depends(get_db)):
     """Get user by email"""
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).filter(User.email == email))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -52,9 +65,9 @@ async def get_user_by_email(email: str, db: Session = Depends(get_db)):
     return user_to_response(user)
 
 @router.patch("/{user_id}", response_model=UserResponse)
-async def update_user(user_id: int, user_update: UserProfileUpdate, db: Session = Depends(get_db)):
+async def update_user(user_id: int, user_update: UserProfileUpdate, db: AsyncSession = Depends(get_db)):
     """Update user profile"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -63,7 +76,7 @@ async def update_user(user_id: int, user_update: UserProfileUpdate, db: Session
     
     # Check if email is being changed and if it's already taken
     if user_update.email and user_update.email != user.email:
-        existing_user = db.query(User).filter(User.email == user_update.email).first()
+        existing_user = await db.scalar(select(User).filter(User.email == user_update.email))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -72,38 +85,54 @@ async def update_user(user_id: int, user_update: UserProfileUpdate, db: Session
     
     # Update fields
     update_data = user_update.model_dump(exclude_unset=True)
-    
-    if "name" in update_data and update_data["name"] is not None:
-        user.name = update_data["name"]
-    if "email" in update_data and update_data["email"] is not None:
-        user.email = update_data["email"]
-    if "hasAsthma" in update_data:
-        user.has_asthma = update_data["hasAsthma"]
-    if "asthmaSeverity" in update_data:
-        user.asthma_severity = update_data["asthmaSeverity"]
-    if "triggerFactors" in update_data:
-        if update_data["triggerFactors"]:
-            user.trigger_factors = json.dumps(update_data["triggerFactors"])
-        else:
-            user.trigger_factors = None
-    if "symptomFrequency" in update_data:
-        user.symptom_frequency = update_data["symptomFrequency"]
-    if "medicationUsage" in update_data:
-        user.medication_usage = update_data["medicationUsage"]
-    if "asthmaControl" in update_data:
-        user.asthma_control = update_data["asthmaControl"]
-    if "zipCode" in update_data:
-        user.zip_code = update_data["zipCode"]
-    if "selectedHospital" in update_data:
-        user.selected_hospital = update_data["selectedHospital"]
-    if "emergencyContact" in update_data:
-        user.emergency_contact = update_data["emergencyContact"]
-    if "emergencyPhone" in update_data:
-        user.emergency_phone = update_data["emergencyPhone"]
-    
-    db.commit()
-    db.refresh(user)
-    
+
+    async def update(session: AsyncSession) -> Optional[User]:
+        user = await session.get(User, user_id)
+        if user is None:
+            return None
+        if "name" in update_data and update_data["name"] is not None:
+            user.name = update_data["name"]
+        if "email" in update_data and update_data["email"] is not None:
+            user.email = update_data["email"]
+        if "hasAsthma" in update_data:
+            user.has_asthma = update_data["hasAsthma"]
+        if "asthmaSeverity" in update_data:
+            user.asthma_severity = update_data["asthmaSeverity"]
+        if "triggerFactors" in update_data:
+            if update_data["triggerFactors"]:
+                user.trigger_factors = json.dumps(update_data["triggerFactors"])
+            else:
+                user.trigger_factors = None
+        if "symptomFrequency" in update_data:
+            user.symptom_frequency = update_data["symptomFrequency"]
+        if "medicationUsage" in update_data:
+            user.medication_usage = update_data["medicationUsage"]
+        if "asthmaControl" in update_data:
+            user.asthma_control = update_data["asthmaControl"]
+        if "zipCode" in update_data:
+            user.zip_code = update_data["zipCode"]
+        if "selectedHospital" in update_data:
+            user.selected_hospital = update_data["selectedHospital"]
+        if "emergencyContact" in update_data:
+            user.emergency_contact = update_data["emergencyContact"]
+        if "emergencyPhone" in update_data:
+            user.emergency_phone = update_data["emergencyPhone"]
+        await session.flush()
+        return user
+
+    try:
+        user = await write_queue.submit(update)
+    except IntegrityError:
+        # Taken by a concurrent signup or update since the check above
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
     return user_to_response(user)
 
 
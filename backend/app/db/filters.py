@@ -0,0 +1,51 @@
+"""
+Query filters shared by the list endpoints and the exporters, so both select the same rows
+for the same parameters
+"""
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.sql.elements import ColumnElement
+from app.models.gas_data import GasData
+from app.models.gas_dimension import GasRegion, GasType
+from app.models.nyc_climate import NYCClimateData
+
+
+def dimension_id(dimension, name: str):
+    """Id of a gas dimension name as an uncorrelated subquery, so the id column's index is used"""
+    return select(dimension.id).where(dimension.name == name).scalar_subquery()
+
+
+def gas_data_filters(
+    gas_type: Optional[str] = None,
+    region: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[ColumnElement]:
+    """WHERE conditions for gas data; gas_type is matched upper-case"""
+    conditions = []
+    if gas_type:
+        conditions.append(GasData.gas_type_id == dimension_id(GasType, gas_type.upper()))
+    if region:
+        conditions.append(GasData.region_id == dimension_id(GasRegion, region))
+    if start_date:
+        conditions.append(GasData.date >= start_date)
+    if end_date:
+        conditions.append(GasData.date <= end_date)
+    return conditions
+
+
+def climate_data_filters(
+    zip_code: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[ColumnElement]:
+    """WHERE conditions for NYC climate data"""
+    conditions = []
+    if zip_code:
+        conditions.append(NYCClimateData.zip_code == zip_code)
+    if start_date:
+        conditions.append(NYCClimateData.date >= start_date)
+    if end_date:
+        conditions.append(NYCClimateData.date <= end_date)
+    return conditions
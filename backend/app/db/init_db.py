@@ -1,15 +1,24 @@
 from app.db.database import engine, Base
+from app.db.migrations import run_migrations
+from app.db.startup_lock import startup_lock
 # Import models to register them with SQLAlchemy
 from app.models.user import User
 from app.models.gas_data import GasData
+from app.models.gas_dimension import GasType, GasRegion, GasUnit, GasSource
 from app.models.hospital import Hospital
 from app.models.nyc_climate import NYCClimateData
 from app.models.travel_recommendation import TravelRecommendation
+from app.models.job import Job
+from app.models.rollup import ClimateRollup, GasRollup
+from app.models.data_version import DataVersion
 
 def init_db():
-    """Initialize database - create all tables"""
-    Base.metadata.create_all(bind=engine)
-    print("Database initialized successfully!")
+    """Initialize database - create all tables, then apply pending schema migrations"""
+    # One process at a time, so concurrently starting workers do not race on DDL
+    with startup_lock(engine):
+        Base.metadata.create_all(bind=engine)
+        schema_version = run_migrations(engine)
+    print(f"Database initialized successfully! (schema version {schema_version})")
 
 if __name__ == "__main__":
     init_db()
@@ -0,0 +1,166 @@
+"""
+Versioned schema migrations.
+Each migration runs once, in version order, inside its own transaction; the applied
+versions are recorded in the schema_version table. Applied automatically by init_db.
+Run from backend directory:
+    python -m app.db.migrations
+"""
+import logging
+from typing import Callable, List, Tuple
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+Migration = Tuple[int, str, Callable[[Connection], None]]
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Register a migration function under a schema version"""
+    def decorator(func: Callable[[Connection], None]):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+
+def deduplicate(conn: Connection, table: str, key_columns: List[str]) -> int:
+    """Delete duplicate rows on the key columns, keeping the most recently inserted one"""
+    columns = ", ".join(key_columns)
+    result = conn.execute(text(
+        f"DELETE FROM {table} WHERE id NOT IN (SELECT MAX(id) FROM {table} GROUP BY {columns})"
+    ))
+    if result.rowcount:
+        logger.info(f"Removed {result.rowcount} duplicate row(s) from {table} on ({columns})")
+    return result.rowcount
+
+
+def create_index(conn: Connection, name: str, table: str, columns: List[str], unique: bool = False) -> None:
+    """Create an index if it does not exist yet"""
+    conn.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    ))
+
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    """Whether the table has the column"""
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def add_column(conn: Connection, table: str, column: str, column_type: str) -> None:
+    """Add a column if it does not exist yet (create_all already adds it on fresh databases)"""
+    if has_column(conn, table, column):
+        return
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+
+
+@migration(1, "Deduplicate hot keys; add unique (zip_code, date) and (gas_type, region, date) keys and covering indexes")
+def _hot_key_indexes(conn: Connection) -> None:
+    deduplicate(conn, "nyc_climate_data", ["zip_code", "date"])
+    deduplicate(conn, "travel_recommendations", ["zip_code", "date"])
+    # gas_data keyed by name (fresh databases are created keyed by dimension id, see migration 4)
+    legacy_gas_data = has_column(conn, "gas_data", "gas_type")
+    if legacy_gas_data:
+        deduplicate(conn, "gas_data", ["gas_type", "region", "date"])
+
+    create_index(conn, "uq_nyc_climate_zip_date", "nyc_climate_data", ["zip_code", "date"], unique=True)
+    create_index(conn, "uq_travel_rec_zip_date", "travel_recommendations", ["zip_code", "date"], unique=True)
+    create_index(conn, "ix_travel_rec_zip_date_risk", "travel_recommendations",
+                 ["zip_code", "date", "risk_score", "recommendation_level"])
+    if legacy_gas_data:
+        create_index(conn, "uq_gas_data_series_date", "gas_data", ["gas_type", "region", "date"], unique=True)
+        create_index(conn, "ix_gas_data_series_date_value", "gas_data", ["gas_type", "region", "date", "value"])
+
+    # Single-column indexes that are now a prefix of a composite key
+    for index_name in ("ix_nyc_climate_data_zip_code", "ix_travel_recommendations_zip_code", "ix_gas_data_gas_type"):
+        conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+
+@migration(2, "Add nyc_climate_data.source provenance column (api, merged, seed)")
+def _climate_source(conn: Connection) -> None:
+    add_column(conn, "nyc_climate_data", "source", "VARCHAR")
+
+
+@migration(3, "Add (date, id) keyset pagination indexes on gas_data")
+def _gas_keyset_indexes(conn: Connection) -> None:
+    create_index(conn, "ix_gas_data_date_id", "gas_data", ["date", "id"])
+    if has_column(conn, "gas_data", "gas_type"):
+        create_index(conn, "ix_gas_data_type_date_id", "gas_data", ["gas_type", "date", "id"])
+    # Prefix of ix_gas_data_date_id
+    conn.execute(text("DROP INDEX IF EXISTS ix_gas_data_date"))
+
+
+@migration(4, "Move gas_data gas_type, region, unit and source into dimension tables referenced by id")
+def _gas_dimensions(conn: Connection) -> None:
+    # Fresh databases get the normalized table from create_all, as do the dimension tables
+    if not has_column(conn, "gas_data", "gas_type"):
+        return
+    dimensions = {"gas_type": "gas_types", "region": "gas_regions", "unit": "gas_units", "source": "gas_sources"}
+    for column, table in dimensions.items():
+        conn.execute(text(
+            f"INSERT INTO {table} (name) SELECT DISTINCT {column} FROM gas_data "
+            f"WHERE {column} IS NOT NULL AND {column} NOT IN (SELECT name FROM {table})"
+        ))
+        add_column(conn, "gas_data", f"{column}_id", f"INTEGER REFERENCES {table} (id)")
+    # One pass over the rows for all four ids
+    conn.execute(text("UPDATE gas_data SET " + ", ".join(
+        f"{column}_id = (SELECT id FROM {table} WHERE name = gas_data.{column})"
+        for column, table in dimensions.items()
+    )))
+
+    # Indexes on the string columns block dropping them; recreate them on the ids
+    for index_name in ("uq_gas_data_series_date", "ix_gas_data_series_date_value", "ix_gas_data_type_date_id",
+                       "ix_gas_data_region", "ix_gas_data_gas_type"):
+        conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+    for column in dimensions:
+        conn.execute(text(f"ALTER TABLE gas_data DROP COLUMN {column}"))
+    create_index(conn, "uq_gas_data_series_date", "gas_data", ["gas_type_id", "region_id", "date"], unique=True)
+    create_index(conn, "ix_gas_data_series_date_value", "gas_data", ["gas_type_id", "region_id", "date", "value"])
+    create_index(conn, "ix_gas_data_type_date_id", "gas_data", ["gas_type_id", "date", "id"])
+    # Replaces the region index, so region pages are read in (date, id) order too
+    create_index(conn, "ix_gas_data_region_date_id", "gas_data", ["region_id", "date", "id"])
+
+
+def get_schema_version(conn: Connection) -> int:
+    """Get the highest applied schema version (0 for a database that was never migrated)"""
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR NOT NULL, "
+        "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Apply all pending migrations
+
+    Args:
+        engine: Engine of the database to migrate
+
+    Returns:
+        Schema version after migrating
+    """
+    with engine.begin() as conn:
+        current_version = get_schema_version(conn)
+
+    for version, description, func in MIGRATIONS:
+        if version <= current_version:
+            continue
+        with engine.begin() as conn:
+            func(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+                {"version": version, "description": description}
+            )
+        current_version = version
+        logger.info(f"Applied migration {version}: {description}")
+
+    return current_version
+
+
+if __name__ == "__main__":
+    from app.db.init_db import init_db
+    init_db()
@@ -0,0 +1,81 @@
+"""
+Connection hold-time metrics.
+Records how long each pooled connection stays checked out, so flows that keep a
+connection (and on SQLite, possibly a lock) across slow upstream calls show up as
+long holds instead of as unexplained "database is locked" stalls.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Holds longer than this are logged as warnings
+DB_HOLD_WARN_MS = float(os.getenv("DB_HOLD_WARN_MS", "1000"))
+# Number of recent holds kept for the percentiles
+HOLD_SAMPLE_SIZE = 1000
+
+
+class PoolMetrics:
+    """Checkout counts and connection hold times for one engine's pool"""
+
+    def __init__(self, warn_ms: float = DB_HOLD_WARN_MS):
+        self.warn_ms = warn_ms
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=HOLD_SAMPLE_SIZE)
+        self.checkouts = 0
+        self.checked_out = 0
+        self.total_hold_ms = 0.0
+        self.max_hold_ms = 0.0
+        self.long_holds = 0
+
+    def attach(self, engine: Engine) -> None:
+        """Listen to checkout/checkin on the engine's pool (pass engine.sync_engine for async engines)"""
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is None:
+            return
+        held_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.checked_out -= 1
+            self.total_hold_ms += held_ms
+            self.max_hold_ms = max(self.max_hold_ms, held_ms)
+            self._recent.append(held_ms)
+            if held_ms > self.warn_ms:
+                self.long_holds += 1
+        if held_ms > self.warn_ms:
+            logger.warning(f"Database connection held for {held_ms:.0f} ms")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current counters plus p50/p95 over the most recent holds"""
+        with self._lock:
+            recent = sorted(self._recent)
+            completed = self.checkouts - self.checked_out
+
+            def percentile(p: float) -> float:
+                return round(recent[min(int(len(recent) * p), len(recent) - 1)], 2) if recent else 0.0
+
+            return {
+                "checkouts": self.checkouts,
+                "checked_out": self.checked_out,
+                "avg_hold_ms": round(self.total_hold_ms / completed, 2) if completed else 0.0,
+                "p50_hold_ms": percentile(0.50),
+                "p95_hold_ms": percentile(0.95),
+                "max_hold_ms": round(self.max_hold_ms, 2),
+                "long_holds": self.long_holds,
+                "long_hold_threshold_ms": self.warn_ms,
+            }
@@ -3,8 +3,10 @@ Seed script to populate hospitals table with sample NYC entries.
 Run from backend directory:
     python -m app.db.seed_hospitals
 """
+from sqlalchemy import insert, select
 from app.db.database import SessionLocal
 from app.models.hospital import Hospital
+from app.services.dimension_cache import bump_data_version
 
 
 SAMPLE_HOSPITALS = [
@@ -182,17 +184,23 @@ SAMPLE_HOSPITALS = [
 ]
 
 
-def seed_hospitals():
+def seed_hospitals() -> int:
+    """Insert the sample hospitals that are not stored yet (by name); returns how many were inserted"""
     db = SessionLocal()
     try:
-        inserted = 0
-        for h in SAMPLE_HOSPITALS:
-            if db.query(Hospital).filter_by(name=h["name"]).first():
-                continue
-            db.add(Hospital(**h))
-            inserted += 1
+        # One lookup for all names, then one bulk insert of the missing ones
+        existing = set(db.scalars(
+            select(Hospital.name).where(Hospital.name.in_([h["name"] for h in SAMPLE_HOSPITALS]))
+        ))
+        missing = [h for h in SAMPLE_HOSPITALS if h["name"] not in existing]
+        if missing:
+            db.execute(insert(Hospital.__table__), missing)
+        inserted = len(missing)
+        if inserted:
+            db.execute(bump_data_version(db.get_bind().dialect.name, Hospital.__tablename__))
         db.commit()
         print(f"Inserted {inserted} hospital(s)")
+        return inserted
     finally:
         db.close()
 
@@ -3,12 +3,18 @@ Script to seed NYC climate data and travel recommendations
 Generates mock data for testing purposes
 """
 import math
-import random
 from datetime import date, timedelta
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
-from app.models.nyc_climate import NYCClimateData
+from app.models.nyc_climate import NYCClimateData, SOURCE_SEED
 from app.models.travel_recommendation import TravelRecommendation
+from app.db.upsert import insert_on_conflict
+from app.services.dimension_cache import bump_data_version
+from app.services.rollups import rebuild_climate_rollups, refresh_climate_rollups
+from app.services.seeded_random import seeded_rng
+
+# Common NYC ZIP codes
+DEFAULT_ZIP_CODES = ['10001', '10002', '10003', '10004', '10005', '11201', '10451', '10301', '11101']
 
 def generate_climate_data(zip_code: str, target_date: date) -> dict:
     """Generate mock climate data for a specific zip code and date"""
@@ -31,14 +37,18 @@ def generate_climate_data(zip_code: str, target_date: date) -> dict:
         "visibility": 10 + (ord(zip_code[0]) % 5),
         "uv_index": 4 + (ord(zip_code[0]) % 6),
         "pollen_count": 50 + (ord(zip_code[0]) % 100),
-        "asthma_index": 30 + (baseAQI - 30) + (ord(zip_code[0]) % 20)
+        "asthma_index": 30 + (baseAQI - 30) + (ord(zip_code[0]) % 20),
+        "source": SOURCE_SEED
     }
 
 def generate_travel_recommendation(zip_code: str, target_date: date, day_offset: int) -> dict:
     """Generate mock travel recommendation for a specific zip code and date"""
+    # Variation is seeded from (zip, date, model version) so the output is repeatable
+    rng = seeded_rng("seed_travel_recommendation", zip_code, target_date)
+    
     # Generate more varied and irregular data
     base_variation = math.sin(day_offset * 0.8) * 15 + math.cos(day_offset * 1.2) * 10
-    random_variation = (random.random() - 0.5) * 25
+    random_variation = (rng.random() - 0.5) * 25
     day_of_week = target_date.weekday()
     weekend_effect = -5 if day_of_week >= 5 else 3
     
@@ -62,23 +72,23 @@ def generate_travel_recommendation(zip_code: str, target_date: date, day_offset:
     
     if chri <= 40:
         level = 'safe'
-        risk_score = 15 + (ord(zip_code[0]) % 15) + random.random() * 10
+        risk_score = 15 + (ord(zip_code[0]) % 15) + rng.random() * 10
     elif chri <= 70:
         level = 'moderate'
-        risk_score = 35 + (ord(zip_code[0]) % 20) + random.random() * 15
+        risk_score = 35 + (ord(zip_code[0]) % 20) + rng.random() * 15
     elif chri <= 100:
         level = 'caution'
-        risk_score = 55 + (ord(zip_code[0]) % 25) + random.random() * 15
+        risk_score = 55 + (ord(zip_code[0]) % 25) + rng.random() * 15
     else:
         level = 'avoid'
-        risk_score = 75 + (ord(zip_code[0]) % 20) + random.random() * 10
+        risk_score = 75 + (ord(zip_code[0]) % 20) + rng.random() * 10
     
-    air_quality_score = max(0, min(100, 100 - air_quality_factor + (random.random() * 15 - 7.5)))
-    weather_score = max(0, min(100, 75 + weather_factor * 0.3 + (random.random() * 10 - 5)))
-    pollen_score = max(0, min(100, 70 + (ord(zip_code[0]) % 25) + (random.random() * 12 - 6)))
+    air_quality_score = max(0, min(100, 100 - air_quality_factor + (rng.random() * 15 - 7.5)))
+    weather_score = max(0, min(100, 75 + weather_factor * 0.3 + (rng.random() * 10 - 5)))
+    pollen_score = max(0, min(100, 70 + (ord(zip_code[0]) % 25) + (rng.random() * 12 - 6)))
     
-    temperature = 18 + (ord(zip_code[0]) % 8) + (math.sin(day_offset * 0.5) * 3) + (random.random() * 4 - 2)
-    humidity = 55 + (ord(zip_code[1]) % 25 if len(zip_code) > 1 else 20) + (math.cos(day_offset * 0.6) * 8) + (random.random() * 6 - 3)
+    temperature = 18 + (ord(zip_code[0]) % 8) + (math.sin(day_offset * 0.5) * 3) + (rng.random() * 4 - 2)
+    humidity = 55 + (ord(zip_code[1]) % 25 if len(zip_code) > 1 else 20) + (math.cos(day_offset * 0.6) * 8) + (rng.random() * 6 - 3)
     
     date_str = target_date.strftime('%B %d')
     time_options = ['morning', 'afternoon', 'evening', 'early morning']
@@ -111,41 +121,64 @@ def generate_travel_recommendation(zip_code: str, target_date: date, day_offset:
         "exercise_recommendation": "safe" if final_risk_score <= 40 else "moderate" if final_risk_score <= 70 else "avoid"
     }
 
-def seed_nyc_data(zip_codes: list[str] = None, days: int = 7):
-    """Seed NYC climate data and travel recommendations for specified zip codes"""
+def seed_nyc_data(zip_codes: list[str] = None, days: int = 7, reset: bool = False) -> int:
+    """
+    Seed NYC climate data and travel recommendations for specified zip codes
+
+    Rows whose (zip_code, date) is already stored are kept, so seeding again (or from
+    several processes) only adds what is missing.
+
+    Args:
+        zip_codes: ZIP codes to seed (default: common NYC ZIP codes)
+        days: Days of travel recommendations from today
+        reset: Delete all stored climate data and recommendations first
+
+    Returns:
+        Number of rows inserted
+    """
     if zip_codes is None:
-        zip_codes = ['10001', '10002', '10003', '10004', '10005', '11201', '10451', '10301', '11101']
+        zip_codes = DEFAULT_ZIP_CODES
     
     db: Session = SessionLocal()
+    dialect_name = db.get_bind().dialect.name
     
     try:
-        # Delete existing data first
-        db.query(NYCClimateData).delete()
-        db.query(TravelRecommendation).delete()
-        db.commit()
-        print(f"Cleared existing NYC data")
+        if reset:
+            db.query(NYCClimateData).delete()
+            db.query(TravelRecommendation).delete()
+            db.execute(bump_data_version(dialect_name, NYCClimateData.__tablename__))
+            db.commit()
+            print(f"Cleared existing NYC data")
         
         today = date.today()
+        # Climate data for today, travel recommendations for the next N days
+        climate_rows = [generate_climate_data(zip_code, today) for zip_code in zip_codes]
+        rec_rows = [
+            generate_travel_recommendation(zip_code, today + timedelta(days=i), i)
+            for zip_code in zip_codes
+            for i in range(days)
+        ]
         
-        for zip_code in zip_codes:
-            print(f"Seeding data for ZIP code {zip_code}...")
-            
-            # Generate climate data for today
-            climate_data = generate_climate_data(zip_code, today)
-            db_climate = NYCClimateData(**climate_data)
-            db.add(db_climate)
-            
-            # Generate travel recommendations for next N days
-            for i in range(days):
-                target_date = today + timedelta(days=i)
-                rec_data = generate_travel_recommendation(zip_code, target_date, i)
-                db_rec = TravelRecommendation(**rec_data)
-                db.add(db_rec)
-            
-            print(f"  - Added climate data and {days} days of recommendations")
+        # One executemany per table; existing keys are skipped
+        climate_inserted = db.execute(
+            insert_on_conflict(dialect_name, NYCClimateData.__table__, None, index_elements=["zip_code", "date"]),
+            climate_rows
+        ).rowcount
+        rec_inserted = db.execute(
+            insert_on_conflict(dialect_name, TravelRecommendation.__table__, None, index_elements=["zip_code", "date"]),
+            rec_rows
+        ).rowcount
         
+        if reset:
+            rebuild_climate_rollups(db)
+        elif climate_inserted:
+            refresh_climate_rollups(db, [(row["zip_code"], row["date"]) for row in climate_rows])
+        if climate_inserted:
+            db.execute(bump_data_version(dialect_name, NYCClimateData.__tablename__))
         db.commit()
-        print(f"\nSuccessfully seeded data for {len(zip_codes)} ZIP codes with {days} days of forecasts!")
+        print(f"Seeded {len(zip_codes)} ZIP codes with {days} days of forecasts: "
+              f"inserted {climate_inserted} climate row(s) and {rec_inserted} recommendation(s)")
+        return climate_inserted + rec_inserted
         
     except Exception as e:
         db.rollback()
@@ -155,9 +188,11 @@ def seed_nyc_data(zip_codes: list[str] = None, days: int = 7):
         db.close()
 
 if __name__ == "__main__":
-    # Seed data for common NYC zip codes
-    seed_nyc_data(
-        zip_codes=['10001', '10002', '10003', '10004', '10005', '11201', '10451', '10301', '11101'],
-        days=7
-    )
+    import argparse
 
+    parser = argparse.ArgumentParser(description="Seed mock NYC climate data and travel recommendations")
+    parser.add_argument("--zip-codes", nargs="+", default=DEFAULT_ZIP_CODES)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--reset", action="store_true", help="Delete all stored NYC data first")
+    args = parser.parse_args()
+    seed_nyc_data(zip_codes=args.zip_codes, days=args.days, reset=args.reset)
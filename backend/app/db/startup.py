@@ -0,0 +1,133 @@
+"""
+Database preparation on API startup: create tables, migrate, seed sample data and build
+missing rollups, once per schema and seed version.
+
+After a successful run the startup_state table records a marker of the schema version,
+a fingerprint of the table definitions in the models and SEED_VERSION. A process that
+finds the current marker skips everything (one primary-key read). Otherwise it takes the
+cross-process startup lock, checks the marker again (another worker may have finished in
+the meantime) and does the work; seeding only inserts missing rows, so it never removes
+data another process wrote.
+"""
+import hashlib
+import logging
+import time
+from typing import Optional
+from sqlalchemy import exists, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from app.db.database import Base, SessionLocal, engine
+from app.db.init_db import init_db
+from app.db.migrations import MIGRATIONS
+from app.db.seed_hospitals import seed_hospitals
+from app.db.seed_nyc_data import seed_nyc_data
+from app.db.startup_lock import startup_lock
+from app.models.hospital import Hospital
+from app.models.nyc_climate import NYCClimateData
+from app.models.travel_recommendation import TravelRecommendation
+from app.services.rollups import build_rollups_if_empty
+
+logger = logging.getLogger(__name__)
+
+# Bump when the startup seed data or steps change, so existing databases run them again
+SEED_VERSION = 1
+STARTUP_MARKER = "startup"
+
+
+def schema_fingerprint() -> str:
+    """Short hash of the tables, columns and indexes defined by the models"""
+    parts = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(table.name)
+        parts.extend(f"{c.name} {c.type} {c.nullable}" for c in table.columns)
+        parts.extend(sorted(
+            f"{i.name} {[c.name for c in i.columns]} {i.unique}" for i in table.indexes
+        ))
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def expected_marker() -> str:
+    """Marker of a database that is fully prepared for this code"""
+    return f"schema {MIGRATIONS[-1][0]} tables {schema_fingerprint()} seed {SEED_VERSION}"
+
+
+def read_marker(conn: Connection) -> Optional[str]:
+    """Stored startup marker, None if the database was never prepared"""
+    try:
+        return conn.execute(
+            text("SELECT value FROM startup_state WHERE name = :name"), {"name": STARTUP_MARKER}
+        ).scalar()
+    except DBAPIError:
+        # No startup_state table yet
+        conn.rollback()
+        return None
+
+
+def write_marker(conn: Connection, marker: str) -> None:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS startup_state ("
+        "name VARCHAR PRIMARY KEY, "
+        "value VARCHAR NOT NULL, "
+        "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    conn.execute(text("DELETE FROM startup_state WHERE name = :name"), {"name": STARTUP_MARKER})
+    conn.execute(
+        text("INSERT INTO startup_state (name, value) VALUES (:name, :value)"),
+        {"name": STARTUP_MARKER, "value": marker}
+    )
+
+
+def seed_if_empty() -> None:
+    """Seed NYC climate/travel data and sample hospitals into empty tables"""
+    db = SessionLocal()
+    try:
+        nyc_empty = not db.scalar(select(exists().select_from(NYCClimateData))) or \
+            not db.scalar(select(exists().select_from(TravelRecommendation)))
+        hospitals_empty = not db.scalar(select(exists().select_from(Hospital)))
+    finally:
+        db.close()
+    if nyc_empty:
+        seed_nyc_data()
+    if hospitals_empty:
+        seed_hospitals()
+
+
+def build_rollups_if_missing() -> None:
+    """Build the time-series rollups for databases created before they existed"""
+    db = SessionLocal()
+    try:
+        build_rollups_if_empty(db)
+    finally:
+        db.close()
+
+
+def prepare_database() -> bool:
+    """
+    Bring the configured database (DATABASE_URL) up to date for this code unless it already is
+
+    Returns:
+        True if the tables, migrations and seed data were checked (and the marker
+        written), False if the stored marker was already current
+    """
+    started = time.perf_counter()
+    marker = expected_marker()
+    with engine.connect() as conn:
+        current = read_marker(conn) == marker
+    if not current:
+        with startup_lock(engine):
+            with engine.connect() as conn:
+                current = read_marker(conn) == marker
+            if not current:
+                init_db()
+                seed_if_empty()
+                build_rollups_if_missing()
+                with engine.begin() as conn:
+                    write_marker(conn, marker)
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"Database {'up to date' if current else 'prepared'} in {elapsed_ms:.1f} ms ({marker})")
+    return not current
+
+
+if __name__ == "__main__":
+    prepare_database()
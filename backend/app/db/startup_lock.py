@@ -0,0 +1,100 @@
+"""
+Cross-process lock around schema setup and seeding.
+Several API workers (uvicorn --workers, gunicorn) start against the same database at
+once; only one of them may create tables, migrate or seed at a time.
+- SQLite: an exclusive transaction on a small lock database next to the database file,
+  so the lock is released by the OS if the process dies
+- PostgreSQL: a session-level advisory lock
+Other databases (and in-memory SQLite) are not locked.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+STARTUP_LOCK_TIMEOUT_SECONDS = float(os.getenv("STARTUP_LOCK_TIMEOUT_SECONDS", "300"))
+# Arbitrary advisory lock key shared by all processes of this app
+PG_STARTUP_LOCK_KEY = 0x45425354
+
+# The lock is re-entrant within a process (prepare_database holds it while calling init_db)
+_local_lock = threading.RLock()
+_depth = 0
+
+
+def sqlite_lock_path(engine: Engine) -> Optional[str]:
+    """Path of the lock file for a SQLite database file, None for in-memory databases"""
+    database = engine.url.database
+    if not database or database == ":memory:" or database.startswith("file::memory:"):
+        return None
+    return f"{database}.startup-lock"
+
+
+@contextmanager
+def _sqlite_lock(path: str, timeout: float) -> Iterator[None]:
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    try:
+        try:
+            conn.execute("BEGIN EXCLUSIVE")
+        except sqlite3.OperationalError as e:
+            raise TimeoutError(f"Timed out after {timeout:.0f}s waiting for the startup lock {path}") from e
+        try:
+            yield
+        finally:
+            conn.execute("ROLLBACK")
+    finally:
+        conn.close()
+
+
+@contextmanager
+def _postgres_lock(engine: Engine, timeout: float) -> Iterator[None]:
+    with engine.connect() as conn:
+        # Only for this connection's transaction, which lasts until the unlock
+        conn.execute(text(f"SET LOCAL lock_timeout = {int(timeout * 1000)}"))
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": PG_STARTUP_LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PG_STARTUP_LOCK_KEY})
+            conn.commit()
+
+
+@contextmanager
+def startup_lock(engine: Engine, timeout: Optional[float] = None) -> Iterator[None]:
+    """
+    Hold the database's startup lock, waiting for other processes that hold it
+
+    Raises:
+        TimeoutError: (SQLite) the lock was not acquired within the timeout
+    """
+    global _depth
+    timeout = STARTUP_LOCK_TIMEOUT_SECONDS if timeout is None else timeout
+    with _local_lock:
+        if _depth:
+            _depth += 1
+            try:
+                yield
+            finally:
+                _depth -= 1
+            return
+
+        dialect = engine.dialect.name
+        path = sqlite_lock_path(engine) if dialect == "sqlite" else None
+        if path:
+            lock = _sqlite_lock(path, timeout)
+        elif dialect == "postgresql":
+            lock = _postgres_lock(engine, timeout)
+        else:
+            lock = None
+
+        _depth = 1
+        try:
+            if lock is None:
+                yield
+            else:
+                with lock:
+                    yield
+        finally:
+            _depth = 0
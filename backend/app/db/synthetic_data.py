@@ -0,0 +1,546 @@
+"""
+Synthetic dataset generator for load testing
+Generates years of climate data for many ZIP codes, travel recommendations, greenhouse-gas
+series and users with NumPy, one whole column per ZIP code block or series block (no
+per-row Python), and bulk-loads them:
+
+- Climate: per metric a yearly cycle, a weekday effect (traffic pollutants), a day-to-day
+  weather anomaly shared by all ZIP codes (smoothed over ~2 weeks), a per-ZIP offset and
+  noise. AQI is derived from PM2.5 and O3 with the EPA breakpoints; pollen has spring,
+  grass and ragweed peaks.
+- Travel recommendations: risk score, level and component scores derived from each
+  climate row.
+- Gas: per (gas type, region) daily series with a trend, a seasonal cycle and noise.
+- Users: questionnaire answers drawn from the signup form's options. All users share one
+  bcrypt hash of SYNTHETIC_PASSWORD (hashing each one would take longer than the load).
+
+The same --seed and arguments give the same rows (apart from the password hash salt); the
+values of a ZIP code or gas series do not depend on how many others are generated. Rows
+whose key is already stored are skipped, so a run can be repeated or extended. Rows are
+written per chunk with one executemany: straight through the SQLite driver (--method
+sqlite, the default on SQLite) or as SQLAlchemy Core inserts (--method core, any database).
+Rollups are rebuilt afterwards.
+
+Run from backend directory:
+    python -m app.db.synthetic_data --zip-codes 500 --days 1095 --gas-regions 200 --users 100000
+    python -m app.db.synthetic_data --tables climate --metrics aqi pm25 temperature --method core
+"""
+import argparse
+import json
+import time
+import zlib
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import bcrypt
+import numpy as np
+from sqlalchemy import Table, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from app.db.database import engine as default_engine
+from app.db.seed_hospitals import SAMPLE_HOSPITALS
+from app.db.upsert import insert_on_conflict
+from app.models.gas_data import GasData
+from app.models.gas_dimension import GasRegion, GasSource, GasType, GasUnit
+from app.models.nyc_climate import NYCClimateData, SOURCE_INGEST
+from app.models.travel_recommendation import TravelRecommendation
+from app.models.user import User
+from app.services.dimension_cache import bump_data_version
+from app.services.gas_importer import GAS_UNITS
+from app.services.nyc_zip_codes import NYC_BOROUGH_ZIP_CODES
+from app.services.rollups import rebuild_climate_rollups, rebuild_gas_rollups
+
+TABLES = ["climate", "travel", "gas", "users"]
+SYNTHETIC_PASSWORD = "synthetic-password"
+SYNTHETIC_SOURCE = "synthetic"
+DEFAULT_CHUNK_ROWS = 100000
+
+# Seed streams, so each table's values are independent of the others
+_CLIMATE_STREAM, _GAS_STREAM, _USER_STREAM = 1, 2, 3
+
+
+class MetricSpec(NamedTuple):
+    mean: float
+    seasonal_amplitude: float
+    peak_day: int  # Day of year of the seasonal maximum
+    weekday_effect: float  # Relative change on weekdays (weekends get -1.5x of it)
+    weather_sd: float  # Scale of the anomaly shared by all ZIP codes
+    zip_sd: float  # Standard deviation of the per-ZIP offset
+    noise_sd: float
+    low: float
+    high: float
+    decimals: int
+
+
+# Generated metrics; aqi and asthma_index are derived from them, pollen_count and
+# wind_direction have their own shapes
+METRIC_SPECS: Dict[str, MetricSpec] = {
+    "pm25": MetricSpec(8.5, 1.5, 15, 0.08, 3.0, 0.8, 1.5, 0.5, 150, 1),
+    "pm10": MetricSpec(17.0, 3.0, 190, 0.06, 5.0, 1.5, 3.0, 1, 300, 1),
+    "o3": MetricSpec(0.035, 0.012, 180, -0.05, 0.005, 0.002, 0.004, 0.001, 0.15, 3),
+    "no2": MetricSpec(20.0, 4.0, 15, 0.2, 4.0, 3.0, 3.0, 1, 100, 1),
+    "co": MetricSpec(0.35, 0.1, 15, 0.15, 0.06, 0.05, 0.05, 0.05, 5, 2),
+    "temperature": MetricSpec(13.0, 11.0, 200, 0.0, 3.0, 0.7, 1.5, -20, 40, 1),
+    "humidity": MetricSpec(63.0, 6.0, 200, 0.0, 6.0, 3.0, 5.0, 15, 100, 0),
+    "wind_speed": MetricSpec(14.0, 3.0, 50, 0.0, 4.0, 2.0, 3.0, 0, 80, 1),
+    "pressure": MetricSpec(1016.0, 2.0, 20, 0.0, 6.0, 0.5, 2.0, 970, 1050, 1),
+    "visibility": MetricSpec(14.0, 1.0, 200, 0.0, 2.0, 1.0, 1.5, 0.5, 20, 1),
+    "uv_index": MetricSpec(4.5, 3.8, 172, 0.0, 0.8, 0.2, 0.6, 0, 11, 1),
+}
+CLIMATE_METRICS = ["aqi", "pm25", "pm10", "o3", "no2", "co", "temperature", "humidity", "wind_speed",
+                   "wind_direction", "pressure", "visibility", "uv_index", "pollen_count", "asthma_index"]
+# Shared-anomaly and noise rows drawn per ZIP code: the generated metrics, then pollen,
+# wind direction and travel risk
+_NOISE_ROWS = list(METRIC_SPECS) + ["pollen_count", "wind_direction", "risk"]
+# Days of the weather anomaly smoothing window
+_WEATHER_WINDOW = 15
+
+# EPA AQI breakpoints: PM2.5 (ug/m3, 24-hour) and O3 (ppm, 8-hour) to index
+_PM25_BREAKPOINTS = ([0.0, 9.0, 35.4, 55.4, 125.4, 225.4, 325.4], [0, 50, 100, 150, 200, 300, 500])
+_O3_BREAKPOINTS = ([0.0, 0.054, 0.070, 0.085, 0.105, 0.200], [0, 50, 100, 150, 200, 300])
+
+
+class GasSpec(NamedTuple):
+    level: float  # Value on 2020-01-01
+    trend_per_year: float
+    seasonal_amplitude: float
+    peak_day: int
+    noise_sd: float
+    region_sd: float
+
+
+GAS_SPECS: Dict[str, GasSpec] = {
+    "CO2": GasSpec(411.0, 2.4, 3.0, 135, 0.5, 1.5),
+    "CH4": GasSpec(1875.0, 10.0, 10.0, 250, 3.0, 15.0),
+    "N2O": GasSpec(333.0, 1.0, 0.3, 120, 0.2, 0.5),
+    "SF6": GasSpec(10.0, 0.35, 0.02, 100, 0.02, 0.05),
+}
+_GAS_EPOCH = np.datetime64("2020-01-01")
+
+_TRIGGERS = ["Pollen", "Smoke", "Air Pollution", "Cold Air", "Exercise", "Pet Dander", "Dust Mites", "Mold",
+             "Stress", "Other"]
+_FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn",
+                "Maria", "Wei", "Aisha", "Carlos", "Priya", "Dmitri", "Fatima", "Kenji", "Amara", "Luca"]
+_LAST_NAMES = ["Smith", "Garcia", "Chen", "Johnson", "Patel", "Kim", "Rodriguez", "Nguyen", "Williams", "Cohen",
+               "Brown", "Singh", "Lopez", "Okafor", "Rossi", "Ivanova", "Murphy", "Haddad", "Tanaka", "Silva"]
+_LEVELS = np.array(["safe", "moderate", "caution", "avoid"])
+_ADVICE = np.array([
+    "Excellent conditions for outdoor activities. Perfect day to enjoy fresh air and exercise safely.",
+    "Good conditions for most outdoor activities. Monitor your symptoms and enjoy your day!",
+    "Moderate risk conditions. Consider limiting prolonged outdoor activities during peak hours. Monitor air quality and carry your inhaler.",
+    "High risk conditions. Limit outdoor activities, especially during peak hours. Stay indoors when possible and keep your inhaler close.",
+])
+_TIMES_OF_DAY = np.array(["morning", "afternoon", "evening", "early morning"])
+
+Frame = Dict[str, np.ndarray]
+
+
+def synthetic_zip_codes(count: int) -> List[str]:
+    """The first count NYC ZIP codes, continued with made-up codes from 90000 when there are more"""
+    nyc = [zip_code for zip_codes in NYC_BOROUGH_ZIP_CODES.values() for zip_code in zip_codes]
+    return (nyc + [str(90000 + i) for i in range(max(0, count - len(nyc)))])[:count]
+
+
+def date_range(start: date, days: int) -> np.ndarray:
+    return np.arange(np.datetime64(start, "D"), np.datetime64(start + timedelta(days=days), "D"))
+
+
+def _day_of_year(dates: np.ndarray) -> np.ndarray:
+    return (dates - dates.astype("datetime64[Y]")).astype(int) + 1
+
+
+def _seasonal(day_of_year: np.ndarray, amplitude: float, peak_day: int) -> np.ndarray:
+    return amplitude * np.cos(2 * np.pi * (day_of_year - peak_day) / 365.25)
+
+
+def _weather_anomalies(seed: int, start: date, days: int) -> np.ndarray:
+    """Unit-variance day-to-day anomaly per noise row, shared by all ZIP codes, (rows, days)"""
+    rng = np.random.default_rng([seed, _CLIMATE_STREAM, start.toordinal()])
+    white = rng.standard_normal((len(_NOISE_ROWS), days + _WEATHER_WINDOW - 1))
+    kernel = np.exp(-np.arange(_WEATHER_WINDOW) / 3.0)
+    kernel /= np.sqrt(np.sum(kernel ** 2))
+    return np.stack([np.convolve(row, kernel, mode="valid") for row in white])
+
+
+def climate_frame(zip_codes: Sequence[str], dates: np.ndarray, seed: int,
+                  weather: Optional[np.ndarray] = None) -> Frame:
+    """
+    Climate values of every ZIP code and date, ZIP-major
+
+    Args:
+        weather: Result of _weather_anomalies for the dates; pass it when generating the
+                 ZIP codes in blocks so all blocks share it
+    """
+    days = len(dates)
+    if weather is None:
+        weather = _weather_anomalies(seed, dates[0].astype(object), days)
+    day_of_year = _day_of_year(dates)
+    weekday = (dates.astype("datetime64[D]").astype(int) + 3) % 7  # 1970-01-01 was a Thursday
+    weekday_sign = np.where(weekday < 5, 1.0, -1.5)
+
+    # Per-ZIP offsets and noise from a generator keyed by the ZIP code, (zips, rows[, days])
+    offsets, noise = [], []
+    for zip_code in zip_codes:
+        rng = np.random.default_rng([seed, _CLIMATE_STREAM, zlib.crc32(zip_code.encode())])
+        offsets.append(rng.standard_normal(len(_NOISE_ROWS)))
+        noise.append(rng.standard_normal((len(_NOISE_ROWS), days)))
+    offsets = np.array(offsets)[:, :, None]
+    noise = np.array(noise)
+    row = {name: i for i, name in enumerate(_NOISE_ROWS)}
+
+    values: Dict[str, np.ndarray] = {}
+    for name, spec in METRIC_SPECS.items():
+        i = row[name]
+        mean = spec.mean + _seasonal(day_of_year, spec.seasonal_amplitude, spec.peak_day)
+        mean = mean * (1 + spec.weekday_effect * weekday_sign)
+        value = mean + spec.weather_sd * weather[i] + spec.zip_sd * offsets[:, i] + spec.noise_sd * noise[:, i]
+        values[name] = np.round(np.clip(value, spec.low, spec.high), spec.decimals)
+
+    # Tree pollen in spring, grass in early summer, ragweed in late summer
+    i = row["pollen_count"]
+    pollen = 15 + 220 * np.exp(-((day_of_year - 115) / 18.0) ** 2) \
+        + 120 * np.exp(-((day_of_year - 165) / 15.0) ** 2) + 80 * np.exp(-((day_of_year - 250) / 14.0) ** 2)
+    pollen = pollen * np.exp(0.35 * weather[i] + 0.2 * offsets[:, i] + 0.3 * noise[:, i])
+    values["pollen_count"] = np.clip(np.round(pollen), 0, 2000).astype(np.int64)
+
+    # Prevailing south-westerly wind
+    i = row["wind_direction"]
+    values["wind_direction"] = np.round(240 + 70 * weather[i] + 10 * offsets[:, i] + 25 * noise[:, i]) % 360
+
+    values["aqi"] = np.round(np.maximum(
+        np.interp(values["pm25"], *_PM25_BREAKPOINTS),
+        np.interp(values["o3"], *_O3_BREAKPOINTS)
+    ))
+    values["asthma_index"] = np.round(np.clip(
+        10 + 0.6 * values["aqi"] + 0.04 * values["pollen_count"]
+        + 0.4 * np.maximum(0, values["humidity"] - 60) + 0.8 * np.maximum(0, 5 - values["temperature"]),
+        0, 150
+    ), 1)
+    values["risk_noise"] = noise[:, row["risk"]]
+
+    frame = {
+        "zip_code": np.repeat(np.array(zip_codes), days),
+        "date": np.tile(dates, len(zip_codes)),
+    }
+    frame.update({name: value.ravel() for name, value in values.items()})
+    return frame
+
+
+def travel_frame(climate: Frame) -> Frame:
+    """Travel recommendation of every row of a climate_frame"""
+    aqi, pollen = climate["aqi"], climate["pollen_count"]
+    temperature, humidity = climate["temperature"], climate["humidity"]
+    risk = np.round(np.clip(
+        0.7 * aqi + 0.05 * pollen + 0.8 * np.abs(temperature - 20) + 0.3 * np.maximum(0, humidity - 60)
+        + 6 * climate["risk_noise"],
+        0, 100
+    ))
+    level = np.searchsorted([30, 50, 70], risk, side="left")  # safe <= 30 < moderate <= 50 < caution <= 70 < avoid
+    day_number = climate["date"].astype("datetime64[D]").astype(int)
+    return {
+        "zip_code": climate["zip_code"],
+        "date": climate["date"],
+        "recommendation_level": _LEVELS[level],
+        "risk_score": risk,
+        "air_quality_score": np.round(np.clip(100 - 0.8 * aqi, 0, 100)),
+        "weather_score": np.round(np.clip(100 - 2 * np.abs(temperature - 20) - 0.3 * np.abs(humidity - 50), 0, 100)),
+        "pollen_score": np.round(np.clip(100 - pollen / 5, 0, 100)),
+        "general_advice": _ADVICE[level],
+        "best_time_of_day": _TIMES_OF_DAY[day_number % len(_TIMES_OF_DAY)],
+        "outdoor_activity_safe": risk <= 70,
+        "exercise_recommendation": np.where(risk <= 40, "safe", np.where(risk <= 70, "moderate", "avoid")),
+    }
+
+
+def gas_frame(series: Sequence[Tuple[str, str]], dates: np.ndarray, seed: int) -> Frame:
+    """Daily values of every (gas type, region) series and date, series-major, with names"""
+    days = len(dates)
+    years = (dates - _GAS_EPOCH).astype(int) / 365.25
+    day_of_year = _day_of_year(dates)
+    values = []
+    for gas_type, region in series:
+        spec = GAS_SPECS[gas_type]
+        rng = np.random.default_rng([seed, _GAS_STREAM, zlib.crc32(f"{gas_type}|{region}".encode())])
+        offset = spec.region_sd * rng.standard_normal()
+        value = spec.level + offset + spec.trend_per_year * years \
+            + _seasonal(day_of_year, spec.seasonal_amplitude, spec.peak_day) + spec.noise_sd * rng.standard_normal(days)
+        values.append(np.round(value, 3))
+    gas_types = np.array([gas_type for gas_type, _ in series])
+    return {
+        "gas_type": np.repeat(gas_types, days),
+        "region": np.repeat(np.array([region for _, region in series]), days),
+        "date": np.tile(dates, len(series)),
+        "value": np.concatenate(values) if values else np.array([]),
+        "unit": np.repeat(np.array([GAS_UNITS[gas_type] for gas_type in gas_types]), days),
+    }
+
+
+def user_frame(first: int, count: int, zip_codes: Sequence[str], seed: int, password_hash: str) -> Frame:
+    """Users number first .. first+count-1, with e-mail addresses unique per number and seed"""
+    rng = np.random.default_rng([seed, _USER_STREAM, first])
+    numbers = np.arange(first, first + count)
+    first_names = rng.choice(_FIRST_NAMES, count)
+    last_names = rng.choice(_LAST_NAMES, count)
+    has_asthma = rng.random(count) < 0.8
+
+    def answer(options: List[str], p: List[float]) -> np.ndarray:
+        # Questionnaire answers only for users with asthma
+        return np.where(has_asthma, rng.choice(options, count, p=p), None)
+
+    # Triggers as a bitmask into the JSON lists of all 2^n subsets
+    trigger_lists = np.array([
+        json.dumps([t for bit, t in enumerate(_TRIGGERS) if mask >> bit & 1]) for mask in range(2 ** len(_TRIGGERS))
+    ])
+    masks = (rng.random((count, len(_TRIGGERS))) < 0.25) @ (1 << np.arange(len(_TRIGGERS)))
+    hospitals = [h["name"] for h in SAMPLE_HOSPITALS]
+    phones = np.char.add("555-", np.char.zfill(rng.integers(0, 10000, count).astype(str), 4))
+    return {
+        "name": np.char.add(np.char.add(first_names, " "), last_names),
+        "email": np.char.add(np.char.add("user", numbers.astype(str)), f".{seed}@synthetic.example.com"),
+        "password_hash": np.full(count, password_hash, dtype=object),
+        "has_asthma": np.where(has_asthma, "yes", "no"),
+        "asthma_severity": answer(["mild", "moderate", "severe"], [0.5, 0.35, 0.15]),
+        "trigger_factors": np.where(has_asthma, trigger_lists[masks], None),
+        "symptom_frequency": answer(["daily", "weekly", "monthly", "rarely"], [0.15, 0.3, 0.3, 0.25]),
+        "medication_usage": answer(["daily", "as-needed", "emergency-only", "none"], [0.35, 0.45, 0.1, 0.1]),
+        "asthma_control": answer(["well-controlled", "partially-controlled", "poorly-controlled"], [0.5, 0.35, 0.15]),
+        "zip_code": rng.choice(np.array(zip_codes), count),
+        "selected_hospital": rng.choice(hospitals, count),
+        "emergency_contact": np.char.add(rng.choice(_FIRST_NAMES, count), np.char.add(" ", last_names)),
+        "emergency_phone": phones,
+    }
+
+
+def _python_column(column: np.ndarray, method: str) -> list:
+    if np.issubdtype(column.dtype, np.datetime64):
+        # The SQLite driver gets dates as stored by SQLAlchemy ('YYYY-MM-DD')
+        column = column.astype(str) if method == "sqlite" else column.astype("datetime64[D]").astype(object)
+    return column.tolist()
+
+
+def write_frame(engine: Engine, table: Table, frame: Frame, key_columns: List[str], method: str) -> int:
+    """
+    Insert the rows of a frame in one transaction, skipping rows whose key is stored
+
+    Returns:
+        Number of rows inserted (-1 if the driver does not report it)
+    """
+    columns = list(frame)
+    rows = zip(*(_python_column(frame[column], method) for column in columns))
+    if method == "sqlite":
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.executemany(
+                f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT DO NOTHING",
+                rows
+            )
+            inserted = cursor.rowcount
+            raw.commit()
+            return inserted
+        finally:
+            raw.close()
+    with engine.begin() as conn:
+        return conn.execute(
+            insert_on_conflict(engine.dialect.name, table, None, key_columns),
+            [dict(zip(columns, values)) for values in rows]
+        ).rowcount
+
+
+def _dimension_ids(conn: Connection, dimension, names: Sequence[str]) -> Dict[str, int]:
+    """Ids of dimension names, adding the missing ones"""
+    names = sorted(set(names))
+    ids: Dict[str, int] = {}
+    for i in range(0, len(names), 500):
+        batch = names[i:i + 500]
+        conn.execute(insert_on_conflict(conn.dialect.name, dimension.__table__, None, ["name"]),
+                     [{"name": name} for name in batch])
+        ids.update(conn.execute(select(dimension.name, dimension.id).where(dimension.name.in_(batch))).all())
+    return ids
+
+
+def _encode_gas(frame: Frame, ids: Dict[str, Dict[str, int]]) -> Frame:
+    """Replace the names of a gas_frame with dimension ids"""
+    def encode(column: str, dimension: str) -> np.ndarray:
+        names, inverse = np.unique(frame[column], return_inverse=True)
+        return np.array([ids[dimension][name] for name in names], dtype=np.int64)[inverse]
+
+    return {
+        "gas_type_id": encode("gas_type", "gas_type"),
+        "region_id": encode("region", "region"),
+        "date": frame["date"],
+        "value": frame["value"],
+        "unit_id": encode("unit", "unit"),
+        "source_id": np.full(len(frame["value"]), ids["source"][SYNTHETIC_SOURCE], dtype=np.int64),
+    }
+
+
+class TableReport(NamedTuple):
+    table: str
+    generated: int
+    inserted: int
+    generate_seconds: float
+    write_seconds: float
+
+
+def _load(name: str, engine: Engine, table: Table, key_columns: List[str], method: str,
+          blocks: Iterator[Callable[[], Frame]]) -> TableReport:
+    """Generate and write frames block by block, printing a progress line per block"""
+    generated = inserted = 0
+    generate_seconds = write_seconds = 0.0
+    for block in blocks:
+        started = time.perf_counter()
+        frame = block()
+        generated_at = time.perf_counter()
+        count = write_frame(engine, table, frame, key_columns, method)
+        written_at = time.perf_counter()
+        rows = len(next(iter(frame.values())))
+        generated += rows
+        inserted = -1 if count < 0 or inserted < 0 else inserted + count
+        generate_seconds += generated_at - started
+        write_seconds += written_at - generated_at
+        print(f"{name}: {generated} rows generated, {inserted} inserted "
+              f"({generated / (generate_seconds + write_seconds):.0f} rows/s)")
+    return TableReport(name, generated, inserted, generate_seconds, write_seconds)
+
+
+def generate(
+    tables: Sequence[str] = TABLES,
+    zip_count: int = 50,
+    start: Optional[date] = None,
+    days: int = 365,
+    metrics: Sequence[str] = CLIMATE_METRICS,
+    gas_types: Sequence[str] = tuple(GAS_SPECS),
+    gas_regions: int = 20,
+    users: int = 1000,
+    seed: int = 0,
+    method: Optional[str] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    rebuild_rollups: bool = True,
+    engine: Engine = default_engine
+) -> List[TableReport]:
+    """
+    Generate and load a synthetic dataset
+
+    Args:
+        tables: Any of climate, travel, gas, users
+        zip_count: ZIP codes of the climate data and travel recommendations
+        start: First date of the climate and gas series (default: days before today)
+        days: Days per ZIP code and gas series
+        metrics: Climate columns to fill; the others are left NULL
+        gas_regions: Regions per gas type, named 'Region 0001', ...
+        method: 'sqlite' (driver executemany, SQLite only) or 'core' (SQLAlchemy Core);
+                default 'sqlite' on SQLite
+        chunk_rows: Rows generated and written per transaction
+
+    Returns:
+        Rows generated and inserted (-1 if the driver does not report it), and time spent
+        generating and writing, per table
+    """
+    method = method or ("sqlite" if engine.dialect.name == "sqlite" else "core")
+    if method == "sqlite" and engine.dialect.name != "sqlite":
+        raise ValueError("--method sqlite needs a SQLite database")
+    start = start or date.today() - timedelta(days=days - 1)
+    dates = date_range(start, days)
+    zip_codes = synthetic_zip_codes(zip_count)
+    reports = []
+
+    if "climate" in tables or "travel" in tables:
+        weather = _weather_anomalies(seed, start, days)
+        zips_per_block = max(1, chunk_rows // days)
+        zip_blocks = [zip_codes[i:i + zips_per_block] for i in range(0, len(zip_codes), zips_per_block)]
+
+        def climate_block(zip_block: List[str]) -> Frame:
+            frame = climate_frame(zip_block, dates, seed, weather)
+            rows = {"zip_code": frame["zip_code"], "date": frame["date"]}
+            rows.update({metric: frame[metric] for metric in CLIMATE_METRICS if metric in metrics})
+            rows["source"] = np.full(len(frame["date"]), SOURCE_INGEST, dtype=object)
+            return rows
+
+        if "climate" in tables:
+            reports.append(_load("climate", engine, NYCClimateData.__table__, ["zip_code", "date"], method, (
+                lambda zip_block=zip_block: climate_block(zip_block) for zip_block in zip_blocks
+            )))
+        if "travel" in tables:
+            reports.append(_load("travel", engine, TravelRecommendation.__table__, ["zip_code", "date"], method, (
+                lambda zip_block=zip_block: travel_frame(climate_frame(zip_block, dates, seed, weather))
+                for zip_block in zip_blocks
+            )))
+
+    if "gas" in tables:
+        series = [(gas_type, f"Region {i:04d}") for gas_type in gas_types for i in range(1, gas_regions + 1)]
+        with engine.begin() as conn:
+            ids = {
+                "gas_type": _dimension_ids(conn, GasType, list(gas_types)),
+                "region": _dimension_ids(conn, GasRegion, [region for _, region in series]),
+                "unit": _dimension_ids(conn, GasUnit, [GAS_UNITS[gas_type] for gas_type in gas_types]),
+                "source": _dimension_ids(conn, GasSource, [SYNTHETIC_SOURCE]),
+            }
+        series_per_block = max(1, chunk_rows // days)
+        reports.append(_load("gas", engine, GasData.__table__, ["gas_type_id", "region_id", "date"], method, (
+            lambda series_block=series[i:i + series_per_block]: _encode_gas(gas_frame(series_block, dates, seed), ids)
+            for i in range(0, len(series), series_per_block)
+        )))
+
+    if "users" in tables:
+        password_hash = bcrypt.hashpw(SYNTHETIC_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        reports.append(_load("users", engine, User.__table__, ["email"], method, (
+            lambda first=first: user_frame(first, min(chunk_rows, users - first), zip_codes, seed, password_hash)
+            for first in range(0, users, chunk_rows)
+        )))
+
+    # Unknown insert counts (-1) count as changes
+    inserted = {report.table for report in reports if report.inserted}
+    with Session(bind=engine) as db:
+        dialect_name = engine.dialect.name
+        if "climate" in inserted:
+            db.execute(bump_data_version(dialect_name, NYCClimateData.__tablename__))
+            if rebuild_rollups:
+                print(f"Rebuilt {rebuild_climate_rollups(db)} climate rollup rows")
+        if "gas" in inserted:
+            db.execute(bump_data_version(dialect_name, GasData.__tablename__))
+            if rebuild_rollups:
+                print(f"Rebuilt {rebuild_gas_rollups(db)} gas rollup rows")
+        db.commit()
+    return reports
+
+
+def main():
+    from app.db.init_db import init_db
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic climate, gas and user dataset for load testing")
+    parser.add_argument("--tables", nargs="+", choices=TABLES, default=TABLES)
+    parser.add_argument("--zip-codes", type=int, default=50, help="ZIP codes (NYC ones first, then made up)")
+    parser.add_argument("--days", type=int, default=365, help="Days per ZIP code and gas series")
+    parser.add_argument("--start-date", type=date.fromisoformat,
+                        help="First day (default: so the last day is today); fix it to reproduce a dataset")
+    parser.add_argument("--metrics", nargs="+", choices=CLIMATE_METRICS, default=CLIMATE_METRICS,
+                        help="Climate columns to fill (default: all)")
+    parser.add_argument("--gas-types", nargs="+", choices=list(GAS_SPECS), default=list(GAS_SPECS))
+    parser.add_argument("--gas-regions", type=int, default=20, help="Regions per gas type")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--method", choices=["sqlite", "core"],
+                        help="Write through the SQLite driver or SQLAlchemy Core (default: sqlite on SQLite)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--skip-rollups", action="store_true",
+                        help="Do not rebuild rollups (run python -m app.services.rollups later)")
+    args = parser.parse_args()
+
+    init_db()
+    start = args.start_date or date.today() - timedelta(days=args.days - 1)
+    print(f"Seed {args.seed}, {args.days} days from {start.isoformat()}")
+    started = time.perf_counter()
+    reports = generate(
+        tables=args.tables, zip_count=args.zip_codes, start=start, days=args.days, metrics=args.metrics,
+        gas_types=args.gas_types, gas_regions=args.gas_regions, users=args.users, seed=args.seed,
+        method=args.method, chunk_rows=args.chunk_rows, rebuild_rollups=not args.skip_rollups
+    )
+    print(f"\nDone in {time.perf_counter() - started:.1f}s")
+    for r in reports:
+        print(f"{r.table:>8}: {r.generated} generated, {r.inserted} inserted; "
+              f"generate {r.generate_seconds:.1f}s, write {r.write_seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
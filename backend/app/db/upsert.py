@@ -0,0 +1,119 @@
+"""
+Dialect-aware INSERT ... ON CONFLICT helpers.
+SQLite and PostgreSQL both support ON CONFLICT against a unique index, which makes
+"insert unless the natural key already exists" a single atomic statement instead of
+a check-then-insert race.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import Insert
+
+_INSERT_BY_DIALECT = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def insert_on_conflict(
+    dialect_name: str,
+    model,
+    rows: Optional[List[Dict[str, Any]]],
+    index_elements: Sequence[str],
+    update_columns: Optional[Iterable[str]] = None,
+    update_where=None,
+    merge_nulls: bool = False
+) -> Insert:
+    """
+    Build an insert that skips (or updates) rows whose natural key already exists
+
+    Args:
+        dialect_name: Name of the target dialect (session.get_bind().dialect.name)
+        model: Model class to insert into
+        rows: Column values, one dict per row, rendered as one multi-row VALUES; None to
+              build the statement for executemany, session.execute(stmt, rows), which has no
+              bound-parameter limit
+        index_elements: Columns of the unique index that defines a conflict
+        update_columns: Columns to overwrite on conflict (default: keep the stored row)
+        update_where: Condition on the stored row; rows not matching it are kept as they are
+        merge_nulls: Keep the stored value of an update column where the new row has NULL
+
+    Returns:
+        Insert statement ready to execute
+    """
+    insert = _INSERT_BY_DIALECT.get(dialect_name)
+    if insert is None:
+        raise ValueError(f"ON CONFLICT is not supported for dialect: {dialect_name}")
+
+    stmt = insert(model)
+    if rows is not None:
+        stmt = stmt.values(rows)
+    update_columns = list(update_columns or [])
+    if not update_columns:
+        return stmt.on_conflict_do_nothing(index_elements=list(index_elements))
+    return stmt.on_conflict_do_update(
+        index_elements=list(index_elements),
+        set_={
+            column: func.coalesce(stmt.excluded[column], stmt.table.c[column]) if merge_nulls else stmt.excluded[column]
+            for column in update_columns
+        },
+        where=update_where
+    )
+
+
+def insert_or_increment(
+    dialect_name: str,
+    model,
+    values: Dict[str, Any],
+    index_elements: Sequence[str],
+    column: str
+) -> Insert:
+    """Build an insert of one row that instead adds 1 to column of the row with the same key"""
+    insert = _INSERT_BY_DIALECT.get(dialect_name)
+    if insert is None:
+        raise ValueError(f"ON CONFLICT is not supported for dialect: {dialect_name}")
+    stmt = insert(model).values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=list(index_elements),
+        set_={column: stmt.table.c[column] + 1}
+    )
+
+
+async def executemany_driver(conn: AsyncConnection, stmt: Insert, rows: List[Dict[str, Any]]) -> int:
+    """
+    Execute an insert (e.g. from insert_on_conflict with rows=None) for many rows with one
+    driver-level executemany
+
+    The statement is compiled once and each row only goes through the column types' bind
+    processors, skipping SQLAlchemy's per-row parameter handling, which costs about as
+    much as the insert itself on SQLite. All rows must have the same keys.
+
+    Returns:
+        Number of rows inserted or updated
+    """
+    if not rows:
+        return 0
+    dialect = conn.dialect
+    keys = list(rows[0])
+    compiled = stmt.compile(dialect=dialect, column_keys=keys)
+    processors = {key: stmt.table.c[key].type.bind_processor(dialect) for key in keys}
+    # Parameters of the statement itself (e.g. in the ON CONFLICT WHERE) are the same for every row
+    constants = {}
+    for name, bind in compiled.binds.items():
+        if name not in processors:
+            processor = bind.type.bind_processor(dialect)
+            constants[name] = processor(bind.effective_value) if processor else bind.effective_value
+
+    def value(row: Dict[str, Any], key: str) -> Any:
+        if key in constants:
+            return constants[key]
+        processor = processors[key]
+        return processor(row[key]) if processor else row[key]
+
+    if compiled.positional:
+        params = [tuple(value(row, key) for key in compiled.positiontup) for row in rows]
+    else:
+        params = [{key: value(row, key) for key in compiled.params} for row in rows]
+    result = await conn.exec_driver_sql(str(compiled), params)
+    return result.rowcount
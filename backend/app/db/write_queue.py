@@ -0,0 +1,149 @@
+"""
+Single-writer queue with group commit.
+SQLite allows one writer at a time, so instead of every request committing on its own
+(and contending for the lock), write intents are queued and one writer task runs them
+back to back in a single transaction, committing a whole batch every few milliseconds.
+Each intent runs in its own SAVEPOINT, so a failing intent is rolled back alone and its
+caller gets the exception while the rest of the batch still commits.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, TypeVar
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.db.database import SQLITE_BEGIN_IMMEDIATE, AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+WriteIntent = Callable[[AsyncSession], Awaitable[T]]
+
+# Most intents per transaction, and how long the writer waits for more before committing
+WRITE_QUEUE_MAX_BATCH = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "256"))
+WRITE_QUEUE_MAX_DELAY_MS = float(os.getenv("WRITE_QUEUE_MAX_DELAY_MS", "2"))
+
+# Queued by stop(): the writer commits what it holds and returns
+_STOP = object()
+
+
+class WriteQueue:
+    """Queue of write intents executed by a single writer task with group commit"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        max_batch: int = WRITE_QUEUE_MAX_BATCH,
+        max_delay_ms: float = WRITE_QUEUE_MAX_DELAY_MS
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches_committed = 0
+        self.intents_committed = 0
+
+    def start(self) -> None:
+        """Start the writer task on the running event loop (no-op if already running)"""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Commit whatever is still queued, then stop the writer task"""
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self._queue.put(_STOP)
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+    async def submit(self, intent: WriteIntent) -> T:
+        """
+        Queue a write intent and wait until the batch containing it is committed
+
+        Args:
+            intent: Coroutine function taking the writer's AsyncSession; it should add/update
+                    rows and flush if it needs generated values such as primary keys
+
+        Returns:
+            Whatever the intent returned (e.g. the new row with its ID), after commit
+
+        Raises:
+            Whatever the intent raised, or the commit error if the whole batch failed
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((intent, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._commit_batch(batch)
+        # Intents submitted while stopping
+        while not self._queue.empty():
+            batch = [item for item in (self._queue.get_nowait() for _ in range(self._queue.qsize())) if item is not _STOP]
+            if batch:
+                await self._commit_batch(batch)
+
+    async def _commit_batch(self, batch: List[Tuple[WriteIntent, asyncio.Future]]) -> None:
+        outcomes: List[Tuple[asyncio.Future, Any, Optional[BaseException]]] = []
+        try:
+            async with self.session_factory() as session:
+                # Take the write lock up front: a deferred transaction that read first could not
+                # upgrade to a write if another process committed meanwhile
+                await session.connection(execution_options={SQLITE_BEGIN_IMMEDIATE: True})
+                for intent, future in batch:
+                    if future.cancelled():
+                        continue
+                    try:
+                        async with session.begin_nested():
+                            result = await intent(session)
+                        outcomes.append((future, result, None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Group commit of {len(batch)} write intent(s) failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_committed += 1
+        self.intents_committed += sum(1 for _, _, error in outcomes if error is None)
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+# Shared writer used by all write paths of the API process
+write_queue = WriteQueue()
@@ -1,13 +1,13 @@
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, users, data, hospitals, nyc_climate, travel_recommendation, ai_summary
-from app.db.init_db import init_db
-from app.db.database import SessionLocal
-from app.db.seed_nyc_data import seed_nyc_data
-from app.db.seed_hospitals import seed_hospitals
-from app.models.nyc_climate import NYCClimateData
-from app.models.travel_recommendation import TravelRecommendation
-from app.models.hospital import Hospital
+from app.api.dimensions import DATA_VERSION_HEADER
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api import auth, users, data, hospitals, nyc_climate, travel_recommendation, ai_summary, nyc_stream, export
+from app.db.database import pool_metrics
+from app.db.startup import prepare_database
+from app.db.write_queue import write_queue
+from app.services.job_queue import job_queue
 
 app = FastAPI(
     title="EarthBreath API",
@@ -24,6 +24,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", DATA_VERSION_HEADER],
 )
 
 # Include routers
@@ -34,35 +35,27 @@ app.include_router(hospitals.router)
 app.include_router(nyc_climate.router)
 app.include_router(travel_recommendation.router)
 app.include_router(ai_summary.router)
+app.include_router(nyc_stream.router)
+app.include_router(export.router)
 
-def seed_nyc_if_empty():
-    """Seed NYC climate/travel data only when empty."""
-    db = SessionLocal()
-    try:
-        climate_count = db.query(NYCClimateData).count()
-        travel_count = db.query(TravelRecommendation).count()
-    finally:
-        db.close()
-    if climate_count == 0 or travel_count == 0:
-        seed_nyc_data()
-
-
-def seed_hospitals_if_empty():
-    """Seed sample hospitals; skips existing by name inside the seed script."""
-    db = SessionLocal()
-    try:
-        count = db.query(Hospital).count()
-    finally:
-        db.close()
-    if count == 0:
-        seed_hospitals()
+@app.on_event("startup")
+def startup_seed():
+    # Skipped after the first start (per schema and seed version); see app.db.startup
+    prepare_database()
 
+# Run background job workers inside the API process unless a separate worker handles them
+JOB_WORKER_IN_PROCESS = os.getenv("JOB_WORKER_IN_PROCESS", "true").lower() not in ("0", "false", "no", "off")
 
 @app.on_event("startup")
-def startup_seed():
-    init_db()
-    seed_nyc_if_empty()
-    seed_hospitals_if_empty()
+async def start_background_workers():
+    write_queue.start()
+    if JOB_WORKER_IN_PROCESS:
+        job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await job_queue.stop()
+    await write_queue.stop()
 
 @app.get("/")
 async def root():
@@ -76,5 +69,15 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/db")
+async def db_health_check():
+    """Connection pool usage: checkouts and how long connections are held"""
+    return {"status": "healthy", "pool": pool_metrics.snapshot()}
+
+@app.get("/health/jobs")
+async def jobs_health_check():
+    """Background job counts per status"""
+    return {"status": "healthy", "jobs": await job_queue.counts()}
+
 
 
@@ -1,8 +1,12 @@
 from .user import User
 from .gas_data import GasData
+from .gas_dimension import GasType, GasRegion, GasUnit, GasSource
 from .hospital import Hospital
 from .nyc_climate import NYCClimateData
 from .travel_recommendation import TravelRecommendation
+from .job import Job
+from .rollup import ClimateRollup, GasRollup
+from .data_version import DataVersion
 
-__all__ = ['User', 'GasData', 'Hospital', 'NYCClimateData', 'TravelRecommendation']
+__all__ = ['User', 'GasData', 'GasType', 'GasRegion', 'GasUnit', 'GasSource', 'Hospital', 'NYCClimateData', 'TravelRecommendation', 'Job', 'ClimateRollup', 'GasRollup', 'DataVersion']
 
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.sql import func
+from sqlalchemy.types import DateTime
+from app.db.database import Base
+
+class DataVersion(Base):
+    """Write counter of a table, bumped in the same transaction as each write to it"""
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)  # Table name, e.g. 'gas_data'
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,27 +1,48 @@
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index, select
+from sqlalchemy.orm import column_property
 from sqlalchemy.sql import func
 from sqlalchemy.types import DateTime
 from app.db.database import Base
+from app.models.gas_dimension import GasRegion, GasSource, GasType, GasUnit
+
+def _dimension_name(dimension, key_column):
+    """Read-only attribute decoding a dimension id to its name (a primary-key lookup per row)"""
+    return column_property(
+        select(dimension.name).where(dimension.id == key_column).correlate_except(dimension).scalar_subquery()
+    )
 
 class GasData(Base):
     __tablename__ = "gas_data"
+    __table_args__ = (
+        # One value per series (gas type + region) and date
+        Index("uq_gas_data_series_date", "gas_type_id", "region_id", "date", unique=True),
+        # Covering index so series scans read date/value from the index alone
+        Index("ix_gas_data_series_date_value", "gas_type_id", "region_id", "date", "value"),
+        # Keyset pagination order (date, id), unfiltered, by gas type and by region
+        Index("ix_gas_data_date_id", "date", "id"),
+        Index("ix_gas_data_type_date_id", "gas_type_id", "date", "id"),
+        Index("ix_gas_data_region_date_id", "region_id", "date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    gas_type = Column(String, nullable=False, index=True)  # 'CO2', 'CH4', 'N2O', 'SF6'
-    region = Column(String, nullable=False, index=True)  # Country or region name
-    date = Column(Date, nullable=False, index=True)
+    # Gas type, region, unit and source are stored as ids into the gas dimension tables
+    gas_type_id = Column(Integer, ForeignKey("gas_types.id"), nullable=False)
+    region_id = Column(Integer, ForeignKey("gas_regions.id"), nullable=False)
+    date = Column(Date, nullable=False)
     value = Column(Float, nullable=False)  # Gas concentration or emission value
-    unit = Column(String, nullable=False)  # Unit of measurement (e.g., 'ppm', 'ppb', 'kt')
-    
+    unit_id = Column(Integer, ForeignKey("gas_units.id"), nullable=False)
+
     # Additional metadata
-    source = Column(String, nullable=True)  # Data source
+    source_id = Column(Integer, ForeignKey("gas_sources.id"), nullable=True)
     notes = Column(String, nullable=True)  # Additional notes
-    
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-
-
-
-
+    # Names of the dimension ids, loaded with the row; filter on the ids instead
+    # (app.db.filters.dimension_id) so queries can use the indexes
+    gas_type = _dimension_name(GasType, gas_type_id)  # 'CO2', 'CH4', 'N2O', 'SF6'
+    region = _dimension_name(GasRegion, region_id)  # Country or region name
+    unit = _dimension_name(GasUnit, unit_id)  # Unit of measurement (e.g., 'ppm', 'ppb', 'kt')
+    source = _dimension_name(GasSource, source_id)  # Data source
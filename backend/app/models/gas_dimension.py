@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String
+from app.db.database import Base
+
+class GasDimension:
+    """Small lookup table of the distinct values of one gas_data attribute, referenced by id"""
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+class GasType(GasDimension, Base):
+    __tablename__ = "gas_types"  # 'CO2', 'CH4', 'N2O', 'SF6'
+
+class GasRegion(GasDimension, Base):
+    __tablename__ = "gas_regions"  # Country or region name
+
+class GasUnit(GasDimension, Base):
+    __tablename__ = "gas_units"  # 'ppm', 'ppb', 'kt', ...
+
+class GasSource(GasDimension, Base):
+    __tablename__ = "gas_sources"  # Data source
+
+# gas_data attribute -> dimension table; the row stores the id in column '<attribute>_id'
+GAS_DIMENSIONS = {
+    "gas_type": GasType,
+    "region": GasRegion,
+    "unit": GasUnit,
+    "source": GasSource,
+}
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+# Job lifecycle: queued -> running -> done, or back to queued for a retry, or failed
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # At most one job per key; a finished job with the same key is re-armed instead of duplicated
+        Index("uq_jobs_job_key", "job_key", unique=True),
+        # Claim order: due jobs by priority, then age
+        Index("ix_jobs_status_priority_run_at", "status", "priority", "run_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # Handler name, e.g. 'collect_history'
+    job_key = Column(String, nullable=True)  # Deduplication key (NULL = never deduplicated)
+    payload = Column(Text, nullable=True)  # JSON string of handler arguments
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+
+    status = Column(String, nullable=False, default=JOB_QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False)  # Not claimed before this time (UTC); pushed back on retry
+    locked_until = Column(DateTime, nullable=True)  # Visibility timeout of a running job (UTC)
+    locked_by = Column(String, nullable=True)  # Worker that claimed it
+    last_error = Column(Text, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,13 +1,25 @@
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import Column, Integer, String, Float, Date, Index
 from sqlalchemy.sql import func
 from sqlalchemy.types import DateTime
 from app.db.database import Base
 
+# Provenance of a climate row: all values from the APIs, API values over a seed baseline,
+# pushed through the bulk ingest API (e.g. sensor feeds), or generated seed values only
+# (API unavailable); seed rows are retried and kept out of predictions
+SOURCE_API = "api"
+SOURCE_MERGED = "merged"
+SOURCE_INGEST = "ingest"
+SOURCE_SEED = "seed"
+
 class NYCClimateData(Base):
     __tablename__ = "nyc_climate_data"
+    __table_args__ = (
+        # One observation per ZIP code and day; also serves zip+date lookups
+        Index("uq_nyc_climate_zip_date", "zip_code", "date", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    zip_code = Column(String, nullable=False, index=True)
+    zip_code = Column(String, nullable=False)
     date = Column(Date, nullable=False, index=True)
     
     # Air Quality Metrics
@@ -31,6 +43,9 @@ class NYCClimateData(Base):
     pollen_count = Column(Integer, nullable=True)
     asthma_index = Column(Float, nullable=True)
     
+    # Provenance (api, merged, seed); NULL for rows stored before it was tracked
+    source = Column(String, nullable=True)
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, Float, Date, Index
+from sqlalchemy.sql import func
+from sqlalchemy.types import DateTime
+from app.db.database import Base
+
+# Rollup bucket sizes; a bucket is identified by its first day (weeks start on Monday)
+ROLLUP_BUCKETS = ("day", "week", "month")
+
+class ClimateRollup(Base):
+    """Per-ZIP, per-bucket min/max/sum/count of one climate metric (mean = sum / count)"""
+    __tablename__ = "nyc_climate_rollups"
+    __table_args__ = (
+        Index("uq_climate_rollup_key", "bucket", "zip_code", "bucket_start", "metric", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket = Column(String, nullable=False)  # 'day', 'week', 'month'
+    zip_code = Column(String, nullable=False)
+    bucket_start = Column(Date, nullable=False)
+    metric = Column(String, nullable=False)  # Climate column name, e.g. 'aqi'
+
+    min = Column(Float, nullable=True)
+    max = Column(Float, nullable=True)
+    sum = Column(Float, nullable=True)
+    count = Column(Integer, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class GasRollup(Base):
+    """Per-series (gas type + region), per-bucket min/max/sum/count of gas values"""
+    __tablename__ = "gas_data_rollups"
+    __table_args__ = (
+        Index("uq_gas_rollup_key", "bucket", "gas_type", "region", "bucket_start", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket = Column(String, nullable=False)
+    gas_type = Column(String, nullable=False)
+    region = Column(String, nullable=False)
+    bucket_start = Column(Date, nullable=False)
+    unit = Column(String, nullable=True)
+
+    min = Column(Float, nullable=True)
+    max = Column(Float, nullable=True)
+    sum = Column(Float, nullable=True)
+    count = Column(Integer, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,13 +1,19 @@
-from sqlalchemy import Column, Integer, String, Float, Date, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, Date, Boolean, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.types import DateTime
 from app.db.database import Base
 
 class TravelRecommendation(Base):
     __tablename__ = "travel_recommendations"
+    __table_args__ = (
+        # One recommendation per ZIP code and day
+        Index("uq_travel_rec_zip_date", "zip_code", "date", unique=True),
+        # Covering index for risk matrices (bulk forecast) that only need the score and level
+        Index("ix_travel_rec_zip_date_risk", "zip_code", "date", "risk_score", "recommendation_level"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    zip_code = Column(String, nullable=False, index=True)
+    zip_code = Column(String, nullable=False)
     date = Column(Date, nullable=False, index=True)
     
     # Recommendation Details
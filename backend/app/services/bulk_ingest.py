@@ -0,0 +1,170 @@
+"""
+Bulk Ingest
+Shared pipeline for the bulk-load endpoints: parses a streamed NDJSON or CSV body (or an
+already-parsed list of records), validates rows in chunks, and writes each chunk while
+the next one is being parsed. Invalid rows are reported per chunk and skipped, valid rows
+in the same chunk are still written.
+"""
+import asyncio
+import csv
+import json
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+# Row errors listed per chunk; the rest are only counted
+MAX_ERRORS_PER_CHUNK = 100
+
+INGEST_FORMATS = ("ndjson", "csv")
+
+
+class RowError(ValueError):
+    """A record that cannot be stored; the message is reported to the client"""
+
+
+def _decode(line: bytes, first: bool) -> Any:
+    """Stripped text of a line, or a RowError if it is not valid UTF-8"""
+    try:
+        return line.decode("utf-8-sig" if first else "utf-8").strip()
+    except UnicodeDecodeError as e:
+        return RowError(f"invalid UTF-8 at byte {e.start}")
+
+
+async def _iter_lines(pieces: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """(line number, text or RowError) of each non-blank line of a byte stream"""
+    buffer = b""
+    line_number = 0
+    async for piece in pieces:
+        buffer += piece
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            text = _decode(line, line_number == 1)
+            if text:
+                yield line_number, text
+    if buffer.strip():
+        yield line_number + 1, _decode(buffer, line_number == 0)
+
+
+async def iter_stream_records(pieces: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Any]]:
+    """(line number, parsed record or RowError) of each data line of an NDJSON or CSV stream"""
+    if fmt not in INGEST_FORMATS:
+        raise ValueError(f"Unknown ingest format: {fmt}")
+
+    header: Optional[List[str]] = None
+    async for line_number, text in _iter_lines(pieces):
+        if isinstance(text, RowError):
+            yield line_number, text
+            continue
+        if fmt == "ndjson":
+            try:
+                yield line_number, json.loads(text)
+            except ValueError as e:
+                yield line_number, RowError(f"invalid JSON: {e}")
+            continue
+
+        fields = next(csv.reader([text]))
+        if header is None:
+            header = [field.strip() for field in fields]
+            continue
+        if len(fields) != len(header):
+            yield line_number, RowError(f"expected {len(header)} columns, got {len(fields)}")
+            continue
+        yield line_number, dict(zip(header, fields))
+
+
+async def iter_list_records(records: Iterable[Any]) -> AsyncIterator[Tuple[int, Any]]:
+    """(1-based position, record) of each item of an already-parsed list"""
+    for position, record in enumerate(records, start=1):
+        yield position, record
+
+
+async def ingest_records(
+    records: AsyncIterator[Tuple[int, Any]],
+    coerce: Callable[[Any], Dict[str, Any]],
+    write: Callable[[List[Dict[str, Any]]], Awaitable[Dict[str, int]]],
+    counts: Sequence[str],
+    chunk_rows: int,
+    on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Validate and write records in chunks, with at most one chunk write in flight
+
+    Args:
+        records: (line number, record or RowError) pairs
+        coerce: Turns a record into column values, raising RowError if it is invalid
+        write: Writes the valid rows of a chunk and returns its counts, e.g. {"written": n}
+        counts: Names of the counts write returns; they are summed into the totals
+        chunk_rows: Records per chunk
+        on_chunk: Called with each chunk report once its write has finished (e.g. progress output)
+
+    Returns:
+        Totals (rows, rejected and the write counts) and one report per chunk with its
+        line range, counts and row errors
+    """
+    report: Dict[str, Any] = {"rows": 0, "rejected": 0, **{name: 0 for name in counts}, "chunks": []}
+    pending: Optional[Tuple[asyncio.Future, Dict[str, Any]]] = None
+    chunk_count = 0
+
+    async def finish(writing: asyncio.Future, chunk: Dict[str, Any]) -> None:
+        try:
+            chunk.update(await writing)
+        except SQLAlchemyError as e:
+            logger.error(f"Bulk ingest chunk {chunk['chunk']} failed: {e}")
+            chunk["error"] = str(e.orig if getattr(e, "orig", None) else e)
+            report["rejected"] += chunk["valid_rows"]
+        for name in counts:
+            report[name] += chunk[name]
+        report["chunks"].append(chunk)
+        if on_chunk:
+            on_chunk(chunk)
+
+    async def nothing() -> Dict[str, int]:
+        return {}
+
+    async def flush(chunk_records: List[Tuple[int, Any]]) -> None:
+        nonlocal pending, chunk_count
+        valid: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        for line_number, record in chunk_records:
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                valid.append(coerce(record))
+            except RowError as e:
+                errors.append({"line": line_number, "error": str(e)})
+
+        chunk_count += 1
+        chunk = {
+            "chunk": chunk_count,
+            "first_line": min(line_number for line_number, _ in chunk_records),
+            "last_line": max(line_number for line_number, _ in chunk_records),
+            "rows": len(chunk_records),
+            "valid_rows": len(valid),
+            **{name: 0 for name in counts},
+            "error_count": len(errors),
+            "errors": errors[:MAX_ERRORS_PER_CHUNK],
+            "error": None,
+        }
+        report["rows"] += len(chunk_records)
+        report["rejected"] += len(errors)
+
+        # Write this chunk while the next one is parsed
+        writing = asyncio.ensure_future(write(valid) if valid else nothing())
+        if pending:
+            await finish(*pending)
+        pending = (writing, chunk)
+
+    chunk_records: List[Tuple[int, Any]] = []
+    async for record in records:
+        chunk_records.append(record)
+        if len(chunk_records) >= chunk_rows:
+            await flush(chunk_records)
+            chunk_records = []
+    if chunk_records:
+        await flush(chunk_records)
+    if pending:
+        await finish(*pending)
+    return report
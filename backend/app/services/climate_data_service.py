@@ -4,14 +4,47 @@ Combines real API data with fallback seed data for NYC Dashboard
 Supports historical data-based predictions for future dates
 """
 import logging
-from typing import Dict, Any, Optional
+import os
+import time
+from typing import Dict, Any, Hashable, List, Optional
 from datetime import date
 from app.services.weather_api import WeatherAPIService
 from app.services.prediction_service import PredictionService
 from app.db.seed_nyc_data import generate_climate_data
+from app.models.nyc_climate import SOURCE_API, SOURCE_MERGED
 
 logger = logging.getLogger(__name__)
 
+# How long a failed upstream fetch is remembered before the APIs are tried again
+CLIMATE_FETCH_NEGATIVE_TTL_SECONDS = float(os.getenv("CLIMATE_FETCH_NEGATIVE_TTL_SECONDS", "300"))
+
+
+class NegativeCache:
+    """Remembers failed fetches for a short TTL so failing providers are not called on every request"""
+    
+    def __init__(self, ttl_seconds: float = CLIMATE_FETCH_NEGATIVE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._failed_until: Dict[Hashable, float] = {}
+    
+    def is_failing(self, key: Hashable) -> bool:
+        failed_until = self._failed_until.get(key)
+        if failed_until is None:
+            return False
+        if time.monotonic() >= failed_until:
+            del self._failed_until[key]
+            return False
+        return True
+    
+    def record_failure(self, key: Hashable) -> None:
+        self._failed_until[key] = time.monotonic() + self.ttl_seconds
+    
+    def record_success(self, key: Hashable) -> None:
+        self._failed_until.pop(key, None)
+
+
+# Shared across service instances (one is created per request)
+failed_fetches = NegativeCache()
+
 class ClimateDataService:
     """Service to fetch and combine climate data from APIs with seed data fallback"""
     
@@ -29,15 +62,32 @@ class ClimateDataService:
             target_date: Target date (default: today)
         
         Returns:
-            Complete climate data dictionary with all required fields
+            Complete climate data dictionary with all required fields; "source" tells
+            whether the values came from the APIs (api), partly from seed data (merged)
+            or only from seed data (seed)
         """
         target_date = target_date or date.today()
         
         # Get seed data as baseline (always available)
         seed_data = generate_climate_data(zip_code, target_date)
         
+        # Skip the APIs while a recent fetch for this ZIP and date is known to have failed
+        cache_key = (zip_code, target_date)
+        if failed_fetches.is_failing(cache_key):
+            logger.info(f"Using seed data for ZIP {zip_code} (recent API failure, retrying later)")
+            return seed_data
+        
         # Try to get real API data
-        api_data = await self.weather_api_service.get_comprehensive_climate_data(zip_code, target_date)
+        try:
+            api_data = await self.weather_api_service.get_comprehensive_climate_data(zip_code, target_date)
+        except Exception as e:
+            logger.error(f"Error fetching climate data from APIs for ZIP {zip_code}: {e}")
+            api_data = None
+        
+        if api_data:
+            failed_fetches.record_success(cache_key)
+        else:
+            failed_fetches.record_failure(cache_key)
         
         # Merge API data with seed data
         # Priority: API data > seed data
@@ -87,6 +137,11 @@ class ClimateDataService:
                 else:
                     merged_data["asthma_index"] = 100
             
+            # Fully from the APIs only when both weather and air quality came back
+            has_weather = api_data.get("temperature") is not None
+            has_air_quality = api_data.get("aqi") is not None
+            merged_data["source"] = SOURCE_API if has_weather and has_air_quality else SOURCE_MERGED
+            
             logger.info(f"Successfully merged API data for ZIP {zip_code}")
         else:
             logger.info(f"Using seed data for ZIP {zip_code} (API unavailable)")
@@ -148,4 +203,48 @@ class ClimateDataService:
         
         # For today or past dates, use standard method
         return await self.get_nyc_climate_data(zip_code, target_date)
-
+    
+    async def get_nyc_climate_data_for_dates(
+        self,
+        zip_code: str,
+        target_dates: List[date],
+        use_prediction: bool = True
+    ) -> Dict[date, Dict[str, Any]]:
+        """
+        Get NYC climate data for several dates of one ZIP code in a single pass.
+        Runs the historical prediction once for the furthest date instead of once per date.
+        
+        Args:
+            zip_code: ZIP code
+            target_dates: Dates to get climate data for
+            use_prediction: If True, future dates use the prediction service
+        
+        Returns:
+            Dictionary mapping each target date to its climate data dictionary
+        """
+        today = date.today()
+        results: Dict[date, Dict[str, Any]] = {}
+        
+        future_dates = [d for d in target_dates if d > today]
+        if use_prediction and future_dates:
+            days_ahead = (max(future_dates) - today).days
+            predictions = await self.prediction_service.predict_air_quality(zip_code, days_ahead=days_ahead)
+            predictions_by_date = {pred.get('date'): pred for pred in predictions}
+            
+            for target_date in future_dates:
+                target_prediction = predictions_by_date.get(target_date)
+                if not target_prediction:
+                    continue
+                seed_data = generate_climate_data(zip_code, target_date)
+                if target_prediction.get('aqi') is not None:
+                    seed_data['aqi'] = target_prediction['aqi']
+                if target_prediction.get('pm25') is not None:
+                    seed_data['pm25'] = target_prediction['pm25']
+                results[target_date] = seed_data
+        
+        # Today, past dates and any date the prediction did not cover use the standard method
+        for target_date in target_dates:
+            if target_date not in results:
+                results[target_date] = await self.get_nyc_climate_data(zip_code, target_date)
+        
+        return results
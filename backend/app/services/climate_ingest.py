@@ -0,0 +1,174 @@
+"""
+Climate Ingest Service
+Bulk upsert of NYC climate observations (e.g. sensor feeds) from a JSON array or a streamed
+NDJSON body. Rows are upserted on (zip_code, date) in chunks, one transaction each: fields a
+row leaves out or sets to null keep their stored values, except over seed rows, which are
+replaced outright. Live risk subscribers of the affected ZIP codes are notified once a chunk
+is committed; rollups of the written ZIP codes are refreshed afterwards by one background job
+per load.
+"""
+import os
+from datetime import date
+from typing import Any, AsyncIterator, Dict, Iterable, List
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.upsert import executemany_driver, insert_on_conflict
+from app.db.write_queue import write_queue
+from app.models.nyc_climate import NYCClimateData, SOURCE_INGEST, SOURCE_SEED
+from app.services.bulk_ingest import RowError, ingest_records, iter_list_records, iter_stream_records
+from app.services.dimension_cache import bump_data_version
+from app.services.risk_broadcaster import risk_broadcaster
+from app.services.rollups import enqueue_rollup_refresh, widen_spans
+
+CLIMATE_INGEST_CHUNK_ROWS = int(os.getenv("CLIMATE_INGEST_CHUNK_ROWS", "5000"))
+
+_KEY_COLUMNS = ["zip_code", "date"]
+# Keys per existing-row lookup (two bound parameters each)
+_KEY_LOOKUP_BATCH = 1000
+# Measured values; every other column is key, provenance or bookkeeping
+OBSERVATION_COLUMNS = [
+    column.name for column in NYCClimateData.__table__.columns
+    if column.name not in ("id", "zip_code", "date", "source", "created_at", "updated_at")
+]
+_INTEGER_COLUMNS = {
+    column.name for column in NYCClimateData.__table__.columns
+    if column.name in OBSERVATION_COLUMNS and column.type.python_type is int
+}
+
+
+def _coerce_climate_row(raw: Any) -> Dict[str, Any]:
+    """Validate one parsed observation and convert it to NYCClimateData column values"""
+    if not isinstance(raw, dict):
+        raise RowError("row is not an object")
+    missing = [field for field in _KEY_COLUMNS if raw.get(field) in (None, "")]
+    if missing:
+        raise RowError(f"missing required field(s): {', '.join(missing)}")
+
+    zip_code = str(raw["zip_code"]).strip()
+    if len(zip_code) != 5 or not zip_code.isdigit():
+        raise RowError(f"zip_code: expected a 5-digit ZIP code, got {raw['zip_code']!r}")
+    try:
+        row_date = date.fromisoformat(str(raw["date"]))
+    except ValueError:
+        raise RowError(f"date: invalid date {raw['date']!r}, expected YYYY-MM-DD")
+
+    row = {
+        "zip_code": zip_code,
+        "date": row_date,
+        "source": str(raw["source"]) if raw.get("source") not in (None, "") else SOURCE_INGEST,
+    }
+    observed = 0
+    for column in OBSERVATION_COLUMNS:
+        value = raw.get(column)
+        if value in (None, ""):
+            row[column] = None
+            continue
+        try:
+            if isinstance(value, bool):
+                raise ValueError
+            number = float(value)
+        except (TypeError, ValueError):
+            raise RowError(f"{column}: not a number {value!r}")
+        if column in _INTEGER_COLUMNS:
+            if not number.is_integer():
+                raise RowError(f"{column}: not an integer {value!r}")
+            number = int(number)
+        row[column] = number
+        observed += 1
+    if not observed:
+        raise RowError("no observation values")
+    return row
+
+
+async def write_climate_rows(rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Upsert validated climate rows in one transaction on the writer; their rollups are not
+    refreshed (the ingest functions queue that once per load)
+
+    Returns:
+        Counts of inserted and updated rows
+    """
+    # Repeated keys within the batch merge into one row; later non-null values win
+    merged: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["zip_code"], row["date"])
+        if key in merged:
+            merged[key].update({column: value for column, value in row.items() if value is not None})
+        else:
+            merged[key] = dict(row)
+    rows = list(merged.values())
+
+    async def upsert(session: AsyncSession) -> Dict[str, int]:
+        dialect_name = session.get_bind().dialect.name
+        keys = list(merged)
+        stored: Dict[tuple, str] = {}
+        for i in range(0, len(keys), _KEY_LOOKUP_BATCH):
+            result = await session.execute(
+                select(NYCClimateData.zip_code, NYCClimateData.date, NYCClimateData.source)
+                .filter(tuple_(NYCClimateData.zip_code, NYCClimateData.date).in_(keys[i:i + _KEY_LOOKUP_BATCH]))
+            )
+            stored.update({(zip_code, day): source for zip_code, day, source in result})
+        over_seed = [row for row in rows if stored.get((row["zip_code"], row["date"])) == SOURCE_SEED]
+        merging = [row for row in rows if stored.get((row["zip_code"], row["date"])) != SOURCE_SEED]
+
+        connection = await session.connection()
+        await executemany_driver(connection, insert_on_conflict(
+            dialect_name,
+            NYCClimateData.__table__,
+            None,
+            index_elements=_KEY_COLUMNS,
+            update_columns=OBSERVATION_COLUMNS + ["source"],
+            merge_nulls=True
+        ), merging)
+        # Seed values are placeholders: replace the whole row rather than merge into it
+        await executemany_driver(connection, insert_on_conflict(
+            dialect_name,
+            NYCClimateData.__table__,
+            None,
+            index_elements=_KEY_COLUMNS,
+            update_columns=OBSERVATION_COLUMNS + ["source"],
+            update_where=NYCClimateData.source == SOURCE_SEED
+        ), over_seed)
+
+        await session.execute(bump_data_version(dialect_name, NYCClimateData.__tablename__))
+        return {"inserted": len(rows) - len(stored), "updated": len(stored)}
+
+    counts = await write_queue.submit(upsert)
+    for zip_code in {row["zip_code"] for row in rows}:
+        risk_broadcaster.notify(zip_code)
+    return counts
+
+
+async def _ingest(records: AsyncIterator, chunk_rows: int) -> Dict[str, Any]:
+    spans: Dict[str, List[date]] = {}
+
+    async def write(rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        counts = await write_climate_rows(rows)
+        widen_spans(spans, ((row["zip_code"], row["date"]) for row in rows))
+        return counts
+
+    report = await ingest_records(records, _coerce_climate_row, write, ["inserted", "updated"], chunk_rows)
+    await enqueue_rollup_refresh(climate=spans)
+    return report
+
+
+async def ingest_climate_stream(
+    pieces: AsyncIterator[bytes],
+    chunk_rows: int = CLIMATE_INGEST_CHUNK_ROWS
+) -> Dict[str, Any]:
+    """
+    Upsert a streamed NDJSON body of climate observations
+
+    Returns:
+        Totals (rows, inserted, updated, rejected) and one report per chunk with its line
+        range, counts and row errors
+    """
+    return await _ingest(iter_stream_records(pieces, "ndjson"), chunk_rows)
+
+
+async def ingest_climate_list(
+    records: Iterable[Any],
+    chunk_rows: int = CLIMATE_INGEST_CHUNK_ROWS
+) -> Dict[str, Any]:
+    """Upsert an already-parsed list of climate observations; 'line' in reports is the 1-based position"""
+    return await _ingest(iter_list_records(records), chunk_rows)
@@ -0,0 +1,74 @@
+"""
+Dimension Cache
+Distinct-value lookup lists (gas types, regions, boroughs, specialties, ZIP codes) served
+from memory instead of a SELECT DISTINCT scan on every call.
+
+Each list is built from one table. Every path that writes that table also bumps the table's
+counter in data_versions, in the same transaction (bump_data_version). A read compares the
+counter, a primary-key lookup, with the one its list was built at and rebuilds the list only
+if it changed. Invalidation is therefore exact, including writes by other processes (job
+workers, importers, seed scripts), and lists are rebuilt lazily on the next read.
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Hashable, List, NamedTuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Insert
+from app.db.upsert import insert_or_increment
+from app.models.data_version import DataVersion
+
+# Lists kept in memory (e.g. one regions list per gas type filter); least recently used go first
+DIMENSION_CACHE_MAX_ENTRIES = int(os.getenv("DIMENSION_CACHE_MAX_ENTRIES", "1024"))
+
+
+def bump_data_version(dialect_name: str, table_name: str) -> Insert:
+    """Statement incrementing the table's write counter; execute it in the writing transaction"""
+    return insert_or_increment(dialect_name, DataVersion, {"name": table_name, "version": 1}, ["name"], "version")
+
+
+class DimensionList(NamedTuple):
+    version: int  # Write counter of the source table the values were read at
+    etag: str  # Strong ETag of the values; unchanged while the values are
+    values: List[Any]
+
+
+class DimensionCache:
+    """Distinct-value lists keyed by query, each rebuilt when its table's write counter moves"""
+
+    def __init__(self, max_entries: int = DIMENSION_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lists: "OrderedDict[Hashable, DimensionList]" = OrderedDict()
+
+    async def get(self, db: AsyncSession, table_name: str, key: Hashable, query) -> DimensionList:
+        """
+        The values of the query, from memory unless table_name was written since they were read
+
+        Args:
+            table_name: Table the query reads (the data_versions counter to check)
+            key: Identifies the query and its parameters
+            query: SELECT of one column
+        """
+        # Read in the same transaction as the rebuild, so the values are at least as new as the version
+        version = await db.scalar(select(DataVersion.version).filter(DataVersion.name == table_name)) or 0
+        cached = self._lists.get(key)
+        if cached is not None and cached.version == version:
+            self._lists.move_to_end(key)
+            return cached
+
+        values = list(await db.scalars(query))
+        digest = hashlib.sha1(json.dumps(values, default=str).encode()).hexdigest()[:20]
+        cached = DimensionList(version, f'"{digest}"', values)
+        self._lists[key] = cached
+        self._lists.move_to_end(key)
+        while len(self._lists) > self.max_entries:
+            self._lists.popitem(last=False)
+        return cached
+
+    def clear(self) -> None:
+        self._lists.clear()
+
+
+dimension_cache = DimensionCache()
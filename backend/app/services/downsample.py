@@ -0,0 +1,181 @@
+"""
+Downsample Service
+Largest-Triangle-Three-Buckets (LTTB) downsampling for chart endpoints: of each series in a
+date range, keeps at most max_points real rows chosen to preserve the shape of one metric
+(peaks, dips and trend), so a chart payload stays a few KB however long the range is.
+
+Candidate points are read as (id, series, date, metric) only, the triangle areas of each
+bucket are computed with NumPy, and just the kept rows are then loaded in full. Results are
+cached per query, max_points and the table's data_versions counter, so a write to the table
+makes the next read recompute; entries not read for a while expire after a TTL.
+"""
+import os
+import time
+from collections import OrderedDict
+from itertools import groupby
+from typing import Any, Awaitable, Callable, Hashable, List, Optional, Sequence, TypeVar
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import AsyncSessionLocal
+from app.models.data_version import DataVersion
+from app.services.single_flight import SingleFlight
+
+T = TypeVar("T")
+
+# How long an unchanged downsampled result is kept, and how many results are kept
+DOWNSAMPLE_CACHE_TTL_SECONDS = float(os.getenv("DOWNSAMPLE_CACHE_TTL_SECONDS", "60"))
+DOWNSAMPLE_CACHE_MAX_ENTRIES = int(os.getenv("DOWNSAMPLE_CACHE_MAX_ENTRIES", "256"))
+
+# Kept rows loaded per query (one bound parameter each)
+_ID_BATCH_SIZE = 5000
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices of the points LTTB keeps out of x-sorted points, first and last included
+
+    The points between the first and last are split into max_points - 2 buckets. Each bucket
+    keeps the point forming the largest triangle with the point kept from the previous bucket
+    and the mean of the next bucket.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Bucket i holds points edges[i]:edges[i + 1]; each bucket has at least one point
+    edges = 1 + np.arange(max_points - 1, dtype=np.int64) * (n - 2) // (max_points - 2)
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = np.diff(edges)
+    mean_x = (sum_x[edges[1:]] - sum_x[edges[:-1]]) / sizes
+    mean_y = (sum_y[edges[1:]] - sum_y[edges[:-1]]) / sizes
+    # The last bucket looks ahead to the final point
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Twice the triangle area (previous kept point, candidate, next bucket mean)
+        areas = np.abs(
+            (x[previous] - next_x[i]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y[i] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
+
+
+async def downsample_rows(
+    db: AsyncSession,
+    model,
+    conditions: Sequence[Any],
+    series_columns: Sequence[Any],
+    metric_column,
+    max_points: int
+) -> List[Any]:
+    """
+    Rows of the model kept by LTTB on metric_column over date, per series
+
+    Args:
+        conditions: WHERE conditions of the underlying list query
+        series_columns: Columns identifying a series (e.g. gas_type and region); each series
+                        is downsampled to max_points on its own
+        metric_column: Metric whose shape is preserved; rows where it is null are left out
+
+    Returns:
+        Model instances in no particular order
+    """
+    key_width = len(series_columns)
+    candidates = await db.execute(
+        select(model.id, *series_columns, model.date, metric_column)
+        .filter(*conditions, metric_column.is_not(None))
+        .order_by(*series_columns, model.date)
+    )
+
+    ids: List[int] = []
+    for _, series in groupby(candidates.all(), key=lambda row: tuple(row[1:1 + key_width])):
+        series = list(series)
+        x = np.fromiter((row[-2].toordinal() for row in series), dtype=float, count=len(series))
+        y = np.fromiter((row[-1] for row in series), dtype=float, count=len(series))
+        ids.extend(series[index][0] for index in lttb_indices(x, y, max_points))
+
+    rows: List[Any] = []
+    for i in range(0, len(ids), _ID_BATCH_SIZE):
+        result = await db.scalars(select(model).filter(model.id.in_(ids[i:i + _ID_BATCH_SIZE])))
+        rows.extend(result.all())
+    return rows
+
+
+class TTLCache:
+    """In-process LRU cache whose entries expire after a TTL"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = DOWNSAMPLE_CACHE_TTL_SECONDS,
+        max_entries: int = DOWNSAMPLE_CACHE_MAX_ENTRIES
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Downsampled responses of the gas and climate list endpoints
+downsample_cache = TTLCache()
+_downsample_flights = SingleFlight()
+
+
+async def cached_downsample(
+    key: Hashable,
+    table_name: str,
+    compute: Callable[[AsyncSession], Awaitable[T]]
+) -> T:
+    """
+    Cached result of compute(session) for the key, unless table_name was written since it was
+    computed; concurrent misses for the same key share one computation, which runs on its own
+    session
+
+    Args:
+        key: Identifies the query and its parameters
+        table_name: Table the computation reads (the data_versions counter to check)
+    """
+    # Read before the computation starts, so the result is at least as new as the version
+    async with AsyncSessionLocal() as session:
+        version = await session.scalar(select(DataVersion.version).filter(DataVersion.name == table_name)) or 0
+    versioned_key = (key, version)
+    value = downsample_cache.get(versioned_key)
+    if value is not None:
+        return value
+
+    async def work() -> T:
+        async with AsyncSessionLocal() as session:
+            result = await compute(session)
+        downsample_cache.set(versioned_key, result)
+        return result
+
+    return await _downsample_flights.run(versioned_key, work)
@@ -0,0 +1,232 @@
+"""
+Export Service
+Streams gas and NYC climate rows as Parquet or Arrow IPC in fixed-size batches read from a
+server-side cursor, so memory stays flat however many rows are exported.
+
+pyarrow is optional (pip install pyarrow); without it the export endpoints return 501.
+
+Export to a file from backend directory:
+    python -m app.services.export gas --format parquet --output gas.parquet --gas-type CO2
+    python -m app.services.export climate --format arrow --output climate.arrow --zip-code 10001
+"""
+import argparse
+import os
+from datetime import date
+from typing import Any, AsyncIterator, List, Sequence, Tuple
+from sqlalchemy import Date, DateTime, Float, Integer, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.gas_data import GasData
+from app.models.gas_dimension import GAS_DIMENSIONS
+from app.models.nyc_climate import NYCClimateData
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+
+# Rows per record batch (and per Parquet row group)
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "50000"))
+
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+EXPORT_MODELS = {
+    "gas": GasData,
+    "climate": NYCClimateData,
+}
+
+# Id columns exported as the name they refer to (name, dimension table), per model
+_DECODED_COLUMNS = {
+    GasData: {f"{attribute}_id": (attribute, dimension) for attribute, dimension in GAS_DIMENSIONS.items()},
+}
+
+
+def export_available() -> bool:
+    return pa is not None
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("Export requires pyarrow: pip install pyarrow")
+
+
+def export_columns(model) -> List[Tuple[Any, bool]]:
+    """(column, nullable) of each exported column: the table columns, dimension ids decoded to names"""
+    decoded = _DECODED_COLUMNS.get(model, {})
+    columns = []
+    for column in model.__table__.columns:
+        if column.name in decoded:
+            name, dimension = decoded[column.name]
+            columns.append((dimension.name.label(name), column.nullable))
+        else:
+            columns.append((column, column.nullable or column.primary_key))
+    return columns
+
+
+def export_schema(model) -> "pa.Schema":
+    """Arrow schema with one field per exported column"""
+    _require_pyarrow()
+    fields = []
+    for column, nullable in export_columns(model):
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us", tz="UTC" if column.type.timezone else None)
+        elif isinstance(column.type, Date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type, nullable=nullable))
+    return pa.schema(fields)
+
+
+def export_query(model, conditions: Sequence[Any]):
+    """All exported columns of the matching rows in primary-key order"""
+    query = select(*(column for column, _ in export_columns(model))).select_from(model)
+    for column_name, (_, dimension) in _DECODED_COLUMNS.get(model, {}).items():
+        query = query.outerjoin(dimension, dimension.id == model.__table__.c[column_name])
+    return query.filter(*conditions).order_by(model.id)
+
+
+def _record_batch(schema: "pa.Schema", rows: Sequence[Sequence[Any]]) -> "pa.RecordBatch":
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to the caller between batches"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class _ExportWriter:
+    """Parquet or Arrow IPC stream writer over any writable file object"""
+
+    def __init__(self, sink, schema: "pa.Schema", fmt: str):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(sink, schema)
+        else:
+            self._writer = pa.ipc.new_stream(sink, schema)
+        self.schema = schema
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]) -> None:
+        self._writer.write_batch(_record_batch(self.schema, rows))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+async def stream_export(
+    db: AsyncSession,
+    model,
+    conditions: Sequence[Any],
+    fmt: str,
+    batch_rows: int = EXPORT_BATCH_ROWS
+) -> AsyncIterator[bytes]:
+    """Yield the encoded export one record batch at a time"""
+    _require_pyarrow()
+    sink = _ChunkSink()
+    writer = _ExportWriter(pa.PythonFile(sink, mode="w"), export_schema(model), fmt)
+
+    result = await db.stream(export_query(model, conditions).execution_options(yield_per=batch_rows))
+    async for rows in result.partitions(batch_rows):
+        writer.write_rows(rows)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_to_file(
+    db: Session,
+    model,
+    conditions: Sequence[Any],
+    fmt: str,
+    path: str,
+    batch_rows: int = EXPORT_BATCH_ROWS
+) -> int:
+    """Write the export to a file; returns the number of rows"""
+    _require_pyarrow()
+    exported = 0
+    with open(path, "wb") as output:
+        writer = _ExportWriter(output, export_schema(model), fmt)
+        result = db.execute(
+            export_query(model, conditions),
+            execution_options={"stream_results": True, "yield_per": batch_rows}
+        )
+        for rows in result.partitions(batch_rows):
+            writer.write_rows(rows)
+            exported += len(rows)
+        writer.close()
+    return exported
+
+
+def main():
+    from app.db.database import SessionLocal
+    from app.db.filters import climate_data_filters, gas_data_filters
+
+    parser = argparse.ArgumentParser(description="Export gas or NYC climate data as Parquet or Arrow IPC")
+    parser.add_argument("dataset", choices=sorted(EXPORT_MODELS), help="Table to export")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--output", required=True, help="Output file path")
+    parser.add_argument("--gas-type", help="Gas data: filter by gas type")
+    parser.add_argument("--region", help="Gas data: filter by region")
+    parser.add_argument("--zip-code", help="Climate data: filter by ZIP code")
+    parser.add_argument("--start-date", help="YYYY-MM-DD")
+    parser.add_argument("--end-date", help="YYYY-MM-DD")
+    parser.add_argument("--batch-rows", type=int, default=EXPORT_BATCH_ROWS)
+    args = parser.parse_args()
+
+    start_date = date.fromisoformat(args.start_date) if args.start_date else None
+    end_date = date.fromisoformat(args.end_date) if args.end_date else None
+    if args.dataset == "gas":
+        conditions = gas_data_filters(args.gas_type, args.region, start_date, end_date)
+    else:
+        conditions = climate_data_filters(args.zip_code, start_date, end_date)
+
+    db = SessionLocal()
+    try:
+        exported = export_to_file(
+            db, EXPORT_MODELS[args.dataset], conditions, args.format, args.output, args.batch_rows
+        )
+    finally:
+        db.close()
+    print(f"Exported {exported} {args.dataset} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Gas Analytics Service
+Resampled gas series with rolling means, period-over-period and year-over-year changes,
+computed by the database in one query: window functions over the gas rollups, so only one
+row per bucket leaves the database. Day, week and month buckets are read from the rollup
+table directly; years are aggregated from the month rollups.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Date, case, func, literal_column, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.rollup import GasRollup
+from app.services.rollups import bucket_start, bucket_start_sql
+
+ANALYTICS_BUCKETS = ("day", "week", "month", "year")
+# Largest rolling-mean window, in buckets
+MAX_ANALYTICS_WINDOW = 366
+
+
+def _prior_year_sql(dialect_name: str, bucket: str, column):
+    """SQL expression for the start of the same bucket one year earlier (52 weeks for weeks)"""
+    if dialect_name == "sqlite":
+        return func.date(column, "-364 days" if bucket == "week" else "-1 year")
+    if dialect_name == "postgresql":
+        return type_coerce(column - literal_column("interval '52 weeks'" if bucket == "week" else "interval '1 year'"), Date)
+    raise ValueError(f"Unsupported dialect: {dialect_name}")
+
+
+def _series_query(dialect_name: str, bucket: str, gas_type: str, region: str):
+    """bucket_start, min, max, mean, count and unit of each bucket of one series"""
+    conditions = [GasRollup.gas_type == gas_type, GasRollup.region == region]
+    if bucket != "year":
+        return select(
+            GasRollup.bucket_start,
+            GasRollup.min,
+            GasRollup.max,
+            (GasRollup.sum / GasRollup.count).label("mean"),
+            GasRollup.count,
+            GasRollup.unit
+        ).filter(GasRollup.bucket == bucket, *conditions)
+
+    year_start = type_coerce(bucket_start_sql(dialect_name, "year", GasRollup.bucket_start), Date)
+    return (
+        select(
+            year_start.label("bucket_start"),
+            func.min(GasRollup.min).label("min"),
+            func.max(GasRollup.max).label("max"),
+            (func.sum(GasRollup.sum) / func.sum(GasRollup.count)).label("mean"),
+            func.sum(GasRollup.count).label("count"),
+            func.max(GasRollup.unit).label("unit")
+        )
+        .filter(GasRollup.bucket == "month", *conditions)
+        .group_by(year_start)
+    )
+
+
+def _change_pct(current, previous):
+    return (current - previous) * 100.0 / func.nullif(previous, 0)
+
+
+async def get_gas_analytics(
+    db: AsyncSession,
+    gas_type: str,
+    region: str,
+    bucket: str = "month",
+    window: int = 12,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """
+    One point per bucket of a gas series, oldest first
+
+    Each point has the bucket's min/max/mean/count and unit, the rolling mean of the bucket means
+    over the last `window` buckets (null until that many buckets exist), and the change and
+    percent change of the mean against the previous bucket and the same bucket a year earlier.
+    Windows and lags see the whole series, so the first points in the date range still compare
+    against earlier data.
+    """
+    if bucket not in ANALYTICS_BUCKETS:
+        raise ValueError(f"Unknown analytics bucket: {bucket}")
+    dialect_name = db.get_bind().dialect.name
+    series = _series_query(dialect_name, bucket, gas_type.upper(), region).cte("series")
+    prior = series.alias("prior_year")
+
+    order = series.c.bucket_start
+    frame = {"order_by": order, "rows": (-(window - 1), 0)}
+    windowed = (
+        select(
+            series,
+            case(
+                (func.count().over(**frame) >= window, func.avg(series.c.mean).over(**frame)),
+                else_=None
+            ).label("rolling_mean"),
+            func.lag(series.c.mean).over(order_by=order).label("previous_mean"),
+            prior.c.mean.label("prior_year_mean")
+        )
+        .select_from(
+            series.outerjoin(prior, prior.c.bucket_start == _prior_year_sql(dialect_name, bucket, series.c.bucket_start))
+        )
+        .subquery("windowed")
+    )
+
+    query = select(
+        windowed.c.bucket_start,
+        windowed.c.min,
+        windowed.c.max,
+        windowed.c.mean,
+        windowed.c.count,
+        windowed.c.unit,
+        windowed.c.rolling_mean,
+        (windowed.c.mean - windowed.c.previous_mean).label("change"),
+        _change_pct(windowed.c.mean, windowed.c.previous_mean).label("change_pct"),
+        (windowed.c.mean - windowed.c.prior_year_mean).label("yoy_change"),
+        _change_pct(windowed.c.mean, windowed.c.prior_year_mean).label("yoy_change_pct")
+    )
+    if start_date:
+        query = query.filter(windowed.c.bucket_start >= bucket_start(start_date, bucket))
+    if end_date:
+        query = query.filter(windowed.c.bucket_start <= end_date)
+
+    result = await db.execute(query.order_by(windowed.c.bucket_start))
+    return [dict(row) for row in result.mappings()]
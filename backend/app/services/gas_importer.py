@@ -0,0 +1,434 @@
+"""
+Gas Importer
+Streams large local greenhouse-gas files into gas_data one line at a time:
+
+- NOAA GML flask and in-situ text files (whitespace-separated columns after a '#' comment
+  header). Samples of one site and day are averaged into a daily value; flagged samples and
+  missing values (-999.99) are skipped.
+- EDGAR emission exports as CSV or XLSX, wide (Y_1970, Y_1971, ... columns) or long (Year
+  and value columns). Sector rows of the same country, substance and year are summed into
+  one value dated January 1st.
+
+Gas types and units are normalized (e.g. 'methane' -> CH4, 'nmol mol-1' -> ppb, Gg -> kt).
+Rows already stored are skipped (or overwritten with --update), and new rows are written in
+chunks through the bulk ingest pipeline with a progress line per chunk.
+
+XLSX files need openpyxl (pip install openpyxl).
+
+Import from backend directory:
+    python -m app.services.gas_importer noaa co2_mlo_surface-insitu_1_ccgg_DailyData.txt
+    python -m app.services.gas_importer noaa ch4_brw_surface-flask_1_ccgg_event.txt --region Barrow
+    python -m app.services.gas_importer edgar EDGAR_CH4_1970_2022.xlsx --sheet "TOTALS BY COUNTRY"
+"""
+import argparse
+import asyncio
+import csv
+import os
+import re
+import sys
+import time
+from collections import Counter
+from datetime import date
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.db.write_queue import write_queue
+from app.services.bulk_ingest import RowError
+from app.services.gas_ingest import GAS_INGEST_CHUNK_ROWS, ingest_gas_records
+
+try:
+    import openpyxl
+except ImportError:  # optional dependency, only for XLSX input
+    openpyxl = None
+
+# Unit each gas's concentration is stored in (the units NOAA reports them in)
+GAS_UNITS = {"CO2": "ppm", "CH4": "ppb", "N2O": "ppb", "SF6": "ppt"}
+# Unit emission masses are stored in
+EMISSION_UNIT = "kt"
+
+_GAS_ALIASES = {
+    "carbon dioxide": "CO2",
+    "methane": "CH4",
+    "nitrous oxide": "N2O",
+    "sulfur hexafluoride": "SF6",
+    "sulphur hexafluoride": "SF6",
+}
+# Mole fraction units as powers of ten (ppm = 1e-6), mass units as multiples of a kilotonne
+_MOLE_FRACTION_EXPONENTS = {
+    "ppm": -6, "umol mol-1": -6, "umol/mol": -6, "micromol mol-1": -6,
+    "ppb": -9, "nmol mol-1": -9, "nmol/mol": -9,
+    "ppt": -12, "pmol mol-1": -12, "pmol/mol": -12,
+}
+_MASS_UNITS = {"t": 0.001, "tonnes": 0.001, "kt": 1.0, "gg": 1.0, "mt": 1000.0, "tg": 1000.0, "gt": 1000000.0}
+_PER_YEAR = re.compile(r"\s*(/\s*(yr|year)|yr-1|per year)$")
+
+# NOAA marks missing values with -999.99, -99.99, ...
+_NOAA_MISSING = -99.0
+_NOAA_FIELD_ALIASES = {
+    "site": "site_code",
+    "analysis_value": "value",
+    "average": "value",
+    "analysis_flag": "qcflag",
+    "flag": "qcflag",
+    "parameter_formula": "parameter",
+}
+
+_EDGAR_TOTALS_SHEET = "TOTALS BY COUNTRY"
+_EDGAR_YEAR_COLUMN = re.compile(r"^(?:y_)?(\d{4})$")
+
+
+def normalize_gas_type(name: Any) -> Optional[str]:
+    """CO2, CH4, N2O or SF6 for a formula or common name in any case, None for anything else"""
+    text = str(name).strip()
+    alias = _GAS_ALIASES.get(text.lower().replace("_", " "))
+    if alias:
+        return alias
+    return text.upper() if text.upper() in GAS_UNITS else None
+
+
+def normalize_unit(gas_type: str, value: float, unit: str) -> Tuple[float, str]:
+    """
+    Convert a value to the stored unit: the gas's concentration unit for mole fractions,
+    kilotonnes for emission masses (per-year suffixes are dropped)
+    """
+    key = _PER_YEAR.sub("", unit.strip().lower().replace("µ", "u"))
+    if key in _MOLE_FRACTION_EXPONENTS:
+        target = GAS_UNITS[gas_type]
+        exponent = _MOLE_FRACTION_EXPONENTS[key] - _MOLE_FRACTION_EXPONENTS[target]
+        return (value * 10 ** exponent if exponent else value), target
+    if key in _MASS_UNITS:
+        return value * _MASS_UNITS[key], EMISSION_UNIT
+    raise RowError(f"unit: unknown unit {unit!r}")
+
+
+def _noaa_field(name: str) -> str:
+    name = name.strip().lower()
+    if name.startswith("sample_"):
+        name = name[len("sample_"):]
+    return _NOAA_FIELD_ALIASES.get(name, name)
+
+
+def iter_noaa_records(
+    path: str,
+    gas_type: Optional[str] = None,
+    region: Optional[str] = None,
+    unit: Optional[str] = None,
+    stats: Optional[Counter] = None
+) -> Iterator[Tuple[int, Any]]:
+    """
+    (line number, daily gas row or RowError) for each site and day of a NOAA GML text file
+
+    '# key: value' comment lines supply the gas (dataset_parameter), unit (value_unit) and, in
+    older files, the column names (data_fields); otherwise the first non-comment line is the
+    header. The gas falls back to the file name prefix (co2_mlo_... -> CO2) and the region to
+    the site code. Samples are averaged per consecutive site and day, as NOAA files are in
+    time order.
+
+    Args:
+        stats: Counts lines read and samples skipped as flagged or missing
+    """
+    stats = stats if stats is not None else Counter()
+    source = f"NOAA GML {os.path.basename(path)}"
+    file_gas = os.path.basename(path).split("_")[0]
+    metadata: Dict[str, str] = {}
+    fields: Optional[List[str]] = None
+    # Samples of the site-day being averaged: key (gas, region, date, unit), first line, values
+    current: Optional[Tuple[str, str, date, str]] = None
+    first_line = 0
+    values: List[float] = []
+
+    def daily_row() -> Tuple[int, Dict[str, Any]]:
+        gas, site, day, stored_unit = current
+        return first_line, {
+            "gas_type": gas,
+            "region": site,
+            "date": day,
+            "value": sum(values) / len(values),
+            "unit": stored_unit,
+            "source": source,
+            "notes": f"Daily mean of {len(values)} samples" if len(values) > 1 else None,
+        }
+
+    with open(path, encoding="utf-8", errors="replace") as lines:
+        for line_number, line in enumerate(lines, start=1):
+            stats["lines"] += 1
+            text = line.strip()
+            if not text:
+                continue
+            if text.startswith("#"):
+                key, separator, value = text.lstrip("#").partition(":")
+                if separator:
+                    metadata[key.strip().lower()] = value.strip()
+                continue
+
+            parts = text.split()
+            if fields is None:
+                if "data_fields" in metadata:
+                    fields = [_noaa_field(name) for name in metadata["data_fields"].split()]
+                else:
+                    fields = [_noaa_field(name) for name in parts]
+                    continue
+            if len(parts) != len(fields):
+                yield line_number, RowError(f"expected {len(fields)} columns, got {len(parts)}")
+                continue
+            record = dict(zip(fields, parts))
+
+            try:
+                gas = normalize_gas_type(
+                    gas_type or record.get("parameter") or metadata.get("dataset_parameter") or file_gas
+                )
+                if gas is None:
+                    raise RowError("unknown gas type; pass --gas-type")
+                try:
+                    day = date(int(record["year"]), int(record["month"]), int(record.get("day", 1)))
+                    value = float(record["value"])
+                except KeyError as e:
+                    raise RowError(f"missing column {e.args[0]!r}")
+                except ValueError as e:
+                    raise RowError(f"invalid date or value: {e}")
+                if value <= _NOAA_MISSING:
+                    stats["missing value"] += 1
+                    continue
+                if record.get("qcflag", ".")[0] != ".":
+                    stats["flagged"] += 1
+                    continue
+                value, stored_unit = normalize_unit(
+                    gas, value, unit or metadata.get("value_unit") or GAS_UNITS[gas]
+                )
+                site = region or record.get("site_code", "").upper()
+                if not site:
+                    raise RowError("missing site code; pass --region")
+            except RowError as e:
+                yield line_number, e
+                continue
+
+            key = (gas, site, day, stored_unit)
+            if key != current:
+                if current:
+                    yield daily_row()
+                current, first_line, values = key, line_number, []
+            values.append(value)
+
+    if current:
+        yield daily_row()
+
+
+def _iter_table_rows(path: str, sheet: Optional[str]) -> Iterator[Tuple[int, List[Any]]]:
+    """(row number, cell values) of a CSV file or XLSX worksheet, read one row at a time"""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        if openpyxl is None:
+            raise RuntimeError("XLSX import requires openpyxl: pip install openpyxl")
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            if sheet:
+                worksheet = workbook[sheet]
+            elif _EDGAR_TOTALS_SHEET in workbook.sheetnames:
+                worksheet = workbook[_EDGAR_TOTALS_SHEET]
+            else:
+                worksheet = workbook.worksheets[0]
+            for row_number, cells in enumerate(worksheet.iter_rows(values_only=True), start=1):
+                yield row_number, list(cells)
+        finally:
+            workbook.close()
+        return
+
+    with open(path, newline="", encoding="utf-8-sig") as rows:
+        for row_number, cells in enumerate(csv.reader(rows), start=1):
+            yield row_number, cells
+
+
+def iter_edgar_records(
+    path: str,
+    sheet: Optional[str] = None,
+    gas_type: Optional[str] = None,
+    unit: str = "Gg",
+    stats: Optional[Counter] = None
+) -> Iterator[Tuple[int, Any]]:
+    """
+    (row number, annual gas row or RowError) for each country, substance and year of an
+    EDGAR CSV or XLSX export
+
+    Title rows above the header (the row with a Substance or Country_code_A3 column) are
+    skipped. Values of rows sharing a country, substance and year (one per sector) are summed,
+    so memory grows with the number of series-years, not with the file; those rows are
+    yielded once the whole file has been read. Substances other than CO2, CH4, N2O and SF6
+    (e.g. GWP-weighted totals) are skipped.
+
+    Args:
+        sheet: XLSX worksheet (default: TOTALS BY COUNTRY if present, else the first sheet)
+        gas_type: Gas of every row, for files without a Substance column
+        unit: Unit of the values unless the file has a Unit column (EDGAR reports Gg)
+        stats: Counts rows read and rows skipped for an unsupported substance
+    """
+    stats = stats if stats is not None else Counter()
+    source = f"EDGAR {os.path.basename(path)}"
+    columns: Optional[Dict[str, int]] = None
+    year_columns: List[Tuple[int, int]] = []
+    # (gas, region, year) -> [first row number, total, unit]
+    totals: Dict[Tuple[str, str, int], List[Any]] = {}
+
+    for row_number, cells in _iter_table_rows(path, sheet):
+        stats["lines"] += 1
+        if columns is None:
+            names = [str(cell).strip().lower() if cell is not None else "" for cell in cells]
+            if "substance" in names or "country_code_a3" in names:
+                columns = {name: index for index, name in enumerate(names) if name}
+                year_columns = [
+                    (index, int(match.group(1)))
+                    for index, match in ((index, _EDGAR_YEAR_COLUMN.match(name)) for index, name in enumerate(names))
+                    if match
+                ]
+            continue
+        if all(cell in (None, "") for cell in cells):
+            continue
+
+        def cell(*names: str) -> Any:
+            for name in names:
+                if name in columns and columns[name] < len(cells) and cells[columns[name]] not in (None, ""):
+                    return cells[columns[name]]
+            return None
+
+        substance = gas_type or cell("substance")
+        gas = normalize_gas_type(substance) if substance is not None else None
+        if gas is None:
+            stats["unsupported substance"] += 1
+            continue
+        region = cell("name", "country", "country_code_a3")
+        if region is None:
+            yield row_number, RowError("missing country name or code")
+            continue
+        row_unit = str(cell("unit") or unit)
+
+        if year_columns:
+            year_values = [(year, cells[index] if index < len(cells) else None) for index, year in year_columns]
+        elif "year" in columns:
+            year_values = [(cell("year"), cell("value", "emissions"))]
+        else:
+            yield row_number, RowError("no year columns (Y_1970, ... or Year)")
+            continue
+
+        for year, raw in year_values:
+            if raw in (None, ""):
+                continue
+            try:
+                try:
+                    year = int(float(year))
+                    value = float(raw)
+                except (TypeError, ValueError):
+                    raise RowError(f"invalid year or value {year!r}: {raw!r}")
+                value, stored_unit = normalize_unit(gas, value, row_unit)
+            except RowError as e:
+                yield row_number, e
+                continue
+            total = totals.setdefault((gas, str(region).strip(), year), [row_number, 0.0, stored_unit])
+            total[1] += value
+
+    if columns is None:
+        raise ValueError(f"No EDGAR header row (Substance or Country_code_A3 column) found in {path}")
+    for (gas, region, year), (row_number, total, stored_unit) in totals.items():
+        yield row_number, {
+            "gas_type": gas,
+            "region": region,
+            "date": date(year, 1, 1),
+            "value": total,
+            "unit": stored_unit,
+            "source": source,
+            "notes": None,
+        }
+
+
+async def import_gas_records(
+    records: Iterable[Tuple[int, Any]],
+    on_conflict: str = "skip",
+    chunk_rows: int = GAS_INGEST_CHUNK_ROWS,
+    on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Validate and write parsed (line number, row) pairs in chunks through the write queue
+
+    Args:
+        on_conflict: 'skip' keeps rows already stored, 'update' overwrites their values
+
+    Returns:
+        The bulk ingest report; 'written' counts new (or, with 'update', overwritten) rows
+    """
+    async def pairs() -> AsyncIterator[Tuple[int, Any]]:
+        for pair in records:
+            yield pair
+
+    return await ingest_gas_records(pairs(), on_conflict, chunk_rows, on_chunk)
+
+
+async def _import_with_writer(records: Iterable[Tuple[int, Any]], **options) -> Dict[str, Any]:
+    write_queue.start()
+    try:
+        return await import_gas_records(records, **options)
+    finally:
+        await write_queue.stop()
+
+
+def main():
+    from app.db.init_db import init_db
+
+    parser = argparse.ArgumentParser(description="Import NOAA GML or EDGAR greenhouse-gas files into gas_data")
+    formats = parser.add_subparsers(dest="format", required=True)
+    noaa = formats.add_parser("noaa", help="NOAA GML flask or in-situ text file")
+    noaa.add_argument("path")
+    noaa.add_argument("--gas-type", help="Gas of the file (default: from its header or file name)")
+    noaa.add_argument("--region", help="Region to store the values under (default: the site code)")
+    noaa.add_argument("--unit", help="Unit of the values (default: from the header, else ppm/ppb/ppt by gas)")
+    edgar = formats.add_parser("edgar", help="EDGAR CSV or XLSX export")
+    edgar.add_argument("path")
+    edgar.add_argument("--sheet", help=f"XLSX worksheet (default: {_EDGAR_TOTALS_SHEET} if present)")
+    edgar.add_argument("--gas-type", help="Gas of every row, for files without a Substance column")
+    edgar.add_argument("--unit", default="Gg", help="Unit of the values unless the file has a Unit column")
+    for command in (noaa, edgar):
+        command.add_argument("--update", action="store_true", help="Overwrite values already stored")
+        command.add_argument("--chunk-rows", type=int, default=GAS_INGEST_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    stats: Counter = Counter()
+    if args.format == "noaa":
+        records = iter_noaa_records(args.path, args.gas_type, args.region, args.unit, stats)
+    else:
+        records = iter_edgar_records(args.path, args.sheet, args.gas_type, args.unit, stats)
+
+    init_db()
+    started = time.perf_counter()
+    imported = 0
+
+    def progress(chunk: Dict[str, Any]) -> None:
+        nonlocal imported
+        imported += chunk["rows"]
+        print(
+            f"chunk {chunk['chunk']}: lines {chunk['first_line']}-{chunk['last_line']}, "
+            f"{chunk['written']} written, {chunk['valid_rows'] - chunk['written']} already stored, "
+            f"{chunk['error_count']} rejected ({imported / (time.perf_counter() - started):.0f} values/s)"
+        )
+        for error in chunk["errors"][:5]:
+            print(f"  line {error['line']}: {error['error']}")
+        if chunk["error"]:
+            print(f"  chunk failed: {chunk['error']}")
+
+    try:
+        report = asyncio.run(_import_with_writer(
+            records,
+            on_conflict="update" if args.update else "skip",
+            chunk_rows=args.chunk_rows,
+            on_chunk=progress
+        ))
+    except (OSError, RuntimeError, ValueError, KeyError) as e:
+        sys.exit(f"Import failed: {e}")
+
+    elapsed = time.perf_counter() - started
+    valid = report["rows"] - report["rejected"]
+    print(
+        f"Read {stats['lines']} lines in {elapsed:.1f}s: {report['rows']} values "
+        f"({report['rows'] / elapsed:.0f} values/s), {report['written']} written, "
+        f"{valid - report['written']} already stored, {report['rejected']} rejected"
+    )
+    skipped = {reason: count for reason, count in stats.items() if reason != "lines"}
+    if skipped:
+        print("Skipped: " + ", ".join(f"{count} {reason}" for reason, count in sorted(skipped.items())))
+
+
+if __name__ == "__main__":
+    main()
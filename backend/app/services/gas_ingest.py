@@ -0,0 +1,181 @@
+"""
+Gas Ingest Service
+Bulk-loads gas observations from a streamed NDJSON or CSV body. Each chunk of valid rows is
+written as one executemany INSERT ... ON CONFLICT through the write queue. Rollups of the
+written series are refreshed afterwards by one background job per load.
+
+Gas type, region, unit and source are stored as ids into the gas dimension tables; names not
+seen before are added to them in the writing transaction (encode_gas_rows).
+"""
+import os
+from datetime import date
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.upsert import executemany_driver, insert_on_conflict
+from app.db.write_queue import write_queue
+from app.models.gas_data import GasData
+from app.models.gas_dimension import GAS_DIMENSIONS
+from app.services.bulk_ingest import RowError, ingest_records, iter_stream_records
+from app.services.dimension_cache import bump_data_version
+from app.services.rollups import enqueue_rollup_refresh, widen_spans
+
+GAS_INGEST_CHUNK_ROWS = int(os.getenv("GAS_INGEST_CHUNK_ROWS", "5000"))
+
+_KEY_FIELDS = ["gas_type", "region", "date"]
+_KEY_COLUMNS = ["gas_type_id", "region_id", "date"]
+_VALUE_COLUMNS = ["value", "unit_id", "source_id", "notes"]
+_REQUIRED = ("gas_type", "region", "date", "value", "unit")
+# Names per dimension lookup (one bound parameter each)
+_NAME_BATCH_SIZE = 500
+
+
+def coerce_gas_row(raw: Any) -> Dict[str, Any]:
+    """Validate one parsed row and convert it to gas data values (dimension names, not ids)"""
+    if not isinstance(raw, dict):
+        raise RowError("row is not an object")
+    missing = [field for field in _REQUIRED if raw.get(field) in (None, "")]
+    if missing:
+        raise RowError(f"missing required field(s): {', '.join(missing)}")
+
+    row_date = raw["date"]
+    if not isinstance(row_date, date):
+        try:
+            row_date = date.fromisoformat(str(row_date))
+        except ValueError:
+            raise RowError(f"date: invalid date {raw['date']!r}, expected YYYY-MM-DD")
+    try:
+        value = float(raw["value"])
+    except (TypeError, ValueError):
+        raise RowError(f"value: not a number {raw['value']!r}")
+
+    return {
+        "gas_type": str(raw["gas_type"]),
+        "region": str(raw["region"]),
+        "date": row_date,
+        "value": value,
+        "unit": str(raw["unit"]),
+        "source": str(raw["source"]) if raw.get("source") not in (None, "") else None,
+        "notes": str(raw["notes"]) if raw.get("notes") not in (None, "") else None,
+    }
+
+
+async def _dimension_ids(session: AsyncSession, dimension, names: Iterable[str]) -> Dict[str, int]:
+    """Ids of the names in a gas dimension table, adding the missing names"""
+    async def lookup(names: List[str]) -> Dict[str, int]:
+        ids: Dict[str, int] = {}
+        for i in range(0, len(names), _NAME_BATCH_SIZE):
+            result = await session.execute(
+                select(dimension.name, dimension.id).filter(dimension.name.in_(names[i:i + _NAME_BATCH_SIZE]))
+            )
+            ids.update(result.all())
+        return ids
+
+    names = sorted(set(names))
+    ids = await lookup(names)
+    missing = [name for name in names if name not in ids]
+    if missing:
+        await session.execute(
+            insert_on_conflict(session.get_bind().dialect.name, dimension.__table__, None, index_elements=["name"]),
+            [{"name": name} for name in missing]
+        )
+        ids.update(await lookup(missing))
+    return ids
+
+
+async def encode_gas_rows(session: AsyncSession, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Convert gas rows from names (gas_type, region, unit, source) to GasData column values
+    (gas_type_id, ...); call in the writing transaction
+    """
+    ids = {
+        attribute: await _dimension_ids(
+            session, dimension, (row[attribute] for row in rows if row.get(attribute) is not None)
+        )
+        for attribute, dimension in GAS_DIMENSIONS.items()
+    }
+    encoded = []
+    for row in rows:
+        row = dict(row)
+        for attribute in GAS_DIMENSIONS:
+            name = row.pop(attribute, None)
+            row[f"{attribute}_id"] = ids[attribute][name] if name is not None else None
+        encoded.append(row)
+    return encoded
+
+
+async def write_gas_rows(rows: List[Dict[str, Any]], on_conflict: str = "update") -> int:
+    """
+    Write validated gas rows in one transaction on the writer; their rollups are not refreshed
+    (ingest_gas_records queues that once per load)
+
+    Args:
+        rows: Values as returned by coerce_gas_row (dimension names, not ids)
+        on_conflict: 'update' overwrites the value of an existing (gas_type, region, date),
+                     'skip' keeps the stored row
+
+    Returns:
+        Number of rows inserted or updated
+    """
+    # Last row wins for keys repeated within the batch (one statement cannot touch a row twice)
+    rows = list({tuple(row[field] for field in _KEY_FIELDS): row for row in rows}.values())
+
+    async def upsert(session: AsyncSession) -> int:
+        written = await executemany_driver(
+            await session.connection(),
+            insert_on_conflict(
+                session.get_bind().dialect.name,
+                GasData.__table__,
+                None,
+                index_elements=_KEY_COLUMNS,
+                update_columns=_VALUE_COLUMNS if on_conflict == "update" else None
+            ),
+            await encode_gas_rows(session, rows)
+        )
+        if written:
+            await session.execute(bump_data_version(session.get_bind().dialect.name, GasData.__tablename__))
+        return written
+
+    return await write_queue.submit(upsert)
+
+
+async def ingest_gas_records(
+    records: AsyncIterator[Tuple[int, Any]],
+    on_conflict: str = "update",
+    chunk_rows: int = GAS_INGEST_CHUNK_ROWS,
+    on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Validate and write (line number, record or RowError) pairs in chunks, then queue a job
+    refreshing the rollups of every series a chunk wrote to
+
+    Returns:
+        The bulk ingest report (see ingest_records)
+    """
+    spans: Dict[Tuple[str, str], List[date]] = {}
+
+    async def write(rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        written = await write_gas_rows(rows, on_conflict)
+        if written:
+            widen_spans(spans, (((row["gas_type"], row["region"]), row["date"]) for row in rows))
+        return {"written": written}
+
+    report = await ingest_records(records, coerce_gas_row, write, ["written"], chunk_rows, on_chunk)
+    await enqueue_rollup_refresh(gas=spans)
+    return report
+
+
+async def ingest_gas_stream(
+    pieces: AsyncIterator[bytes],
+    fmt: str,
+    on_conflict: str = "update",
+    chunk_rows: int = GAS_INGEST_CHUNK_ROWS
+) -> Dict[str, Any]:
+    """
+    Parse, validate and write a streamed NDJSON or CSV body of gas observations
+
+    Returns:
+        Totals (rows, written, rejected) and one report per chunk with its line range,
+        rows written and row errors
+    """
+    return await ingest_gas_records(iter_stream_records(pieces, fmt), on_conflict, chunk_rows)
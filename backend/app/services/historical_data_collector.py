@@ -6,11 +6,16 @@ import asyncio
 import logging
 from typing import List, Dict, Any, Optional
 from datetime import date, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.weather_api import WeatherAPIService
 from app.services.climate_data_service import ClimateDataService
-from app.models.nyc_climate import NYCClimateData
-from app.db.database import SessionLocal
+from app.models.nyc_climate import NYCClimateData, SOURCE_SEED
+from app.db.database import AsyncSessionLocal
+from app.db.upsert import insert_on_conflict
+from app.db.write_queue import write_queue
+from app.services.dimension_cache import bump_data_version
+from app.services.rollups import refresh_climate_rollups
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +30,7 @@ class HistoricalDataCollector:
         self,
         zip_code: str,
         days: int = 30,
-        db: Optional[Session] = None
+        db: Optional[AsyncSession] = None
     ) -> int:
         """
         Collect historical data from APIs and store in database
@@ -33,32 +38,38 @@ class HistoricalDataCollector:
         Args:
             zip_code: ZIP code
             days: Number of days of history to collect
-            db: Database session (if None, creates new session)
+            db: Database session for the existence check (if None, creates new session); it
+                is released before the API calls, and new records go through the write queue
         
         Returns:
             Number of records stored
         """
         should_close_db = False
         if db is None:
-            db = SessionLocal()
+            db = AsyncSessionLocal()
             should_close_db = True
         
         try:
-            stored_count = 0
+            new_records: List[Dict[str, Any]] = []
             today = date.today()
             
+            # Read phase: which days already have real data, in one query (seed rows are re-collected)
+            existing_dates = set(await db.scalars(
+                select(NYCClimateData.date)
+                .filter(
+                    NYCClimateData.zip_code == zip_code,
+                    NYCClimateData.date > today - timedelta(days=days),
+                    NYCClimateData.date <= today,
+                    or_(NYCClimateData.source.is_(None), NYCClimateData.source != SOURCE_SEED)
+                )
+            ))
+            # Release the connection before the (slow, rate-limited) API calls
+            await db.close()
+            
             for i in range(days):
                 target_date = today - timedelta(days=i)
                 
-                # Check if data already exists
-                existing = db.query(NYCClimateData)\
-                    .filter(
-                        NYCClimateData.zip_code == zip_code,
-                        NYCClimateData.date == target_date
-                    )\
-                    .first()
-                
-                if existing:
+                if target_date in existing_dates:
                     logger.debug(f"Data already exists for {zip_code} on {target_date}, skipping")
                     continue
                 
@@ -67,28 +78,28 @@ class HistoricalDataCollector:
                     climate_data = await self.climate_service.get_nyc_climate_data(zip_code, target_date)
                     
                     # Create database record
-                    db_record = NYCClimateData(
-                        zip_code=zip_code,
-                        date=target_date,
-                        aqi=climate_data.get('aqi'),
-                        pm25=climate_data.get('pm25'),
-                        pm10=climate_data.get('pm10'),
-                        o3=climate_data.get('o3'),
-                        no2=climate_data.get('no2'),
-                        co=climate_data.get('co'),
-                        temperature=climate_data.get('temperature'),
-                        humidity=climate_data.get('humidity'),
-                        wind_speed=climate_data.get('wind_speed'),
-                        wind_direction=climate_data.get('wind_direction'),
-                        pressure=climate_data.get('pressure'),
-                        visibility=climate_data.get('visibility'),
-                        uv_index=climate_data.get('uv_index'),
-                        pollen_count=climate_data.get('pollen_count'),
-                        asthma_index=climate_data.get('asthma_index')
-                    )
+                    db_record = {
+                        'zip_code': zip_code,
+                        'date': target_date,
+                        'aqi': climate_data.get('aqi'),
+                        'pm25': climate_data.get('pm25'),
+                        'pm10': climate_data.get('pm10'),
+                        'o3': climate_data.get('o3'),
+                        'no2': climate_data.get('no2'),
+                        'co': climate_data.get('co'),
+                        'temperature': climate_data.get('temperature'),
+                        'humidity': climate_data.get('humidity'),
+                        'wind_speed': climate_data.get('wind_speed'),
+                        'wind_direction': climate_data.get('wind_direction'),
+                        'pressure': climate_data.get('pressure'),
+                        'visibility': climate_data.get('visibility'),
+                        'uv_index': climate_data.get('uv_index'),
+                        'pollen_count': climate_data.get('pollen_count'),
+                        'asthma_index': climate_data.get('asthma_index'),
+                        'source': climate_data.get('source')
+                    }
                     
-                    db.add(db_record)
-                    stored_count += 1
+                    new_records.append(db_record)
                     
                     # Add delay to avoid API rate limiting
                     if i < days - 1:
@@ -100,17 +111,35 @@ class HistoricalDataCollector:
                     logger.warning(f"Failed to collect data for {zip_code} on {target_date}: {e}")
                     continue
             
-            db.commit()
+            # Write phase: one short transaction on the writer
+            async def insert(session: AsyncSession) -> int:
+                # New days are inserted and stored seed rows replaced; real rows another
+                # writer stored while we were collecting are kept
+                result = await session.execute(insert_on_conflict(
+                    session.get_bind().dialect.name,
+                    NYCClimateData,
+                    new_records,
+                    index_elements=['zip_code', 'date'],
+                    update_columns=[c for c in new_records[0] if c not in ('zip_code', 'date')],
+                    update_where=NYCClimateData.source == SOURCE_SEED
+                ))
+                await session.run_sync(
+                    refresh_climate_rollups,
+                    [(record['zip_code'], record['date']) for record in new_records]
+                )
+                await session.execute(bump_data_version(session.get_bind().dialect.name, NYCClimateData.__tablename__))
+                return result.rowcount
+            
+            stored_count = await write_queue.submit(insert) if new_records else 0
             logger.info(f"Stored {stored_count} new records for {zip_code} (out of {days} days)")
             return stored_count
             
         except Exception as e:
-            db.rollback()
             logger.error(f"Error collecting historical data: {e}")
             raise
         finally:
             if should_close_db:
-                db.close()
+                await db.close()
     
     async def collect_for_multiple_zipcodes(
         self,
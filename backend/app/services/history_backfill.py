@@ -0,0 +1,85 @@
+"""
+History Backfill Service
+Fills in missing climate history for a ZIP code through the job queue, so predictions do
+not wait on rate-limited upstream calls. A ZIP that is already queued, or was backfilled
+within the cooldown, is not queued again; requests within the cooldown skip the queue
+entirely in this process.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Set
+from app.services.job_queue import job_handler, job_queue
+
+logger = logging.getLogger(__name__)
+
+# Days of history a backfill collects, and how long before the same ZIP can be backfilled again
+HISTORY_BACKFILL_DAYS = int(os.getenv("HISTORY_BACKFILL_DAYS", "30"))
+HISTORY_BACKFILL_COOLDOWN_SECONDS = float(os.getenv("HISTORY_BACKFILL_COOLDOWN_SECONDS", "3600"))
+
+COLLECT_HISTORY_JOB = "collect_history"
+
+# ZIP code -> monotonic time this process last asked for its backfill
+_requested_at: Dict[str, float] = {}
+# Strong references to pending enqueue tasks (the event loop only keeps weak ones)
+_backfill_tasks: Set[asyncio.Task] = set()
+
+
+async def request_history_backfill(zip_code: str, days: int = HISTORY_BACKFILL_DAYS, priority: int = 0) -> bool:
+    """
+    Queue a history backfill for the ZIP code without waiting for it
+
+    Returns:
+        True if a job was queued, False if one is already pending or ran recently
+    """
+    queued = await job_queue.enqueue(
+        COLLECT_HISTORY_JOB,
+        {"zip_code": zip_code, "days": days},
+        key=f"{COLLECT_HISTORY_JOB}:{zip_code}",
+        priority=priority,
+        rerun_after_seconds=HISTORY_BACKFILL_COOLDOWN_SECONDS
+    )
+    if queued:
+        logger.info(f"Queued history backfill for ZIP {zip_code}")
+    return queued
+
+
+def schedule_history_backfill(zip_code: str) -> bool:
+    """
+    Request a history backfill for the ZIP code in the background, so the caller does not
+    wait for the write queue; skipped if this process requested one within the cooldown
+
+    Returns:
+        True if a request was scheduled
+    """
+    now = time.monotonic()
+    requested_at = _requested_at.get(zip_code)
+    if requested_at is not None and now - requested_at < HISTORY_BACKFILL_COOLDOWN_SECONDS:
+        return False
+    _requested_at[zip_code] = now
+
+    async def request() -> None:
+        try:
+            await request_history_backfill(zip_code)
+        except Exception as e:
+            # Let the next request try again
+            _requested_at.pop(zip_code, None)
+            logger.error(f"Queueing history backfill for ZIP {zip_code} failed: {e}")
+
+    task = asyncio.create_task(request())
+    _backfill_tasks.add(task)
+    task.add_done_callback(_backfill_tasks.discard)
+    return True
+
+
+@job_handler(COLLECT_HISTORY_JOB)
+async def collect_history(payload: Dict[str, Any]) -> None:
+    # Imported here: the collector depends on the prediction service, which requests backfills
+    from app.services.historical_data_collector import HistoricalDataCollector
+
+    zip_code = payload["zip_code"]
+    stored = await HistoricalDataCollector().collect_and_store_historical_data(
+        zip_code, payload.get("days", HISTORY_BACKFILL_DAYS)
+    )
+    logger.info(f"History backfill for ZIP {zip_code} stored {stored} record(s)")
@@ -0,0 +1,276 @@
+"""
+Hospital spatial index
+In-memory index of hospital locations for nearest-N and within-radius searches, ranked by
+great-circle (haversine) distance and filtered by specialty and emergency department.
+
+Hospitals are bucketed into fixed-size latitude/longitude cells (HOSPITAL_INDEX_CELL_DEGREES,
+like a geohash prefix) and kept in NumPy arrays sorted by cell, so the hospitals of a row
+of cells are one contiguous slice. A search scans a block of cells around the query point,
+doubling it until enough matches are closer than anything outside the block can be (or the
+radius is covered); when the block would hold more cells than are occupied it ranks all
+hospitals at once instead.
+
+The index follows the hospitals table's write counter in data_versions (see
+dimension_cache). When the counter moved, only hospitals with an id above the last indexed
+one are loaded, so inserts from this or another process are applied incrementally. The
+index is reloaded in full if the row count then differs (rows deleted, or ids committed
+out of order); the reload is built beside the current hospitals, which keep serving
+searches until it replaces them. Changes to stored hospitals made directly in the database (there is no
+update endpoint) are picked up on restart.
+"""
+import asyncio
+import math
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.data_version import DataVersion
+from app.models.hospital import Hospital
+
+# Cell size in degrees; 0.05 is about 5.5 km north-south
+HOSPITAL_INDEX_CELL_DEGREES = float(os.getenv("HOSPITAL_INDEX_CELL_DEGREES", "0.05"))
+
+EARTH_RADIUS_KM = 6371.0088
+# Columns kept for responses
+_FIELDS = ("id", "name", "borough", "latitude", "longitude", "address", "zip_code", "phone", "specialty",
+           "description", "website", "emergency_department", "beds", "asthma_specialists")
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km from one point to arrays of points, all in radians"""
+    a = np.sin((latitudes - latitude) / 2) ** 2 \
+        + math.cos(latitude) * np.cos(latitudes) * np.sin((longitudes - longitude) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def has_emergency_department(value: Optional[str]) -> bool:
+    return (value or "").strip().lower() in ("yes", "y", "true", "1")
+
+
+class _Layout(NamedTuple):
+    """Hospitals sorted by cell key (row * columns + column)"""
+    keys: np.ndarray
+    positions: np.ndarray  # Index into _Hospitals.rows
+    ids: np.ndarray
+    lat: np.ndarray  # Radians
+    lon: np.ndarray
+    cos_lat: np.ndarray
+    emergency: np.ndarray
+    specialty: np.ndarray  # Specialty codes
+    occupied_cells: int
+
+
+class _Hospitals:
+    """Indexed hospitals; replaced as a whole when the index is reloaded"""
+
+    def __init__(self):
+        self.last_id = 0
+        self.rows: List[Dict[str, Any]] = []
+        self.specialties: List[str] = []  # Distinct lower-case specialties, by code
+        self.specialty_code: Dict[str, int] = {}
+        # Per position; hospitals added since the sorted layout was built are merged into it
+        self.by_position: Dict[str, list] = {
+            "key": [], "id": [], "lat": [], "lon": [], "emergency": [], "specialty": [],
+        }
+        self.layout: Optional[_Layout] = None
+
+
+class HospitalIndex:
+    """Hospitals in latitude/longitude cells, kept in step with the hospitals table"""
+
+    def __init__(self, cell_degrees: float = HOSPITAL_INDEX_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._columns = max(1, round(360 / cell_degrees))
+        self._row_offset = math.ceil(90 / cell_degrees) + 1  # Keeps row numbers (and keys) non-negative
+        self._lock = asyncio.Lock()
+        self._version: Optional[int] = None
+        self._hospitals = _Hospitals()
+
+    def __len__(self) -> int:
+        return len(self._hospitals.rows)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (math.floor(latitude / self.cell_degrees) + self._row_offset,
+                math.floor((longitude + 180) / self.cell_degrees) % self._columns)
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Index one hospital (a dict of _FIELDS)"""
+        self._add(self._hospitals, row)
+
+    def _add(self, hospitals: _Hospitals, row: Dict[str, Any]) -> None:
+        hospitals.rows.append(row)
+        cell_row, cell_column = self._cell(row["latitude"], row["longitude"])
+        specialty = (row["specialty"] or "").lower()
+        if specialty not in hospitals.specialty_code:
+            hospitals.specialty_code[specialty] = len(hospitals.specialties)
+            hospitals.specialties.append(specialty)
+        columns = hospitals.by_position
+        columns["key"].append(cell_row * self._columns + cell_column)
+        columns["id"].append(row["id"])
+        columns["lat"].append(math.radians(row["latitude"]))
+        columns["lon"].append(math.radians(row["longitude"]))
+        columns["emergency"].append(has_emergency_department(row["emergency_department"]))
+        columns["specialty"].append(hospitals.specialty_code[specialty])
+        hospitals.last_id = max(hospitals.last_id, row["id"])
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Apply hospitals written since the last refresh (one primary-key read if none were)"""
+        version = await db.scalar(select(DataVersion.version).filter(DataVersion.name == Hospital.__tablename__)) or 0
+        if version == self._version:
+            return
+        async with self._lock:
+            if version == self._version:
+                return
+            columns = [Hospital.__table__.c[field] for field in _FIELDS]
+            hospitals = self._hospitals
+            new_rows = await db.execute(select(*columns).where(Hospital.id > hospitals.last_id).order_by(Hospital.id))
+            for row in new_rows.mappings():
+                self._add(hospitals, dict(row))
+            if await db.scalar(select(func.count()).select_from(Hospital)) != len(hospitals.rows):
+                # Searches keep using the current hospitals until the reloaded ones are complete
+                hospitals = _Hospitals()
+                for row in (await db.execute(select(*columns).order_by(Hospital.id))).mappings():
+                    self._add(hospitals, dict(row))
+            self._sorted(hospitals)
+            self._hospitals = hospitals
+            self._version = version
+
+    @staticmethod
+    def _sorted(hospitals: _Hospitals) -> _Layout:
+        layout = hospitals.layout
+        laid_out = len(layout.keys) if layout is not None else 0
+        if laid_out == len(hospitals.rows):
+            return layout
+        columns = {name: np.array(values[laid_out:]) for name, values in hospitals.by_position.items()}
+        keys = columns["key"].astype(np.int64)
+        lat = columns["lat"]
+        added = _Layout(
+            keys=keys,
+            positions=np.arange(laid_out, len(hospitals.rows)),
+            ids=columns["id"],
+            lat=lat,
+            lon=columns["lon"],
+            cos_lat=np.cos(lat),
+            emergency=columns["emergency"].astype(bool),
+            specialty=columns["specialty"],
+            occupied_cells=0,
+        )
+        order = np.argsort(keys, kind="stable")
+        arrays = [field[order] for field in added[:-1]]
+        if layout is not None:
+            # Insert after existing hospitals of the same cell, keeping the order stable
+            at = np.searchsorted(layout.keys, arrays[0], "right")
+            arrays = [np.insert(old, at, new) for old, new in zip(layout[:-1], arrays)]
+        hospitals.layout = _Layout(*arrays, occupied_cells=len(np.unique(arrays[0])))
+        return hospitals.layout
+
+    def _covered_km(self, latitude: float, ring: int) -> float:
+        """Lower bound of the distance from the query point to anything outside its block of ring cells"""
+        span = math.radians(ring * self.cell_degrees)
+        north_south = EARTH_RADIUS_KM * span
+        # Points beside the block lie within its latitudes, at most this far from the equator
+        max_latitude = math.radians(min(90.0, abs(latitude) + (ring + 1) * self.cell_degrees))
+        east_west = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.cos(max_latitude) * math.sin(min(span, math.pi) / 2)))
+        return min(north_south, east_west)
+
+    def _block(self, layout: _Layout, row: int, column: int, ring: int) -> np.ndarray:
+        """Sorted-array indices of the hospitals within ring cells of (row, column)"""
+        # Rows past the poles hold no hospitals (and their keys would alias other rows)
+        rows = np.arange(max(0, row - ring), min(2 * self._row_offset, row + ring) + 1, dtype=np.int64) * self._columns
+        first, last = column - ring, column + ring
+        if last - first + 1 >= self._columns:
+            spans = [(0, self._columns - 1)]
+        elif first < 0:
+            spans = [(first + self._columns, self._columns - 1), (0, last)]
+        elif last >= self._columns:
+            spans = [(first, self._columns - 1), (0, last - self._columns)]
+        else:
+            spans = [(first, last)]
+        starts = np.concatenate([np.searchsorted(layout.keys, rows + lo, "left") for lo, _ in spans])
+        ends = np.concatenate([np.searchsorted(layout.keys, rows + hi, "right") for _, hi in spans])
+        # Concatenate the ranges starts[i]:ends[i]
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+
+    def search(
+        self,
+        latitude: float,
+        longitude: float,
+        limit: int = 10,
+        radius_km: Optional[float] = None,
+        specialty: Optional[str] = None,
+        emergency: Optional[bool] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Nearest hospitals to a point
+
+        Args:
+            limit: Most hospitals to return
+            radius_km: Only hospitals within this great-circle distance
+            specialty: Only hospitals whose specialty contains this text (case-insensitive)
+            emergency: Only hospitals with (True) or without (False) an emergency department
+
+        Returns:
+            (hospital fields, distance in km) pairs, nearest first (ties by id)
+        """
+        hospitals = self._hospitals
+        if not hospitals.rows:
+            return []
+        layout = self._sorted(hospitals)
+        codes = None
+        if specialty:
+            text = specialty.lower()
+            codes = np.array([code for code, name in enumerate(hospitals.specialties) if text in name], dtype=np.int64)
+            if not len(codes):
+                return []
+        query_lat, query_lon = math.radians(latitude), math.radians(longitude)
+        query_cos = math.cos(query_lat)
+
+        def term(km: float) -> float:
+            # Distances are compared as the haversine term a = sin^2(dlat/2) + cos cos sin^2(dlon/2)
+            return math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2) ** 2
+
+        radius_a = term(radius_km) if radius_km is not None else None
+
+        def matches(index: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            """Sorted-array indices passing the filters, and their haversine terms"""
+            if emergency is not None:
+                index = index[layout.emergency[index] == emergency]
+            if codes is not None:
+                index = index[np.isin(layout.specialty[index], codes)]
+            a = np.sin((layout.lat[index] - query_lat) / 2) ** 2 \
+                + query_cos * layout.cos_lat[index] * np.sin((layout.lon[index] - query_lon) / 2) ** 2
+            if radius_a is not None:
+                within = a <= radius_a
+                index, a = index[within], a[within]
+            return index, a
+
+        row, column = self._cell(latitude, longitude)
+        ring = 1
+        while True:
+            if (2 * ring + 1) ** 2 >= layout.occupied_cells:
+                # Cheaper to rank everything than to walk mostly empty cells
+                index, a = matches(np.arange(len(layout.keys)))
+                break
+            index, a = matches(self._block(layout, row, column, ring))
+            covered = self._covered_km(latitude, ring)
+            if radius_km is not None and covered >= radius_km:
+                break
+            if len(a) >= limit and np.partition(a, limit - 1)[limit - 1] <= term(covered):
+                break
+            ring *= 2
+
+        if len(a) > limit:
+            # Everything up to the limit-th term, so ties at the cut-off are ordered by id too
+            keep = a <= np.partition(a, limit - 1)[limit - 1]
+            index, a = index[keep], a[keep]
+        order = np.lexsort((layout.ids[index], a))[:limit]
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a[order], 1.0)))
+        return [(hospitals.rows[layout.positions[i]], float(d)) for i, d in zip(index[order], distances)]
+
+
+hospital_index = HospitalIndex()
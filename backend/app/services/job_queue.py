@@ -0,0 +1,326 @@
+"""
+Job Queue Service
+Durable background jobs persisted in the jobs table, run by worker coroutines inside the
+API process or in a separate worker process; no external broker. Jobs have priorities,
+retries with exponential backoff, deduplication by job key, and a visibility timeout after
+which a job whose worker died is claimed again (the lost run counts as an attempt).
+
+Run a standalone worker from backend directory:
+    python -m app.services.job_queue --workers 2
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import AsyncSessionLocal
+from app.db.upsert import insert_on_conflict
+from app.db.write_queue import write_queue
+from app.models.job import Job, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_VISIBILITY_TIMEOUT_SECONDS = float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "600"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+
+# Modules that register job handlers; workers import them so every job kind can run
+JOB_HANDLER_MODULES = [
+    "app.services.history_backfill",
+    "app.services.rollups",
+]
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str):
+    """Register a coroutine function as the handler for a job kind; it receives the job payload"""
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobQueue:
+    """Enqueue jobs and run workers that claim them from the jobs table"""
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        poll_interval: float = JOB_POLL_SECONDS,
+        visibility_timeout: float = JOB_VISIBILITY_TIMEOUT_SECONDS
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Optional[Dict[str, Any]] = None,
+        key: Optional[str] = None,
+        priority: int = 0,
+        delay_seconds: float = 0,
+        max_attempts: int = 5,
+        rerun_after_seconds: float = 0
+    ) -> bool:
+        """
+        Persist a job
+
+        Args:
+            kind: Registered handler name
+            payload: JSON-serializable handler arguments
+            key: Deduplication key; while a job with this key is queued or running no new
+                 one is added, and a finished one is re-armed instead of duplicated
+            priority: Higher runs first
+            delay_seconds: Do not run before this many seconds from now
+            max_attempts: Attempts before the job is marked failed
+            rerun_after_seconds: A done job with the same key is only re-armed once it
+                                 finished at least this long ago (failed jobs always are)
+
+        Returns:
+            True if the job was queued, False if deduplicated against an existing one
+        """
+        now = _utcnow()
+        values = {
+            "kind": kind,
+            "job_key": key,
+            "payload": json.dumps(payload or {}),
+            "priority": priority,
+            "status": JOB_QUEUED,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": now + timedelta(seconds=delay_seconds),
+            "locked_until": None,
+            "locked_by": None,
+            "last_error": None,
+            "finished_at": None,
+        }
+
+        async def insert(session: AsyncSession) -> int:
+            if key is None:
+                session.add(Job(**values))
+                return 1
+            rerun_cutoff = now - timedelta(seconds=rerun_after_seconds)
+            result = await session.execute(insert_on_conflict(
+                session.get_bind().dialect.name,
+                Job,
+                [values],
+                index_elements=["job_key"],
+                update_columns=[column for column in values if column != "job_key"],
+                update_where=or_(
+                    Job.status == JOB_FAILED,
+                    and_(Job.status == JOB_DONE, Job.finished_at <= rerun_cutoff)
+                )
+            ))
+            return result.rowcount
+
+        queued = bool(await write_queue.submit(insert))
+        if queued and self._wakeup is not None:
+            self._wakeup.set()
+        return queued
+
+    async def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(select(Job.status, func.count()).group_by(Job.status))
+            return {status: count for status, count in rows}
+
+    def start(self) -> None:
+        """Start the worker coroutines on the running event loop"""
+        if self._tasks:
+            return
+        for module in JOB_HANDLER_MODULES:
+            importlib.import_module(module)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        logger.info(f"Started {self.workers} job worker(s) as {self.worker_id}")
+
+    async def stop(self) -> None:
+        """
+        Stop the workers; a job that was running stays claimed and is picked up again
+        once its visibility timeout expires
+        """
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def run_forever(self) -> None:
+        """Run workers until cancelled (standalone worker process)"""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Claiming a job failed: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            await self._execute(job)
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        """Take the next due job: queued and past run_at, or running with an expired visibility timeout"""
+        now = _utcnow()
+        due = or_(
+            and_(Job.status == JOB_QUEUED, Job.run_at <= now),
+            and_(Job.status == JOB_RUNNING, Job.locked_until <= now)
+        )
+
+        async def claim(session: AsyncSession) -> Optional[Dict[str, Any]]:
+            while True:
+                job = await session.scalar(
+                    select(Job)
+                    .filter(due)
+                    .order_by(Job.priority.desc(), Job.run_at.asc(), Job.id.asc())
+                    .limit(1)
+                )
+                if job is None:
+                    return None
+                if job.status == JOB_RUNNING and job.attempts >= job.max_attempts:
+                    # The expired lease was its last attempt (its worker died or hung)
+                    logger.error(f"Job {job.id} ({job.kind}) failed permanently: visibility timeout expired "
+                                 f"on attempt {job.attempts}")
+                    await session.execute(
+                        update(Job)
+                        .where(Job.id == job.id, due)
+                        .values(
+                            status=JOB_FAILED, finished_at=now, locked_until=None,
+                            last_error=f"Visibility timeout expired on attempt {job.attempts}"
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                    continue
+                claimed = {
+                    "id": job.id,
+                    "kind": job.kind,
+                    "payload": job.payload,
+                    "attempts": job.attempts + 1,
+                    "max_attempts": job.max_attempts,
+                }
+                # Conditional update: another worker (or process) may have claimed it meanwhile
+                result = await session.execute(
+                    update(Job)
+                    .where(Job.id == claimed["id"], due)
+                    .values(
+                        status=JOB_RUNNING,
+                        attempts=Job.attempts + 1,
+                        locked_until=now + timedelta(seconds=self.visibility_timeout),
+                        locked_by=self.worker_id
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                return claimed if result.rowcount == 1 else None
+
+        return await write_queue.submit(claim)
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        handler = _handlers.get(job["kind"])
+        if handler is None:
+            await self._mark_failed(job, f"No handler registered for job kind: {job['kind']}", retry=False)
+            return
+
+        try:
+            await handler(json.loads(job["payload"] or "{}"))
+        except Exception as e:
+            logger.warning(f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed: {e}")
+            await self._mark_failed(job, str(e), retry=job["attempts"] < job["max_attempts"])
+            return
+
+        await self._set(job, status=JOB_DONE, finished_at=_utcnow(), locked_until=None, last_error=None)
+
+    async def _mark_failed(self, job: Dict[str, Any], error: str, retry: bool) -> None:
+        if retry:
+            backoff = min(JOB_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1), JOB_RETRY_MAX_SECONDS)
+            await self._set(
+                job, status=JOB_QUEUED, run_at=_utcnow() + timedelta(seconds=backoff),
+                locked_until=None, last_error=error
+            )
+        else:
+            logger.error(f"Job {job['id']} ({job['kind']}) failed permanently: {error}")
+            await self._set(job, status=JOB_FAILED, finished_at=_utcnow(), locked_until=None, last_error=error)
+
+    async def _set(self, job: Dict[str, Any], **values) -> bool:
+        """
+        Record the outcome of a claimed job, unless its lease was lost: the job is only updated
+        while this worker still holds the claim it ran under (same locked_by and attempt), so a
+        worker whose visibility timeout expired cannot overwrite a newer claim's outcome
+        """
+        async def apply(session: AsyncSession) -> int:
+            result = await session.execute(
+                update(Job)
+                .where(
+                    Job.id == job["id"],
+                    Job.status == JOB_RUNNING,
+                    Job.locked_by == self.worker_id,
+                    Job.attempts == job["attempts"]
+                )
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            return result.rowcount
+
+        if await write_queue.submit(apply):
+            return True
+        logger.warning(f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} finished after its lease "
+                       f"was lost; outcome not recorded")
+        return False
+
+
+# Shared queue used by the API process and the standalone worker
+job_queue = JobQueue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="Worker coroutines")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    from app.db.init_db import init_db
+    init_db()
+
+    job_queue.workers = args.workers
+    try:
+        asyncio.run(job_queue.run_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    # Run via the imported module, whose registry the handler modules register into
+    from app.services import job_queue as job_queue_module
+    job_queue_module.main()
@@ -5,10 +5,11 @@ Uses historical data from database to predict future air quality
 import math
 from typing import List, Dict, Any, Optional
 from datetime import date, timedelta
-from sqlalchemy.orm import Session
-from app.services.weather_api import WeatherAPIService
-from app.models.nyc_climate import NYCClimateData
-from app.db.database import SessionLocal
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.nyc_climate import NYCClimateData, SOURCE_SEED
+from app.db.database import AsyncSessionLocal
+from app.services.history_backfill import schedule_history_backfill
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,14 +17,11 @@ logger = logging.getLogger(__name__)
 class PredictionService:
     """Service for predicting future climate and air quality based on historical data"""
     
-    def __init__(self):
-        self.weather_api_service = WeatherAPIService()
-    
-    def fetch_historical_data_from_db(
+    async def fetch_historical_data_from_db(
         self,
         zip_code: str,
         days: int = 30,
-        db: Optional[Session] = None
+        db: Optional[AsyncSession] = None
     ) -> List[Dict[str, Any]]:
         """
         Fetch historical data from database
@@ -34,11 +32,12 @@ class PredictionService:
             db: Database session (if None, creates new session)
         
         Returns:
-            List of historical data points from database
+            List of historical data points from database (seed rows are left out,
+            so predictions are not trained on generated values)
         """
         should_close_db = False
         if db is None:
-            db = SessionLocal()
+            db = AsyncSessionLocal()
             should_close_db = True
         
         try:
@@ -46,14 +45,16 @@ class PredictionService:
             start_date = today - timedelta(days=days)
             
             # Query database for historical data
-            records = db.query(NYCClimateData)\
+            records = await db.scalars(
+                select(NYCClimateData)
                 .filter(
                     NYCClimateData.zip_code == zip_code,
                     NYCClimateData.date >= start_date,
-                    NYCClimateData.date < today
-                )\
-                .order_by(NYCClimateData.date.asc())\
-                .all()
+                    NYCClimateData.date < today,
+                    or_(NYCClimateData.source.is_(None), NYCClimateData.source != SOURCE_SEED)
+                )
+                .order_by(NYCClimateData.date.asc())
+            )
             
             # Convert to dictionary format
             historical_data = []
@@ -82,11 +83,14 @@ class PredictionService:
             
         finally:
             if should_close_db:
-                db.close()
+                await db.close()
     
     async def fetch_historical_air_quality(self, zip_code: str, days: int = 30) -> List[Dict[str, Any]]:
         """
-        Fetch historical air quality data (from database, fallback to API if needed)
+        Fetch historical air quality data from the database
+        
+        When fewer than 7 days are stored, a background backfill is queued for the ZIP code
+        and whatever is stored is returned right away; the next request finds the history.
         
         Args:
             zip_code: ZIP code
@@ -95,41 +99,15 @@ class PredictionService:
         Returns:
             List of historical air quality data points
         """
-        # First, try to get from database
-        db_data = self.fetch_historical_data_from_db(zip_code, days)
+        db_data = await self.fetch_historical_data_from_db(zip_code, days)
         
         if len(db_data) >= 7:  # If we have at least 7 days of data, use it
             logger.info(f"Using {len(db_data)} records from database for prediction")
             return db_data
         
-        # Fallback: try to get from API (with rate limiting protection)
-        logger.warning(f"Insufficient database records ({len(db_data)}), attempting API fallback (limited to 7 days)")
-        import asyncio
-        historical_data = []
-        today = date.today()
-        
-        # Limit to 7 days to avoid API rate limiting
-        days_to_fetch = min(days, 7)
-        
-        for i in range(days_to_fetch):
-            target_date = today - timedelta(days=i)
-            try:
-                data = await self.weather_api_service.get_air_quality_data(zip_code, target_date)
-                if data:
-                    data['date'] = target_date
-                    historical_data.append(data)
-                
-                # Add small delay between requests to avoid rate limiting
-                if i < days_to_fetch - 1:
-                    await asyncio.sleep(0.5)
-            except Exception as e:
-                logger.warning(f"Failed to fetch historical data for {target_date}: {e}")
-                if "429" in str(e) or "rate limit" in str(e).lower():
-                    logger.warning(f"Rate limit detected, stopping historical data fetch")
-                    break
-                continue
-        
-        return db_data + historical_data  # Combine database and API data
+        logger.warning(f"Insufficient database records ({len(db_data)}) for {zip_code}, queueing history backfill")
+        schedule_history_backfill(zip_code)
+        return db_data
     
     def analyze_trend(self, historical_data: List[Dict[str, Any]], metric: str = 'aqi') -> float:
         """
@@ -212,7 +190,7 @@ class PredictionService:
         Returns:
             List of predicted air quality data
         """
-        # Fetch historical data (prefer database, fallback to API)
+        # Fetch historical data from the database (missing history is backfilled in the background)
         historical_data = await self.fetch_historical_air_quality(zip_code, days=30)
         
         # If we don't have enough historical data (less than 3 days), return empty
@@ -0,0 +1,173 @@
+"""
+Risk Broadcaster Service
+Shared in-process broadcaster that watches the stored climate row and today's travel
+recommendation per ZIP code and pushes a delta to every subscriber when either changes.
+Each subscribed ZIP is evaluated once per tick no matter how many clients follow it.
+"""
+import asyncio
+import logging
+import os
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set
+from sqlalchemy import and_, func, select
+from app.db.database import AsyncSessionLocal
+from app.models.nyc_climate import NYCClimateData
+from app.models.travel_recommendation import TravelRecommendation
+
+logger = logging.getLogger(__name__)
+
+# Seconds between evaluations; writes in this process wake the broadcaster immediately
+POLL_INTERVAL_SECONDS = float(os.getenv("RISK_STREAM_POLL_SECONDS", "5"))
+SUBSCRIBER_QUEUE_SIZE = 100
+
+_EXCLUDED_COLUMNS = {"created_at", "updated_at"}
+
+
+def _row_to_dict(row) -> Optional[Dict[str, Any]]:
+    """Convert a model row to a plain dictionary, leaving out timestamps"""
+    if row is None:
+        return None
+    return {
+        column.name: getattr(row, column.name)
+        for column in row.__table__.columns
+        if column.name not in _EXCLUDED_COLUMNS
+    }
+
+
+class RiskBroadcaster:
+    """Fan out climate/recommendation changes per ZIP code to SSE subscribers"""
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.poll_interval = poll_interval
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, zip_codes: Iterable[str]) -> asyncio.Queue:
+        """
+        Subscribe to changes for the given ZIP codes
+
+        The queue first receives a snapshot event for each ZIP whose state is already known;
+        ZIPs that are not known yet get theirs on the next evaluation.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        for zip_code in zip_codes:
+            self._subscribers.setdefault(zip_code, set()).add(queue)
+            snapshot = self._snapshots.get(zip_code)
+            if snapshot is not None:
+                self._put(queue, {"type": "snapshot", "zip_code": zip_code, **snapshot})
+        self._ensure_running()
+        self.notify()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, zip_codes: Iterable[str]) -> None:
+        """Remove a subscriber; ZIPs without subscribers stop being evaluated"""
+        for zip_code in zip_codes:
+            queues = self._subscribers.get(zip_code)
+            if not queues:
+                continue
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[zip_code]
+                self._snapshots.pop(zip_code, None)
+
+    def notify(self, zip_code: Optional[str] = None) -> None:
+        """Wake the broadcaster after a write so subscribers see the change without waiting for the next poll"""
+        if self._wakeup is not None and (zip_code is None or zip_code in self._subscribers):
+            self._wakeup.set()
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                await self._evaluate()
+            except Exception as e:
+                logger.error(f"Risk broadcaster evaluation failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _evaluate(self) -> None:
+        """Load the current state of every subscribed ZIP once and push deltas"""
+        zip_codes = list(self._subscribers)
+        if not zip_codes:
+            return
+        states = await self._load_states(zip_codes)
+
+        for zip_code in zip_codes:
+            queues = self._subscribers.get(zip_code)
+            if not queues:
+                continue
+            state = states.get(zip_code, {"climate": None, "recommendation": None})
+            previous = self._snapshots.get(zip_code)
+
+            if previous is None:
+                event = {"type": "snapshot", "zip_code": zip_code, **state}
+            else:
+                changed = {key: value for key, value in state.items() if previous.get(key) != value}
+                if not changed:
+                    continue
+                event = {"type": "delta", "zip_code": zip_code, **changed}
+
+            self._snapshots[zip_code] = state
+            for queue in list(queues):
+                self._put(queue, event)
+
+    async def _load_states(self, zip_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Read the latest climate row and today's recommendation for all ZIPs in two queries"""
+        async with AsyncSessionLocal() as db:
+            latest_dates = select(
+                NYCClimateData.zip_code,
+                func.max(NYCClimateData.date).label("latest_date")
+            )\
+                .filter(NYCClimateData.zip_code.in_(zip_codes))\
+                .group_by(NYCClimateData.zip_code)\
+                .subquery()
+
+            climate_rows = await db.scalars(
+                select(NYCClimateData)
+                .join(latest_dates, and_(
+                    NYCClimateData.zip_code == latest_dates.c.zip_code,
+                    NYCClimateData.date == latest_dates.c.latest_date
+                ))
+                .order_by(NYCClimateData.id.asc())
+            )
+
+            recommendation_rows = await db.scalars(
+                select(TravelRecommendation)
+                .filter(
+                    TravelRecommendation.zip_code.in_(zip_codes),
+                    TravelRecommendation.date == date.today()
+                )
+                .order_by(TravelRecommendation.id.asc())
+            )
+
+            states = {zip_code: {"climate": None, "recommendation": None} for zip_code in zip_codes}
+            for row in climate_rows:
+                states[row.zip_code]["climate"] = _row_to_dict(row)
+            for row in recommendation_rows:
+                if states[row.zip_code]["recommendation"] is None:
+                    states[row.zip_code]["recommendation"] = _row_to_dict(row)
+            return states
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        """Enqueue an event, dropping the oldest one for slow consumers"""
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+
+# Shared instance used by the stream endpoint and the write paths
+risk_broadcaster = RiskBroadcaster()
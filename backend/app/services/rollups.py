@@ -0,0 +1,470 @@
+"""
+Rollup Service
+Maintains day/week/month rollups (min/max/sum/count) of the climate and gas time series,
+so long-range chart queries read one row per bucket instead of every raw row.
+
+Write paths refresh the buckets they touch inside their own transaction, except bulk loads,
+which queue one refresh_rollups job for the series they wrote (enqueue_rollup_refresh); a
+full rebuild (compaction) recomputes everything from the raw tables. Rebuild from backend directory:
+    python -m app.services.rollups
+"""
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Date, Integer, cast, delete, exists, func, insert, literal, select, tuple_, union_all
+from sqlalchemy.orm import Session
+from app.models.gas_data import GasData
+from app.models.gas_dimension import GasRegion, GasType, GasUnit
+from app.models.nyc_climate import NYCClimateData
+from app.models.rollup import ClimateRollup, GasRollup, ROLLUP_BUCKETS
+from app.services.job_queue import job_handler, job_queue
+
+logger = logging.getLogger(__name__)
+
+# Climate columns that are rolled up (wind direction is left out: its mean is meaningless)
+CLIMATE_ROLLUP_METRICS = [
+    "aqi", "pm25", "pm10", "o3", "no2", "co",
+    "temperature", "humidity", "wind_speed", "pressure", "visibility", "uv_index",
+    "pollen_count", "asthma_index",
+]
+
+REBUILD_ROLLUPS_JOB = "rebuild_rollups"
+REFRESH_ROLLUPS_JOB = "refresh_rollups"
+# ZIP codes / gas series recomputed per write intent by the rebuild and refresh jobs, so API
+# writes run in between
+_ZIP_CODES_PER_WRITE = 20
+_SERIES_PER_WRITE = 50
+# Series per refresh statement (two bound parameters each)
+_SERIES_BATCH_SIZE = 500
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """First day of the bucket containing the date (weeks start on Monday)"""
+    if bucket == "day":
+        return day
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    if bucket == "year":
+        return day.replace(month=1, day=1)
+    raise ValueError(f"Unknown rollup bucket: {bucket}")
+
+
+def bucket_end(start: date, bucket: str) -> date:
+    """First day after the bucket starting at start"""
+    if bucket == "day":
+        return start + timedelta(days=1)
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    if bucket == "year":
+        return start.replace(year=start.year + 1)
+    raise ValueError(f"Unknown rollup bucket: {bucket}")
+
+
+def bucket_start_sql(dialect_name: str, bucket: str, column):
+    """SQL expression equal to bucket_start(column, bucket) for a DATE column"""
+    if bucket == "day":
+        return column
+    if dialect_name == "sqlite":
+        if bucket == "week":
+            # strftime('%w') is 0 on Sunday; step back to Monday
+            days_since_monday = (cast(func.strftime("%w", column), Integer) + 6) % 7
+            return func.date(column, func.printf("-%d days", days_since_monday))
+        if bucket == "month":
+            return func.strftime("%Y-%m-01", column)
+        if bucket == "year":
+            return func.strftime("%Y-01-01", column)
+    elif dialect_name == "postgresql":
+        if bucket in ("week", "month", "year"):
+            return cast(func.date_trunc(bucket, column), Date)
+    raise ValueError(f"Unknown rollup bucket {bucket} for dialect {dialect_name}")
+
+
+def widen_spans(spans: Dict[Any, List[date]], keys: Iterable[Tuple[Any, date]]) -> None:
+    """Widen each series' [first day, last day] span in spans to cover the (series, day) keys"""
+    for series, day in keys:
+        span = spans.setdefault(series, [day, day])
+        if day < span[0]:
+            span[0] = day
+        elif day > span[1]:
+            span[1] = day
+
+
+def _gas_named_rows(*columns):
+    """SELECT from gas_data joined to the gas type, region and unit names"""
+    return (
+        select(*columns)
+        .select_from(GasData)
+        .join(GasType, GasType.id == GasData.gas_type_id)
+        .join(GasRegion, GasRegion.id == GasData.region_id)
+        .join(GasUnit, GasUnit.id == GasData.unit_id)
+    )
+
+
+def _gas_series_ids(db: Session, series: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """(gas_type_id, region_id) of each (gas_type, region) that exists in the dimension tables"""
+    def ids_by_name(model, names: List[str]) -> Dict[str, int]:
+        ids = {}
+        for i in range(0, len(names), _SERIES_BATCH_SIZE):
+            result = db.execute(select(model.name, model.id).filter(model.name.in_(names[i:i + _SERIES_BATCH_SIZE])))
+            ids.update(dict(result.all()))
+        return ids
+
+    type_ids = ids_by_name(GasType, sorted({gas_type for gas_type, _ in series}))
+    region_ids = ids_by_name(GasRegion, sorted({region for _, region in series}))
+    return {
+        (gas_type, region): (type_ids[gas_type], region_ids[region])
+        for gas_type, region in series
+        if gas_type in type_ids and region in region_ids
+    }
+
+
+def _insert_gas_rollups(db: Session, bucket: str, *filters) -> None:
+    """
+    Aggregate the raw gas rows matching filters into rollups of one bucket size with one
+    INSERT ... SELECT ... GROUP BY
+    """
+    start = bucket_start_sql(db.get_bind().dialect.name, bucket, GasData.date)
+    db.execute(
+        insert(GasRollup).from_select(
+            ["bucket", "gas_type", "region", "bucket_start", "unit", "min", "max", "sum", "count"],
+            _gas_named_rows(
+                literal(bucket), GasType.name, GasRegion.name, start, func.max(GasUnit.name),
+                func.min(GasData.value), func.max(GasData.value), func.sum(GasData.value),
+                func.count(GasData.value)
+            )
+            .filter(*filters)
+            .group_by(GasType.name, GasRegion.name, start)
+        )
+    )
+
+
+def refresh_gas_rollups(db: Session, keys: Iterable[Tuple[str, str, date]]) -> None:
+    """
+    Recompute the gas rollup buckets containing the given (gas_type, region, date) keys
+
+    For each bucket size, series whose touched buckets span the same range are re-aggregated
+    together in the database with one INSERT ... SELECT ... GROUP BY, so a bulk load of many
+    series and days costs a few statements rather than a query per bucket.
+    Call from async code with: await session.run_sync(refresh_gas_rollups, keys)
+    """
+    days_by_series: Dict[Tuple[str, str], List[date]] = {}
+    widen_spans(days_by_series, (((gas_type, region), day) for gas_type, region, day in keys))
+    series_ids = _gas_series_ids(db, list(days_by_series))
+
+    for bucket in ROLLUP_BUCKETS:
+        # Buckets of one size tile the calendar, so every bucket starting in
+        # [range_start, range_end) lies wholly inside it
+        series_by_range: Dict[Tuple[date, date], List[Tuple[str, str]]] = defaultdict(list)
+        for series, (first_day, last_day) in days_by_series.items():
+            range_start = bucket_start(first_day, bucket)
+            range_end = bucket_end(bucket_start(last_day, bucket), bucket)
+            series_by_range[(range_start, range_end)].append(series)
+
+        for (range_start, range_end), all_series in series_by_range.items():
+            for i in range(0, len(all_series), _SERIES_BATCH_SIZE):
+                series = all_series[i:i + _SERIES_BATCH_SIZE]
+                db.execute(
+                    delete(GasRollup)
+                    .where(
+                        GasRollup.bucket == bucket,
+                        tuple_(GasRollup.gas_type, GasRollup.region).in_(series),
+                        GasRollup.bucket_start >= range_start,
+                        GasRollup.bucket_start < range_end
+                    )
+                )
+                _insert_gas_rollups(
+                    db, bucket,
+                    # By id, so the (gas_type_id, region_id, date) index narrows the scan
+                    tuple_(GasData.gas_type_id, GasData.region_id).in_(
+                        [series_ids[key] for key in series if key in series_ids]
+                    ),
+                    GasData.date >= range_start,
+                    GasData.date < range_end
+                )
+
+
+def _insert_climate_rollups(db: Session, bucket: str, *filters) -> None:
+    """
+    Aggregate the raw climate rows matching filters into rollups of one bucket size with one
+    INSERT ... SELECT that groups the rows once and unpivots the per-metric aggregates with a
+    UNION ALL
+    """
+    start = bucket_start_sql(db.get_bind().dialect.name, bucket, NYCClimateData.date).label("bucket_start")
+    aggregates = [start]
+    for metric in CLIMATE_ROLLUP_METRICS:
+        column = getattr(NYCClimateData, metric)
+        aggregates += [
+            func.min(column).label(f"{metric}_min"),
+            func.max(column).label(f"{metric}_max"),
+            func.sum(column).label(f"{metric}_sum"),
+            func.count(column).label(f"{metric}_count"),
+        ]
+    grouped = (
+        select(NYCClimateData.zip_code, *aggregates)
+        .filter(*filters)
+        .group_by(NYCClimateData.zip_code, start)
+        .cte("grouped")
+        .prefix_with("MATERIALIZED")
+    )
+    per_metric = [
+        select(
+            literal(bucket), grouped.c.zip_code, grouped.c.bucket_start, literal(metric),
+            grouped.c[f"{metric}_min"], grouped.c[f"{metric}_max"],
+            grouped.c[f"{metric}_sum"], grouped.c[f"{metric}_count"]
+        ).filter(grouped.c[f"{metric}_count"] > 0)
+        for metric in CLIMATE_ROLLUP_METRICS
+    ]
+    db.execute(
+        insert(ClimateRollup).from_select(
+            ["bucket", "zip_code", "bucket_start", "metric", "min", "max", "sum", "count"],
+            union_all(*per_metric)
+        )
+    )
+
+
+def refresh_climate_rollups(db: Session, keys: Iterable[Tuple[str, date]]) -> None:
+    """
+    Recompute the climate rollup buckets containing the given (zip_code, date) keys
+
+    For each bucket size, all touched ZIP codes are re-aggregated over the span of the
+    touched buckets with one INSERT ... SELECT (see _insert_climate_rollups).
+    Call from async code with: await session.run_sync(refresh_climate_rollups, keys)
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    zip_codes = sorted({zip_code for zip_code, _ in keys})
+    first_day = min(day for _, day in keys)
+    last_day = max(day for _, day in keys)
+
+    for bucket in ROLLUP_BUCKETS:
+        # Buckets of one size tile the calendar, so every bucket starting in
+        # [range_start, range_end) lies wholly inside it
+        range_start = bucket_start(first_day, bucket)
+        range_end = bucket_end(bucket_start(last_day, bucket), bucket)
+        db.execute(
+            delete(ClimateRollup)
+            .where(
+                ClimateRollup.bucket == bucket,
+                ClimateRollup.zip_code.in_(zip_codes),
+                ClimateRollup.bucket_start >= range_start,
+                ClimateRollup.bucket_start < range_end
+            )
+        )
+        _insert_climate_rollups(
+            db, bucket,
+            NYCClimateData.zip_code.in_(zip_codes),
+            NYCClimateData.date >= range_start,
+            NYCClimateData.date < range_end
+        )
+
+
+async def _refresh_spans_in_batches(spans: Dict[Any, List[date]], per_write: int, refresh, key, table_name: str) -> None:
+    """
+    Run refresh (refresh_gas_rollups or refresh_climate_rollups) on the first and last day of
+    each series' span, a few series per write intent. key(series, day) builds refresh's keys.
+    Each intent also bumps the table's data version, as the rollups changed after the rows did.
+    """
+    from app.db.write_queue import write_queue
+    from app.services.dimension_cache import bump_data_version
+
+    async def apply(session, keys) -> None:
+        await session.run_sync(refresh, keys)
+        await session.execute(bump_data_version(session.get_bind().dialect.name, table_name))
+
+    all_series = sorted(spans)
+    for i in range(0, len(all_series), per_write):
+        keys = [key(series, day) for series in all_series[i:i + per_write] for day in spans[series]]
+        await write_queue.submit(lambda session, keys=keys: apply(session, keys))
+
+
+async def refresh_gas_rollup_spans(spans: Dict[Tuple[str, str], List[date]]) -> None:
+    """
+    Refresh the gas rollups of (gas_type, region) series, given the [first day, last day] span
+    written to each (see widen_spans)
+    """
+    await _refresh_spans_in_batches(
+        spans, _SERIES_PER_WRITE, refresh_gas_rollups, lambda series, day: (*series, day), GasData.__tablename__
+    )
+
+
+async def refresh_climate_rollup_spans(spans: Dict[str, List[date]]) -> None:
+    """Refresh the climate rollups of ZIP codes, given the [first day, last day] span written to each"""
+    await _refresh_spans_in_batches(
+        spans, _ZIP_CODES_PER_WRITE, refresh_climate_rollups, lambda zip_code, day: (zip_code, day),
+        NYCClimateData.__tablename__
+    )
+
+
+async def enqueue_rollup_refresh(
+    gas: Optional[Dict[Tuple[str, str], List[date]]] = None,
+    climate: Optional[Dict[str, List[date]]] = None
+) -> bool:
+    """
+    Queue a refresh_rollups job for the series a bulk load wrote, given each series' span
+
+    Refreshing in every chunk's transaction cost about as much as the insert; as a job it runs
+    once per load, off the request. The job has no deduplication key: a load that finished while
+    an equal refresh was already running would otherwise be deduplicated against it and could
+    miss rows that refresh had already aggregated.
+
+    Returns:
+        True if a job was queued (False if the load wrote nothing)
+    """
+    if not gas and not climate:
+        return False
+    return await job_queue.enqueue(REFRESH_ROLLUPS_JOB, {
+        "gas": [[gas_type, region, first.isoformat(), last.isoformat()]
+                for (gas_type, region), (first, last) in sorted((gas or {}).items())],
+        "climate": [[zip_code, first.isoformat(), last.isoformat()]
+                    for zip_code, (first, last) in sorted((climate or {}).items())],
+    })
+
+
+@job_handler(REFRESH_ROLLUPS_JOB)
+async def refresh_rollups_job(payload: Dict[str, Any]) -> None:
+    """Refresh the rollups of the series in an enqueue_rollup_refresh payload, a few series per write intent"""
+    await refresh_gas_rollup_spans({
+        (gas_type, region): [date.fromisoformat(first), date.fromisoformat(last)]
+        for gas_type, region, first, last in payload.get("gas", [])
+    })
+    await refresh_climate_rollup_spans({
+        zip_code: [date.fromisoformat(first), date.fromisoformat(last)]
+        for zip_code, first, last in payload.get("climate", [])
+    })
+
+
+def rebuild_climate_rollups(db: Session, zip_codes: Optional[List[str]] = None) -> int:
+    """
+    Recompute the climate rollups of the given ZIP codes (every ZIP code if None) from the raw
+    rows; returns the number of rollup rows
+
+    Aggregation runs in the database (see _insert_climate_rollups), one statement per bucket
+    size, so memory does not grow with the table. ZIP codes without raw rows lose their rollups.
+    """
+    # Row counts are read back: drivers report -1 for an INSERT that starts with a CTE
+    if zip_codes is None:
+        db.execute(delete(ClimateRollup))
+        for bucket in ROLLUP_BUCKETS:
+            _insert_climate_rollups(db, bucket)
+        return db.scalar(select(func.count()).select_from(ClimateRollup))
+    db.execute(delete(ClimateRollup).where(ClimateRollup.zip_code.in_(zip_codes)))
+    for bucket in ROLLUP_BUCKETS:
+        _insert_climate_rollups(db, bucket, NYCClimateData.zip_code.in_(zip_codes))
+    return db.scalar(select(func.count()).select_from(ClimateRollup).filter(ClimateRollup.zip_code.in_(zip_codes)))
+
+
+def rebuild_gas_rollups(db: Session, series: Optional[List[Tuple[str, str]]] = None) -> int:
+    """
+    Recompute the gas rollups of the given (gas_type, region) series (every series if None)
+    from the raw rows; returns the number of rollup rows
+
+    Aggregation runs in the database (see _insert_gas_rollups), one statement per bucket size
+    and batch of series. Series without raw rows lose their rollups.
+    """
+    if series is None:
+        db.execute(delete(GasRollup))
+        for bucket in ROLLUP_BUCKETS:
+            _insert_gas_rollups(db, bucket)
+        return db.scalar(select(func.count()).select_from(GasRollup))
+    series_ids = _gas_series_ids(db, series)
+    written = 0
+    for i in range(0, len(series), _SERIES_BATCH_SIZE):
+        batch = series[i:i + _SERIES_BATCH_SIZE]
+        in_batch = tuple_(GasRollup.gas_type, GasRollup.region).in_(batch)
+        db.execute(delete(GasRollup).where(in_batch))
+        ids = [series_ids[key] for key in batch if key in series_ids]
+        if ids:
+            for bucket in ROLLUP_BUCKETS:
+                _insert_gas_rollups(db, bucket, tuple_(GasData.gas_type_id, GasData.region_id).in_(ids))
+            written += db.scalar(select(func.count()).select_from(GasRollup).filter(in_batch))
+    return written
+
+
+def delete_orphan_rollups(db: Session) -> None:
+    """Delete the rollups of ZIP codes and gas series that no longer have raw rows"""
+    db.execute(
+        delete(ClimateRollup)
+        .where(~exists().where(NYCClimateData.zip_code == ClimateRollup.zip_code))
+    )
+    db.execute(
+        delete(GasRollup)
+        .where(~_gas_named_rows(GasData.id).filter(
+            GasType.name == GasRollup.gas_type, GasRegion.name == GasRollup.region
+        ).exists())
+    )
+
+
+def rebuild_rollups(db: Session) -> Dict[str, int]:
+    """Recompute all rollups (compaction); the caller commits"""
+    return {
+        "climate": rebuild_climate_rollups(db),
+        "gas": rebuild_gas_rollups(db),
+    }
+
+
+def build_rollups_if_empty(db: Session) -> None:
+    """Build the rollups once for databases that have raw data but predate the rollup tables"""
+    def has_rows(model) -> bool:
+        # EXISTS stops at the first row; COUNT(*) would scan the whole table
+        return db.scalar(select(exists().select_from(model)))
+
+    climate_missing = not has_rows(ClimateRollup) and has_rows(NYCClimateData)
+    gas_missing = not has_rows(GasRollup) and has_rows(GasData)
+    if climate_missing:
+        logger.info(f"Built {rebuild_climate_rollups(db)} climate rollup rows")
+    if gas_missing:
+        logger.info(f"Built {rebuild_gas_rollups(db)} gas rollup rows")
+    db.commit()
+
+
+@job_handler(REBUILD_ROLLUPS_JOB)
+async def rebuild_rollups_job(payload: Dict[str, Any]) -> None:
+    """
+    Rebuild all rollups as a series of small write intents (a few ZIP codes or gas series
+    each) rather than one long transaction, so the single writer keeps serving API writes
+    in between; until it finishes, some series still show their previous rollups
+    """
+    from app.db.database import AsyncSessionLocal
+    from app.db.write_queue import write_queue
+
+    async with AsyncSessionLocal() as session:
+        zip_codes = (await session.scalars(
+            select(NYCClimateData.zip_code).distinct().order_by(NYCClimateData.zip_code)
+        )).all()
+        series = [tuple(row) for row in await session.execute(
+            _gas_named_rows(GasType.name, GasRegion.name).distinct().order_by(GasType.name, GasRegion.name)
+        )]
+
+    await write_queue.submit(lambda session: session.run_sync(delete_orphan_rollups))
+    counts = {"climate": 0, "gas": 0}
+    for i in range(0, len(zip_codes), _ZIP_CODES_PER_WRITE):
+        batch = list(zip_codes[i:i + _ZIP_CODES_PER_WRITE])
+        counts["climate"] += await write_queue.submit(
+            lambda session, batch=batch: session.run_sync(rebuild_climate_rollups, batch)
+        )
+    for i in range(0, len(series), _SERIES_PER_WRITE):
+        batch = series[i:i + _SERIES_PER_WRITE]
+        counts["gas"] += await write_queue.submit(
+            lambda session, batch=batch: session.run_sync(rebuild_gas_rollups, batch)
+        )
+    logger.info(f"Rebuilt rollups: {counts}")
+
+
+if __name__ == "__main__":
+    from app.db.database import SessionLocal
+    from app.db.init_db import init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        counts = rebuild_rollups(db)
+        db.commit()
+        print(f"Rebuilt rollups: {counts['climate']} climate rows, {counts['gas']} gas rows")
+    finally:
+        db.close()
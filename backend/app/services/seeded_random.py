@@ -0,0 +1,42 @@
+"""
+Seeded Random Service
+Derives score variation from a stable hash of (zip, date, model version) instead of
+process-global randomness, so identical inputs always produce identical outputs
+"""
+import hashlib
+import os
+import random
+from typing import Any
+
+# Bump whenever the scoring formulas change so cached results from an older model are not reused
+MODEL_VERSION = "1"
+
+# Deterministic mode is on by default; set DETERMINISTIC_SCORING=false to restore per-call noise
+DETERMINISTIC_SCORING = os.getenv("DETERMINISTIC_SCORING", "true").lower() not in ("0", "false", "no", "off")
+
+
+def stable_seed(*parts: Any) -> int:
+    """
+    Build a 64-bit seed from the model version and the given key parts
+
+    Args:
+        parts: Values identifying the computation (e.g. namespace, zip code, date)
+
+    Returns:
+        Integer seed that is stable across processes and Python versions
+    """
+    key = "|".join(str(part) for part in (MODEL_VERSION, *parts))
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def seeded_rng(*parts: Any) -> random.Random:
+    """
+    Get a random generator for the given key parts
+
+    In deterministic mode the generator is seeded from stable_seed(*parts);
+    otherwise it is an unseeded generator with the previous, non-repeatable behaviour.
+    """
+    if not DETERMINISTIC_SCORING:
+        return random.Random()
+    return random.Random(stable_seed(*parts))
@@ -0,0 +1,35 @@
+"""
+Single-flight helper.
+Collapses concurrent calls for the same key into one: the first caller starts the work,
+later callers for that key wait for the same result instead of repeating it. Used to
+stop parallel requests for the same ZIP code and day from each fetching upstream data.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Per-key in-process lock that shares the leader's result with waiting callers"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run work() for the key unless a call for it is already running, then return its result
+
+        The work runs in its own task, so a cancelled caller (e.g. a client disconnect)
+        does not cancel it for the callers still waiting.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
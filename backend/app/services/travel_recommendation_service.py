@@ -3,14 +3,14 @@ Travel Recommendation Service
 Generates travel recommendations using prediction service and personalized risk calculation
 """
 import math
-import random
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import date
 from app.services.climate_data_service import ClimateDataService
 from app.services.personalized_risk import PersonalizedRiskCalculator
 from app.models.user import User
 from app.db.seed_nyc_data import generate_climate_data
+from app.services.seeded_random import seeded_rng
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +49,48 @@ class TravelRecommendationService:
             use_prediction=use_prediction
         )
         
+        return self._build_recommendation(zip_code, target_date, day_offset, climate_data, user)
+    
+    async def generate_travel_recommendations(
+        self,
+        zip_code: str,
+        target_dates: List[date],
+        user: Optional[User] = None,
+        use_prediction: bool = True
+    ) -> List[dict]:
+        """
+        Generate travel recommendations for several dates of one ZIP code in a batch.
+        Climate data and predictions are fetched once for all dates.
+        
+        Args:
+            zip_code: ZIP code
+            target_dates: Target dates for recommendations
+            user: Optional user for personalization
+            use_prediction: Whether to use historical data-based prediction
+        
+        Returns:
+            List of travel recommendation dictionaries, in the order of target_dates
+        """
+        today = date.today()
+        climate_by_date = await self.climate_service.get_nyc_climate_data_for_dates(
+            zip_code,
+            target_dates,
+            use_prediction=use_prediction
+        )
+        return [
+            self._build_recommendation(zip_code, target_date, (target_date - today).days, climate_by_date[target_date], user)
+            for target_date in target_dates
+        ]
+    
+    def _build_recommendation(
+        self,
+        zip_code: str,
+        target_date: date,
+        day_offset: int,
+        climate_data: Dict[str, Any],
+        user: Optional[User] = None
+    ) -> dict:
+        """Build a travel recommendation dictionary from climate data"""
         # Calculate base risk score
         base_risk_score = self._calculate_base_risk_score(climate_data, day_offset, target_date)
         
@@ -99,9 +141,10 @@ class TravelRecommendationService:
         target_date: date
     ) -> float:
         """Calculate base risk score from climate data"""
-        # Generate more varied data
+        # Generate more varied data (noise is seeded from zip/date so scores are repeatable)
+        rng = seeded_rng("base_risk_score", climate_data.get('zip_code'), target_date)
         base_variation = math.sin(day_offset * 0.8) * 15 + math.cos(day_offset * 1.2) * 10
-        random_variation = (random.random() - 0.5) * 25
+        random_variation = (rng.random() - 0.5) * 25
         day_of_week = target_date.weekday()
         weekend_effect = -5 if day_of_week >= 5 else 3
         
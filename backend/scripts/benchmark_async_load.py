@@ -0,0 +1,160 @@
+"""
+Load benchmark: concurrent-request scaling of DB-bound endpoints.
+Starts the API under uvicorn against a scratch SQLite database, fills gas_data, then
+fires requests at increasing concurrency and reports throughput and latency, plus the
+latency of /health probes sent meanwhile (shows whether DB work blocks the event loop).
+
+Usage (from backend directory):
+    python scripts/benchmark_async_load.py --requests 400 --concurrency 1 8 32 64
+    python scripts/benchmark_async_load.py --app-dir /path/to/other/checkout/backend   # compare another version
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+ENDPOINTS = [
+    "/api/data/gas?gas_type=CO2&limit=200",
+    "/api/data/gas?region=USA&limit=200",
+    "/api/nyc/climate/?limit=100",
+    "/api/hospitals/",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def fill_gas_data(db_path: str, rows: int):
+    """Insert synthetic gas rows directly so the benchmark works against any schema version"""
+    gas_types = ['CO2', 'CH4', 'N2O', 'SF6']
+    regions = ['USA', 'China', 'India', 'EU', 'Brazil', 'Japan', 'Canada', 'Mexico']
+    per_day = len(gas_types) * len(regions)
+    conn = sqlite3.connect(db_path)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(gas_data)")}
+    if "gas_type_id" in columns:
+        # Schema version 4+: names live in the gas dimension tables (ids 1..n in list order)
+        for table, names in (("gas_types", gas_types), ("gas_regions", regions), ("gas_units", ["ppm"])):
+            conn.executemany(f"INSERT OR IGNORE INTO {table} (id, name) VALUES (?, ?)", enumerate(names, 1))
+        sql = ("INSERT INTO gas_data (gas_type_id, region_id, date, value, unit_id) "
+               "VALUES (?, ?, date('1950-01-01', ?), ?, 1)")
+        gas_types = range(1, len(gas_types) + 1)
+        regions = range(1, len(regions) + 1)
+    else:
+        sql = "INSERT INTO gas_data (gas_type, region, date, value, unit) VALUES (?, ?, date('1950-01-01', ?), ?, 'ppm')"
+    conn.executemany(
+        sql,
+        (
+            (gas_types[i % len(gas_types)], regions[(i // len(gas_types)) % len(regions)],
+             f"+{i // per_day} days", 300 + (i % 1000) / 10)
+            for i in range(rows)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+
+async def run_level(base_url: str, concurrency: int, total: int) -> dict:
+    latencies = []
+    probe_latencies = []
+    done = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def one(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(ENDPOINTS[i % len(ENDPOINTS)])
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        async def probe():
+            async with httpx.AsyncClient(base_url=base_url, timeout=60) as probe_client:
+                while not done.is_set():
+                    started = time.perf_counter()
+                    await probe_client.get("/health")
+                    probe_latencies.append(time.perf_counter() - started)
+                    await asyncio.sleep(0.05)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    latencies.sort()
+    probe_latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "health_p95_ms": probe_latencies[max(int(len(probe_latencies) * 0.95) - 1, 0)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app-dir", default=BACKEND_DIR, help="Backend directory containing the app package")
+    parser.add_argument("--requests", type=int, default=400, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--gas-rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.path.abspath(args.app_dir),
+            "DATABASE_URL": "sqlite:///./earthbreath.db",
+            "OPENWEATHER_API_KEY": "",
+            "AIRNOW_API_KEY": "",
+        }
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            for _ in range(300):
+                try:
+                    if httpx.get(f"{base_url}/health").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    time.sleep(0.1)
+            else:
+                raise RuntimeError("Server did not start")
+
+            fill_gas_data(os.path.join(tmp, "earthbreath.db"), args.gas_rows)
+
+            print("=" * 70)
+            print(f"Load benchmark: {args.app_dir}")
+            print(f"{args.requests} requests per level over {len(ENDPOINTS)} DB-bound endpoints, {args.gas_rows} gas rows")
+            print("=" * 70)
+            print(f"{'concurrency':>12} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'/health p95 ms':>15}")
+            asyncio.run(run_level(base_url, 4, 40))  # warm-up
+            for concurrency in args.concurrency:
+                r = asyncio.run(run_level(base_url, concurrency, args.requests))
+                print(f"{r['concurrency']:>12} {r['rps']:>10.1f} {r['p50_ms']:>10.1f} {r['p95_ms']:>10.1f} "
+                      f"{r['health_p95_ms']:>15.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Benchmark gas_data storage with gas type, region, unit and source as strings on every row
+(schema version 3) against ids into the gas dimension tables (schema version 4).
+
+Loads the same synthetic dataset into both layouts, then reports load throughput, database
+size, the latency of the API's gas queries (as the app issues them) and the time taken by
+migration 4 to convert the string layout in place.
+
+Usage (from backend directory):
+    python scripts/benchmark_gas_dimensions.py --rows 10000000
+    python scripts/benchmark_gas_dimensions.py --rows 1000000 --skip-migration
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, exists, func, select
+from app.db.database import Base
+from app.db.filters import dimension_id, gas_data_filters
+from app.db.migrations import _gas_dimensions
+from app.models.gas_data import GasData
+from app.models.gas_dimension import GAS_DIMENSIONS, GasRegion, GasType
+
+GAS_UNITS = {'CO2': 'ppm', 'CH4': 'ppb', 'N2O': 'ppb', 'SF6': 'ppt'}
+COUNTRIES = [
+    'United States of America', 'China', 'India', 'European Union', 'Russian Federation', 'Japan',
+    'Brazil', 'Indonesia', 'Canada', 'Mexico', 'Islamic Republic of Iran', 'Saudi Arabia',
+    'Republic of Korea', 'Australia', 'South Africa', 'Turkey', 'United Kingdom', 'Argentina',
+    'Democratic Republic of the Congo', 'Kazakhstan', 'Global', 'Mauna Loa, Hawaii', 'Arctic',
+]
+SOURCES = ['NOAA GML', 'EDGAR v8.0']
+START_DATE = date(1950, 1, 1)
+
+# Schema version 3 gas_data, as created by create_all and migrations 1-3
+LEGACY_SCHEMA = """
+CREATE TABLE gas_data (
+    id INTEGER NOT NULL PRIMARY KEY,
+    gas_type VARCHAR NOT NULL,
+    region VARCHAR NOT NULL,
+    date DATE NOT NULL,
+    value FLOAT NOT NULL,
+    unit VARCHAR NOT NULL,
+    source VARCHAR,
+    notes VARCHAR,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    updated_at DATETIME
+);
+CREATE INDEX ix_gas_data_id ON gas_data (id);
+CREATE INDEX ix_gas_data_region ON gas_data (region);
+CREATE UNIQUE INDEX uq_gas_data_series_date ON gas_data (gas_type, region, date);
+CREATE INDEX ix_gas_data_series_date_value ON gas_data (gas_type, region, date, value);
+CREATE INDEX ix_gas_data_date_id ON gas_data (date, id);
+CREATE INDEX ix_gas_data_type_date_id ON gas_data (gas_type, date, id);
+"""
+
+
+def region_names(count: int):
+    return [
+        COUNTRIES[i % len(COUNTRIES)] + (f" {i // len(COUNTRIES)}" if i >= len(COUNTRIES) else "")
+        for i in range(count)
+    ]
+
+
+def synthetic_rows(rows: int, regions: int):
+    """(gas_type, region, date, value, unit, source) of daily series of every gas type and region"""
+    gas_types = list(GAS_UNITS)
+    names = region_names(regions)
+    series = [(gas_type, region) for gas_type in gas_types for region in names]
+    for i in range(rows):
+        gas_type, region = series[i % len(series)]
+        day = i // len(series)
+        yield (
+            gas_type, region, (START_DATE + timedelta(days=day)).isoformat(), 300 + (i % 1000) / 10,
+            GAS_UNITS[gas_type], SOURCES[i % len(SOURCES)]
+        )
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-65536")
+    return conn
+
+
+def load(conn: sqlite3.Connection, sql: str, rows, batch_rows: int) -> float:
+    """Insert the rows in transactions of batch_rows; returns rows per second"""
+    started = time.perf_counter()
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_rows:
+            _insert_batch(conn, sql, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        _insert_batch(conn, sql, batch)
+        count += len(batch)
+    return count / (time.perf_counter() - started)
+
+
+def _insert_batch(conn: sqlite3.Connection, sql: str, batch) -> None:
+    conn.execute("BEGIN")
+    conn.executemany(sql, batch)
+    conn.execute("COMMIT")
+
+
+def build_legacy(path: str, rows: int, regions: int, batch_rows: int) -> float:
+    conn = connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    rate = load(
+        conn,
+        "INSERT INTO gas_data (gas_type, region, date, value, unit, source) VALUES (?, ?, ?, ?, ?, ?)",
+        synthetic_rows(rows, regions),
+        batch_rows
+    )
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return rate
+
+
+def build_normalized(path: str, rows: int, regions: int, batch_rows: int) -> float:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(
+        bind=engine, tables=[GasData.__table__] + [dimension.__table__ for dimension in GAS_DIMENSIONS.values()]
+    )
+    engine.dispose()
+
+    conn = connect(path)
+    # Names are mapped to ids in memory, as the ingest path does once per chunk
+    ids = {}
+    for attribute, names in (("gas_type", list(GAS_UNITS)), ("region", region_names(regions)),
+                             ("unit", sorted(set(GAS_UNITS.values()))), ("source", SOURCES)):
+        table = GAS_DIMENSIONS[attribute].__tablename__
+        conn.executemany(f"INSERT INTO {table} (id, name) VALUES (?, ?)", enumerate(names, 1))
+        ids[attribute] = {name: i for i, name in enumerate(names, 1)}
+    encoded = (
+        (ids["gas_type"][gas_type], ids["region"][region], day, value, ids["unit"][unit], ids["source"][source])
+        for gas_type, region, day, value, unit, source in synthetic_rows(rows, regions)
+    )
+    rate = load(
+        conn,
+        "INSERT INTO gas_data (gas_type_id, region_id, date, value, unit_id, source_id) VALUES (?, ?, ?, ?, ?, ?)",
+        encoded,
+        batch_rows
+    )
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return rate
+
+
+def object_sizes(conn: sqlite3.Connection) -> dict:
+    """Bytes per table and index (needs the dbstat virtual table; empty without it)"""
+    try:
+        return dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC"))
+    except sqlite3.OperationalError:
+        return {}
+
+
+def compile_sqlite(query) -> str:
+    return str(query.compile(create_engine("sqlite://"), compile_kwargs={"literal_binds": True}))
+
+
+def normalized_queries(gas_type: str, region: str) -> dict:
+    """SQL of the app's gas queries for the dimension layout"""
+    latest = select(GasData).order_by(GasData.date.desc(), GasData.id.desc()).limit(101)
+    return {
+        "series page": compile_sqlite(latest.filter(*gas_data_filters(gas_type, region))),
+        "gas type page": compile_sqlite(latest.filter(*gas_data_filters(gas_type))),
+        "region page": compile_sqlite(latest.filter(*gas_data_filters(None, region))),
+        "gas types list": compile_sqlite(
+            select(GasType.name).filter(exists().where(GasData.gas_type_id == GasType.id)).order_by(GasType.name)
+        ),
+        "regions list": compile_sqlite(
+            select(GasRegion.name).filter(exists().where(GasData.region_id == GasRegion.id)).order_by(GasRegion.name)
+        ),
+        "regions of gas type": compile_sqlite(
+            select(GasRegion.name).filter(
+                exists().where(GasData.region_id == GasRegion.id,
+                               GasData.gas_type_id == dimension_id(GasType, gas_type))
+            ).order_by(GasRegion.name)
+        ),
+        "gas type mean": compile_sqlite(select(func.avg(GasData.value)).filter(*gas_data_filters(gas_type))),
+    }
+
+
+def legacy_queries(gas_type: str, region: str) -> dict:
+    """SQL of the same queries as schema version 3 issued them"""
+    columns = "id, gas_type, region, date, value, unit, source, notes, created_at, updated_at"
+    latest = "ORDER BY date DESC, id DESC LIMIT 101"
+    return {
+        "series page": f"SELECT {columns} FROM gas_data WHERE gas_type = '{gas_type}' AND region = '{region}' {latest}",
+        "gas type page": f"SELECT {columns} FROM gas_data WHERE gas_type = '{gas_type}' {latest}",
+        "region page": f"SELECT {columns} FROM gas_data WHERE region = '{region}' {latest}",
+        "gas types list": "SELECT DISTINCT gas_type FROM gas_data ORDER BY gas_type",
+        "regions list": "SELECT DISTINCT region FROM gas_data ORDER BY region",
+        "regions of gas type": f"SELECT DISTINCT region FROM gas_data WHERE gas_type = '{gas_type}' ORDER BY region",
+        "gas type mean": f"SELECT avg(value) FROM gas_data WHERE gas_type = '{gas_type}'",
+    }
+
+
+def time_queries(path: str, queries: dict, repeat: int) -> dict:
+    """Best-of-repeat milliseconds per query, after one warm-up run"""
+    conn = connect(path)
+    timings = {}
+    for name, sql in queries.items():
+        conn.execute(sql).fetchall()
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(sql).fetchall()
+            best = min(best, time.perf_counter() - started)
+        timings[name] = best * 1000
+    conn.close()
+    return timings
+
+
+def migrate(path: str) -> float:
+    """Run migration 4 on a schema version 3 database, then VACUUM; returns seconds"""
+    engine = create_engine(f"sqlite:///{path}")
+    started = time.perf_counter()
+    Base.metadata.create_all(bind=engine, tables=[dimension.__table__ for dimension in GAS_DIMENSIONS.values()])
+    with engine.begin() as conn:
+        _gas_dimensions(conn)
+    engine.dispose()
+    conn = connect(path)
+    conn.execute("VACUUM")
+    conn.close()
+    return time.perf_counter() - started
+
+
+def mib(size: float) -> str:
+    return f"{size / 1024 / 1024:10.1f} MiB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--regions", type=int, default=250, help="Regions per gas type (4 gas types)")
+    parser.add_argument("--batch-rows", type=int, default=100_000, help="Rows per insert transaction")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query (best is reported)")
+    parser.add_argument("--skip-migration", action="store_true", help="Do not time migration 4")
+    parser.add_argument("--dir", help="Directory for the databases (default: a temporary one, removed afterwards)")
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print(f"gas_data layout benchmark: {args.rows:,} rows, {4 * args.regions:,} series")
+    print("=" * 78)
+
+    tmp = None if args.dir else tempfile.mkdtemp()
+    directory = args.dir or tmp
+    try:
+        legacy_path = os.path.join(directory, "gas_strings.db")
+        normalized_path = os.path.join(directory, "gas_dimensions.db")
+        for path in (legacy_path, normalized_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+        layouts = {
+            "strings": (legacy_path, build_legacy(legacy_path, args.rows, args.regions, args.batch_rows)),
+            "dimensions": (normalized_path, build_normalized(normalized_path, args.rows, args.regions, args.batch_rows)),
+        }
+        region = region_names(args.regions)[0]
+        queries = {"strings": legacy_queries("CO2", region), "dimensions": normalized_queries("CO2", region)}
+
+        print(f"\n{'':<24}{'strings':>16}{'dimensions':>16}")
+        sizes = {name: os.path.getsize(path) for name, (path, _) in layouts.items()}
+        print(f"{'load rows/s':<24}{layouts['strings'][1]:>16,.0f}{layouts['dimensions'][1]:>16,.0f}")
+        print(f"{'database size':<24}{mib(sizes['strings']):>16}{mib(sizes['dimensions']):>16}")
+        print(f"{'bytes per row':<24}{sizes['strings'] / args.rows:>16.1f}{sizes['dimensions'] / args.rows:>16.1f}")
+
+        objects = {}
+        for name, (path, _) in layouts.items():
+            conn = connect(path)
+            objects[name] = object_sizes(conn)
+            conn.close()
+        if objects["strings"]:
+            print("\nLargest objects:")
+            for name, (path, _) in layouts.items():
+                for obj, size in list(objects[name].items())[:6]:
+                    print(f"  {name:<12}{obj:<34}{mib(size)}")
+
+        timings = {name: time_queries(path, queries[name], args.repeat) for name, (path, _) in layouts.items()}
+        print(f"\n{'query (best ms)':<24}{'strings':>16}{'dimensions':>16}{'speed-up':>12}")
+        for query in queries["strings"]:
+            before, after = timings["strings"][query], timings["dimensions"][query]
+            print(f"{query:<24}{before:>16.2f}{after:>16.2f}{before / after if after else float('inf'):>11.1f}x")
+
+        if not args.skip_migration:
+            migrated_path = os.path.join(directory, "gas_migrated.db")
+            shutil.copyfile(legacy_path, migrated_path)
+            seconds = migrate(migrated_path)
+            conn = connect(migrated_path)
+            migrated_rows = conn.execute("SELECT COUNT(*) FROM gas_data").fetchone()[0]
+            conn.close()
+            print(f"\nMigration 4 + VACUUM: {seconds:.1f}s ({args.rows / seconds:,.0f} rows/s), "
+                  f"{migrated_rows:,} rows, {mib(os.path.getsize(migrated_path)).strip()}")
+            os.remove(migrated_path)
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
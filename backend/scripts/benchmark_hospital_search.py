@@ -0,0 +1,166 @@
+"""
+Benchmark nearest-hospital search (app.services.hospital_index) against ranking every
+hospital per query, and check both give the same results.
+Generates random hospitals around New York City (dense) or across the contiguous US (sparse)
+into a scratch database, loads the index, then times nearest-N, within-radius and filtered
+queries, an incremental refresh after an insert, and a full scan that reads all hospitals
+from the database and ranks them (what a client without the endpoint has to do).
+Exits non-zero if any indexed result differs from the full ranking.
+
+Usage (from backend directory):
+    python scripts/benchmark_hospital_search.py --hospitals 50000 --queries 2000 --spread us
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+SPREADS = {
+    # (south, north, west, east)
+    "nyc": (40.45, 40.95, -74.30, -73.65),
+    "us": (25.0, 49.0, -124.5, -67.0),
+}
+SPECIALTIES = ["Pulmonology", "Asthma & Allergy", "Emergency Care", "Pediatrics", "General"]
+
+
+def timed(fn, queries):
+    """Per-query times in microseconds and the results"""
+    times, results = [], []
+    for q in queries:
+        started = time.perf_counter()
+        results.append(fn(*q))
+        times.append((time.perf_counter() - started) * 1e6)
+    return times, results
+
+
+def summary(times) -> str:
+    times = sorted(times)
+    return f"p50 {statistics.median(times):8.1f} us  p95 {times[int(len(times) * 0.95)]:8.1f} us"
+
+
+async def run(hospitals: int, queries: int, spread: str, cell_degrees: float) -> int:
+    from sqlalchemy import insert, select
+    from app.db.database import Base, create_async_db_engine
+    from app.models.data_version import DataVersion
+    from app.models.hospital import Hospital
+    from app.services.dimension_cache import bump_data_version
+    from app.services.hospital_index import HospitalIndex, haversine_km, has_emergency_department
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    south, north, west, east = SPREADS[spread]
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(south, north, hospitals)
+    lons = rng.uniform(west, east, hospitals)
+    rows = [
+        {
+            "name": f"Hospital {i}", "borough": "Synthetic", "latitude": float(lats[i]), "longitude": float(lons[i]),
+            "address": f"{i} Main St", "specialty": SPECIALTIES[i % len(SPECIALTIES)],
+            "emergency_department": "Yes" if i % 3 else "No",
+        }
+        for i in range(hospitals)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_db_engine(f"sqlite:///{os.path.join(tmp, 'hospitals.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[Hospital.__table__, DataVersion.__table__])
+            await conn.execute(insert(Hospital.__table__), rows)
+            await conn.execute(bump_data_version("sqlite", Hospital.__tablename__))
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+
+        index = HospitalIndex(cell_degrees)
+        async with Session() as db:
+            started = time.perf_counter()
+            await index.refresh(db)
+            print(f"Index load: {len(index)} hospitals in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+            # Brute force: rank every hospital per query
+            lat_rad, lon_rad = np.radians(lats), np.radians(lons)
+            emergency = np.array([has_emergency_department(r["emergency_department"]) for r in rows])
+            specialty = np.array([r["specialty"].lower() for r in rows])
+            ids = np.arange(1, hospitals + 1)
+
+            def full_ranking(latitude, longitude, limit, radius_km, specialty_text, emergency_only):
+                d = haversine_km(np.radians(latitude), np.radians(longitude), lat_rad, lon_rad)
+                mask = np.ones(hospitals, dtype=bool)
+                if radius_km is not None:
+                    mask &= d <= radius_km
+                if emergency_only is not None:
+                    mask &= emergency == emergency_only
+                if specialty_text:
+                    mask &= np.char.find(specialty, specialty_text.lower()) >= 0
+                positions = np.flatnonzero(mask)
+                order = np.lexsort((ids[positions], d[positions]))[:limit]
+                return [(int(ids[positions[i]]), round(float(d[positions[i]]), 6)) for i in order]
+
+            def indexed(*q):
+                return [(h["id"], round(distance, 6)) for h, distance in index.search(*q)]
+
+            points = list(zip(rng.uniform(south, north, queries), rng.uniform(west, east, queries)))
+            radius = 2.0 if spread == "nyc" else 50.0
+            workloads = {
+                "nearest 10": [(lat, lon, 10, None, None, None) for lat, lon in points],
+                f"within {radius:g} km (<=100)": [(lat, lon, 100, radius, None, None) for lat, lon in points],
+                "nearest 5, pulmonology + ED": [(lat, lon, 5, None, "pulmo", True) for lat, lon in points],
+            }
+            mismatches = 0
+            for name, workload in workloads.items():
+                index_times, index_results = timed(indexed, workload)
+                scan_times, scan_results = timed(full_ranking, workload)
+                bad = sum(a != b for a, b in zip(index_results, scan_results))
+                mismatches += bad
+                print(f"{name:>30}: index {summary(index_times)} | rank all {summary(scan_times)}"
+                      f"{f'  {bad} MISMATCHES' if bad else ''}")
+
+            # Client-side alternative: read every hospital, then rank
+            started = time.perf_counter()
+            all_rows = (await db.execute(select(Hospital))).scalars().all()
+            full_ranking(points[0][0], points[0][1], 10, None, None, None)
+            print(f"{'read all + rank (one query)':>30}: {(time.perf_counter() - started) * 1000:.1f} ms "
+                  f"for {len(all_rows)} rows")
+
+        # Incremental refresh after one insert
+        async with Session() as db:
+            await db.execute(insert(Hospital.__table__), [dict(rows[0], name="New Hospital", latitude=south, longitude=west)])
+            await db.execute(bump_data_version("sqlite", Hospital.__tablename__))
+            await db.commit()
+        async with Session() as db:
+            started = time.perf_counter()
+            await index.refresh(db)
+            refreshed = (time.perf_counter() - started) * 1000
+        nearest = index.search(south, west, 1)[0][0]["name"]
+        print(f"\nRefresh after 1 insert: {refreshed:.2f} ms, {len(index)} hospitals, nearest to it: {nearest}")
+        if nearest != "New Hospital":
+            mismatches += 1
+        await engine.dispose()
+
+    print("\nOK" if not mismatches else f"\nFAILED: {mismatches} mismatching queries")
+    return 1 if mismatches else 0
+
+
+def main():
+    from app.services.hospital_index import HOSPITAL_INDEX_CELL_DEGREES
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hospitals", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--spread", choices=list(SPREADS), default="nyc")
+    parser.add_argument("--cell-degrees", type=float, default=HOSPITAL_INDEX_CELL_DEGREES)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"Hospital search benchmark: {args.hospitals} hospitals ({args.spread}), {args.queries} queries per workload")
+    print("=" * 70)
+    sys.exit(asyncio.run(run(args.hospitals, args.queries, args.spread, args.cell_degrees)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark concurrent SQLite read/write throughput with and without the tuning profile
+(WAL, synchronous=NORMAL, mmap, cache size, busy timeout) from app/db/database.py.
+
+Usage (from backend directory):
+    python scripts/benchmark_sqlite_tuning.py --readers 8 --writers 4 --seconds 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base, create_db_engine
+from app.models.gas_data import GasData
+from app.models.gas_dimension import GAS_DIMENSIONS, GasRegion, GasType, GasUnit
+
+GAS_TYPES = ['CO2', 'CH4', 'N2O', 'SF6']
+REGIONS = ['USA', 'China', 'India', 'EU', 'Brazil']
+# Writers insert series of their own gas type, BENCH<worker>, after the real ones
+MAX_WRITERS = 64
+
+
+def seed(Session, rows: int):
+    """Pre-fill the table so readers have something to scan"""
+    db = Session()
+    try:
+        # Dimension ids are 1..n in list order
+        gas_types = GAS_TYPES + [f"BENCH{worker}" for worker in range(MAX_WRITERS)]
+        db.bulk_insert_mappings(GasType, [{"id": i, "name": name} for i, name in enumerate(gas_types, 1)])
+        db.bulk_insert_mappings(GasRegion, [{"id": i, "name": name} for i, name in enumerate(REGIONS, 1)])
+        db.bulk_insert_mappings(GasUnit, [{"id": 1, "name": "ppm"}])
+        start = date(2000, 1, 1)
+        db.bulk_insert_mappings(GasData, [
+            {
+                "gas_type_id": i % len(GAS_TYPES) + 1,
+                "region_id": (i // len(GAS_TYPES)) % len(REGIONS) + 1,
+                "date": start + timedelta(days=i // (len(GAS_TYPES) * len(REGIONS))),
+                "value": 400 + (i % 100) / 10,
+                "unit_id": 1,
+            }
+            for i in range(rows)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_profile(name: str, tuned: bool, readers: int, writers: int, seconds: float, seed_rows: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", sqlite_tuning=tuned)
+        Base.metadata.create_all(
+            bind=engine, tables=[GasData.__table__] + [dimension.__table__ for dimension in GAS_DIMENSIONS.values()]
+        )
+        Session = sessionmaker(bind=engine)
+        seed(Session, seed_rows)
+
+        stop = threading.Event()
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def reader(worker: int):
+            db = Session()
+            n = 0
+            try:
+                while not stop.is_set():
+                    gas_type_id = n % len(GAS_TYPES) + 1
+                    db.query(GasData)\
+                        .filter(GasData.gas_type_id == gas_type_id, GasData.region_id == 1)\
+                        .order_by(GasData.date.desc())\
+                        .limit(100)\
+                        .all()
+                    db.rollback()
+                    n += 1
+            finally:
+                db.close()
+                with lock:
+                    counts["reads"] += n
+
+        def writer(worker: int):
+            db = Session()
+            n = errors = 0
+            day = date(3000, 1, 1)
+            try:
+                while not stop.is_set():
+                    db.add(GasData(
+                        gas_type_id=len(GAS_TYPES) + worker + 1,  # BENCH<worker>
+                        region_id=1,  # USA
+                        date=day + timedelta(days=n),
+                        value=1.0,
+                        unit_id=1  # ppm
+                    ))
+                    try:
+                        db.commit()
+                        n += 1
+                    except OperationalError:
+                        db.rollback()
+                        errors += 1
+            finally:
+                db.close()
+                with lock:
+                    counts["writes"] += n
+                    counts["errors"] += errors
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    return {
+        "profile": name,
+        "reads_per_s": counts["reads"] / elapsed,
+        "writes_per_s": counts["writes"] / elapsed,
+        "lock_errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed-rows", type=int, default=50000)
+    args = parser.parse_args()
+    if args.writers > MAX_WRITERS:
+        parser.error(f"--writers must be at most {MAX_WRITERS}")
+
+    print("=" * 70)
+    print(f"SQLite tuning benchmark: {args.readers} readers, {args.writers} writers, {args.seconds}s per profile")
+    print("=" * 70)
+
+    results = [
+        run_profile("default", False, args.readers, args.writers, args.seconds, args.seed_rows),
+        run_profile("tuned", True, args.readers, args.writers, args.seconds, args.seed_rows),
+    ]
+    for r in results:
+        print(f"{r['profile']:>8}: {r['reads_per_s']:10.1f} reads/s  {r['writes_per_s']:10.1f} writes/s  "
+              f"{r['lock_errors']} lock errors")
+
+    base, tuned = results
+    if base["reads_per_s"] and base["writes_per_s"]:
+        print(f"\nSpeed-up: reads x{tuned['reads_per_s'] / base['reads_per_s']:.2f}, "
+              f"writes x{tuned['writes_per_s'] / base['writes_per_s']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
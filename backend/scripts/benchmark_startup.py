@@ -0,0 +1,114 @@
+"""
+Benchmark API startup database preparation (app.db.startup.prepare_database) and check it is
+safe with several workers starting at once.
+Against a scratch SQLite database, times one cold start (empty database), warm starts (marker
+current), and a round of concurrent worker processes on a fresh database. Each start runs in a
+new process, as under uvicorn/gunicorn workers. Exits non-zero unless every worker succeeded
+and the seed tables hold exactly one copy of the seed data.
+
+Usage (from backend directory):
+    python scripts/benchmark_startup.py --workers 8 --warm-runs 5
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs in each worker process: import the app's startup module, then time prepare_database
+WORKER = """
+import time
+from app.db.startup import prepare_database
+started = time.perf_counter()
+ran = prepare_database()
+print(f"RESULT {(time.perf_counter() - started) * 1000:.3f} {int(ran)}")
+"""
+
+
+def start_workers(database_url: str, count: int):
+    """Start count worker processes at once; returns (ms, prepared) per successful worker and failures"""
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONPATH=BACKEND_DIR)
+    procs = [
+        subprocess.Popen([sys.executable, "-c", WORKER], cwd=BACKEND_DIR, env=env,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for _ in range(count)
+    ]
+    results, failures = [], []
+    for proc in procs:
+        out, err = proc.communicate()
+        line = next((line for line in out.splitlines() if line.startswith("RESULT ")), None)
+        if proc.returncode or line is None:
+            failures.append(err.strip().splitlines()[-1] if err.strip() else f"exit code {proc.returncode}")
+            continue
+        _, ms, ran = line.split()
+        results.append((float(ms), ran == "1"))
+    return results, failures
+
+
+def seed_counts(path: str) -> dict:
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("nyc_climate_data", "travel_recommendations", "hospitals")
+        }
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--warm-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"Startup benchmark: cold start, {args.warm_runs} warm starts, {args.workers} concurrent workers")
+    print("=" * 70)
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "startup.db")
+        url = f"sqlite:///{path}"
+
+        results, failures = start_workers(url, 1)
+        if failures:
+            sys.exit(f"Cold start failed: {failures[0]}")
+        cold = results[0][0]
+        warm = []
+        for _ in range(args.warm_runs):
+            results, failures = start_workers(url, 1)
+            if failures:
+                sys.exit(f"Warm start failed: {failures[0]}")
+            warm.append(results[0][0])
+        print(f"Cold start (empty database):  {cold:8.1f} ms")
+        print(f"Warm start (marker current):  {statistics.median(warm):8.1f} ms median")
+        expected = seed_counts(path)
+
+        concurrent_path = os.path.join(tmp, "concurrent.db")
+        results, failures = start_workers(f"sqlite:///{concurrent_path}", args.workers)
+        prepared = sum(ran for _, ran in results)
+        times = sorted(ms for ms, _ in results)
+        print(f"\n{args.workers} workers on a fresh database: {len(results)} started, {len(failures)} failed, "
+              f"{prepared} prepared the database")
+        if times:
+            print(f"  startup time: min {times[0]:.1f} ms, median {statistics.median(times):.1f} ms, "
+                  f"max {times[-1]:.1f} ms")
+        for failure in failures:
+            print(f"  failure: {failure}")
+
+        counts = seed_counts(concurrent_path)
+        print(f"  rows: {counts} (single start: {expected})")
+        if failures or prepared != 1 or counts != expected:
+            ok = False
+
+    print("\nOK" if ok else "\nFAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 """
 Script to collect historical climate data and store in database
 Run this script periodically (e.g., daily) to collect and update historical data
+Pass --enqueue to queue one backfill job per ZIP code for the job workers instead
 """
+import argparse
 import asyncio
 import sys
 import os
@@ -9,7 +11,10 @@ import os
 # Add parent directory to path to import app modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from app.db.init_db import init_db
+from app.db.write_queue import write_queue
 from app.services.historical_data_collector import HistoricalDataCollector
+from app.services.history_backfill import request_history_backfill
 
 # Common NYC ZIP codes
 NYC_ZIP_CODES = [
@@ -20,6 +25,13 @@ NYC_ZIP_CODES = [
     '10301', '10302'   # Staten Island
 ]
 
+async def enqueue(days: int):
+    """Queue a backfill job per ZIP code; the API process or `python -m app.services.job_queue` runs them"""
+    for zip_code in NYC_ZIP_CODES:
+        queued = await request_history_backfill(zip_code, days=days)
+        print(f"ZIP {zip_code}: {'queued' if queued else 'already queued or recently collected'}")
+    await write_queue.stop()
+
 async def main():
     """Main function to collect historical data"""
     collector = HistoricalDataCollector()
@@ -47,5 +59,14 @@ async def main():
     print("=" * 60)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Collect historical climate data")
+    parser.add_argument("--enqueue", action="store_true", help="Queue backfill jobs instead of collecting now")
+    parser.add_argument("--days", type=int, default=30, help="Days of history per ZIP code (with --enqueue)")
+    args = parser.parse_args()
+    
+    if args.enqueue:
+        init_db()
+        asyncio.run(enqueue(args.days))
+    else:
+        asyncio.run(main())
 
@@ -0,0 +1,105 @@
+"""
+Concurrent stress test for today's climate row get-or-create.
+Fires many simultaneous GET /api/nyc/climate/latest requests for a few ZIP codes that have
+no row for today, against a scratch database, and checks that every (zip_code, date) ends
+up with exactly one row and that the upstream fetch ran once per ZIP code.
+Exits non-zero if either check fails.
+
+Usage (from backend directory):
+    python scripts/stress_latest_climate.py --zip-codes 10001 10002 10003 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from collections import Counter
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+async def run(zip_codes, requests_per_zip: int, upstream_delay: float) -> int:
+    import httpx
+    from sqlalchemy import func, select
+    from app.db.database import AsyncSessionLocal
+    from app.db.init_db import init_db
+    from app.db.write_queue import write_queue
+    from app.main import app
+    from app.models.nyc_climate import NYCClimateData
+    from app.services.climate_data_service import ClimateDataService
+
+    init_db()
+
+    # Count upstream fetches per ZIP, and slow them down to widen the race window
+    fetches = Counter()
+    fetch = ClimateDataService.get_nyc_climate_data
+
+    async def counted_fetch(self, zip_code, target_date, *args, **kwargs):
+        fetches[zip_code] += 1
+        await asyncio.sleep(upstream_delay)
+        return await fetch(self, zip_code, target_date, *args, **kwargs)
+
+    ClimateDataService.get_nyc_climate_data = counted_fetch
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://stress") as client:
+        responses = await asyncio.gather(*(
+            client.get("/api/nyc/climate/latest", params={"zip_code": zip_code})
+            for zip_code in zip_codes
+            for _ in range(requests_per_zip)
+        ))
+    await write_queue.stop()
+
+    statuses = Counter(r.status_code for r in responses)
+    ids_per_zip = {
+        zip_code: {r.json()["id"] for r in responses if r.status_code == 200 and r.json()["zip_code"] == zip_code}
+        for zip_code in zip_codes
+    }
+
+    async with AsyncSessionLocal() as db:
+        duplicates = (await db.execute(
+            select(NYCClimateData.zip_code, NYCClimateData.date, func.count())
+            .group_by(NYCClimateData.zip_code, NYCClimateData.date)
+            .having(func.count() > 1)
+        )).all()
+        rows = await db.scalar(
+            select(func.count()).select_from(NYCClimateData).filter(NYCClimateData.zip_code.in_(zip_codes))
+        )
+
+    print("=" * 70)
+    print(f"{len(responses)} concurrent /latest requests over {len(zip_codes)} ZIP codes")
+    print("=" * 70)
+    print(f"HTTP statuses: {dict(statuses)}")
+    print(f"Rows stored:   {rows} (expected {len(zip_codes)})")
+    print(f"Duplicates:    {len(duplicates)}")
+    for zip_code in zip_codes:
+        print(f"  {zip_code}: {fetches[zip_code]} upstream fetch(es), {len(ids_per_zip[zip_code])} distinct row id(s) returned")
+
+    failed = (
+        statuses.get(200, 0) != len(responses)
+        or duplicates
+        or rows != len(zip_codes)
+        or any(fetches[z] != 1 or len(ids_per_zip[z]) != 1 for z in zip_codes)
+    )
+    print("\nFAILED" if failed else "\nOK: one row and one upstream fetch per (zip_code, date)")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--zip-codes", nargs="+", default=["10001", "10002", "10003", "11201"])
+    parser.add_argument("--requests", type=int, default=100, help="Concurrent requests per ZIP code")
+    parser.add_argument("--upstream-delay", type=float, default=0.2, help="Seconds added to each upstream fetch")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Scratch database and no API keys, so the run is self-contained
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'stress.db')}"
+        os.environ["OPENWEATHER_API_KEY"] = ""
+        os.environ["AIRNOW_API_KEY"] = ""
+        sys.exit(asyncio.run(run(args.zip_codes, args.requests, args.upstream_delay)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Shared test setup: the app's engines read DATABASE_URL at import, so a scratch SQLite
+database is configured before any app module is imported. Background job workers are not
+started by the API under test; job tests drive the queue directly.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+_DATA_DIR = tempfile.mkdtemp(prefix="earthbreath-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DATA_DIR, 'test.db')}"
+os.environ["JOB_WORKER_IN_PROCESS"] = "false"
+
+# Import app modules from the backend directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def run(coro):
+    """
+    Run a coroutine on a fresh event loop, then stop the shared writer and close pooled
+    connections, which belong to that loop
+    """
+    from app.db.database import async_engine
+    from app.db.write_queue import write_queue
+
+    async def main():
+        try:
+            return await coro
+        finally:
+            await write_queue.stop()
+            await async_engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture(scope="session")
+def database():
+    """The scratch database, prepared as on API startup"""
+    from app.db.startup import prepare_database
+    prepare_database()
+
+
+@pytest.fixture
+def client(database):
+    from app.main import app
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,155 @@
+"""Bulk ingest pipeline (app.services.bulk_ingest) and the gas bulk endpoint: per-line error reports"""
+import asyncio
+import json
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from app.db.database import AsyncSessionLocal
+from app.models.rollup import GasRollup
+from app.services.bulk_ingest import ingest_records, iter_stream_records
+from app.services.gas_ingest import coerce_gas_row, ingest_gas_stream
+from app.services.job_queue import JobQueue
+from app.services.rollups import REFRESH_ROLLUPS_JOB
+from conftest import run
+
+GOOD = b'{"gas_type": "CO2", "region": "Test Ingest", "date": "2024-03-0%d", "value": 420, "unit": "ppm"}'
+
+
+async def pieces_of(body: bytes, size: int = 7):
+    """The body in small pieces, so lines straddle pieces as in a real stream"""
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def ingest(body: bytes, fmt: str = "ndjson", chunk_rows: int = 100, write=None):
+    written = []
+
+    async def store(rows):
+        written.extend(rows)
+        return {"written": len(rows)}
+
+    report = asyncio.run(ingest_records(
+        iter_stream_records(pieces_of(body), fmt), coerce_gas_row, write or store, ["written"], chunk_rows
+    ))
+    return report, written
+
+
+def errors_of(report):
+    return [(error["line"], error["error"]) for chunk in report["chunks"] for error in chunk["errors"]]
+
+
+def test_bad_lines_are_reported_and_the_rest_is_written():
+    body = b"\n".join([
+        GOOD % 1,
+        b"{not json",
+        b'{"gas_type": "CO2", "region": "R", "date": "2024-13-01", "value": 1, "unit": "ppm"}',
+        b"",  # Blank lines are skipped but still counted
+        b'{"gas_type": "CO2", "region": "R", "date": "2024-03-01", "value": "high", "unit": "ppm"}',
+        b'{"region": "R"}',
+        b"[1, 2]",
+        GOOD % 2,
+    ])
+    report, written = ingest(body)
+    assert report["rows"] == 7 and report["written"] == 2 and report["rejected"] == 5
+    assert [row["date"].day for row in written] == [1, 2]
+    lines = [line for line, _ in errors_of(report)]
+    assert lines == [2, 3, 5, 6, 7]
+    messages = dict(errors_of(report))
+    assert messages[2].startswith("invalid JSON")
+    assert "invalid date" in messages[3]
+    assert "not a number" in messages[5]
+    assert "missing required field(s): gas_type, date, value, unit" in messages[6]
+    assert messages[7] == "row is not an object"
+
+
+def test_invalid_utf8_is_a_row_error():
+    body = GOOD % 1 + b"\n" + b'{"gas_type": "CO\xff2"}' + b"\n" + GOOD % 2 + b"\n\xc3("
+    report, written = ingest(body)
+    assert len(written) == 2
+    assert [(line, message.split(" at ")[0]) for line, message in errors_of(report)] == [
+        (2, "invalid UTF-8"), (4, "invalid UTF-8")
+    ]
+
+
+def test_csv_header_bom_and_column_count():
+    body = (
+        b"\xef\xbb\xbfgas_type,region,date,value,unit\n"
+        b"CH4,Test Ingest,2024-03-01,1.9,ppb\n"
+        b"CH4,Test Ingest,2024-03-02\n"
+        b"CH4,Test Ingest,2024-03-03,2.0,ppb\n"
+    )
+    report, written = ingest(body, fmt="csv")
+    assert [row["value"] for row in written] == [1.9, 2.0]
+    assert errors_of(report) == [(3, "expected 5 columns, got 3")]
+
+
+def test_chunk_reports_cover_their_lines():
+    body = b"\n".join([GOOD % day for day in range(1, 6)] + [b"oops"])
+    report, _ = ingest(body, chunk_rows=2)
+    assert [(c["first_line"], c["last_line"], c["written"], c["error_count"]) for c in report["chunks"]] == [
+        (1, 2, 2, 0), (3, 4, 2, 0), (5, 6, 1, 1)
+    ]
+
+
+def test_failed_chunk_write_is_reported_not_raised():
+    calls = []
+
+    async def write(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        return {"written": len(rows)}
+
+    body = b"\n".join(GOOD % day for day in range(1, 5))
+    report, _ = ingest(body, chunk_rows=2, write=write)
+    assert report["written"] == 2 and report["rejected"] == 2
+    assert report["chunks"][0]["error"] == "database is locked"
+    assert report["chunks"][1]["error"] is None
+
+
+def test_gas_bulk_endpoint_reports_bad_lines(client):
+    body = GOOD % 1 + b"\n\xff\xfe\n" + GOOD % 2 + b"\n{}"
+    response = client.post("/api/data/gas/bulk", content=body)
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["rows"], report["written"], report["rejected"]) == (4, 2, 2)
+    assert [error["line"] for error in report["chunks"][0]["errors"]] == [2, 4]
+
+    stored = client.get("/api/data/gas", params={"gas_type": "CO2", "region": "Test Ingest"}).json()
+    assert sorted(row["date"] for row in stored) == ["2024-03-01", "2024-03-02"]
+
+
+
+def test_bulk_load_refreshes_rollups_in_one_job(database):
+    body = b"\n".join(
+        b'{"gas_type": "CH4", "region": "Test Rollups", "date": "2024-0%d-%02d", "value": %d, "unit": "ppb"}'
+        % (month, day, month * 10 + day) for month in (1, 2) for day in (1, 2, 3)
+    )
+
+    async def monthly():
+        async with AsyncSessionLocal() as db:
+            rollups = await db.scalars(
+                select(GasRollup)
+                .filter(GasRollup.region == "Test Rollups", GasRollup.bucket == "month")
+                .order_by(GasRollup.bucket_start)
+            )
+            return [(str(row.bucket_start), row.count, row.min, row.max) for row in rollups]
+
+    async def main():
+        report = await ingest_gas_stream(pieces_of(body), "ndjson", chunk_rows=2)
+        # Chunks do not refresh rollups in their own transaction
+        before = await monthly()
+        queue = JobQueue(workers=0)
+        payloads = []
+        while (job := await queue._claim()) is not None:
+            if job["kind"] == REFRESH_ROLLUPS_JOB:
+                payloads.append(json.loads(job["payload"]))
+            await queue._execute(job)
+        return report, before, payloads, await monthly()
+
+    report, before, payloads, after = run(main())
+    assert (report["written"], len(report["chunks"])) == (6, 3)
+    assert before == []
+    # One job for the whole load, with the span of each series it wrote
+    assert [payload for payload in payloads if ["CH4", "Test Rollups", "2024-01-01", "2024-02-03"] in payload["gas"]] \
+        == [{"gas": [["CH4", "Test Rollups", "2024-01-01", "2024-02-03"]], "climate": []}]
+    assert after == [("2024-01-01", 3, 11, 13), ("2024-02-01", 3, 21, 23)]
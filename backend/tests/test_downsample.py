@@ -0,0 +1,35 @@
+"""LTTB downsampling (app.services.downsample) and its cache on the gas list endpoint"""
+import numpy as np
+from app.services.downsample import lttb_indices
+
+REGION = "Test Downsample"
+
+
+def test_lttb_keeps_ends_and_peaks():
+    x = np.arange(100, dtype=float)
+    y = np.zeros(100)
+    y[37], y[71] = 50.0, -50.0
+    kept = lttb_indices(x, y, 10)
+    assert len(kept) == 10
+    assert kept[0] == 0 and kept[-1] == 99
+    assert {37, 71} <= set(kept.tolist())
+    assert list(lttb_indices(x, y, 200)) == list(range(100))
+
+
+def test_write_is_visible_to_the_next_downsampled_read(client):
+    def downsampled():
+        response = client.get("/api/data/gas", params={"region": REGION, "max_points": 100})
+        assert response.status_code == 200
+        return sorted(row["date"] for row in response.json())
+
+    def add(day):
+        response = client.post("/api/data/gas", json={
+            "gas_type": "CO2", "region": REGION, "date": day, "value": 1.0, "unit": "ppm"
+        })
+        assert response.status_code == 201
+
+    add("2024-07-01")
+    assert downsampled() == ["2024-07-01"]
+    # Within the cache TTL, the second read must not serve the result cached by the first
+    add("2024-07-02")
+    assert downsampled() == ["2024-07-01", "2024-07-02"]
@@ -0,0 +1,156 @@
+"""Hospital spatial index (app.services.hospital_index) against a brute-force search"""
+import math
+import numpy as np
+import pytest
+from sqlalchemy import delete, event
+from app.db.database import AsyncSessionLocal, async_engine
+from app.models.hospital import Hospital
+from app.services.dimension_cache import bump_data_version
+from app.services.hospital_index import HospitalIndex, haversine_km
+from conftest import run
+
+
+def hospital(id: int, latitude: float, longitude: float, specialty: str = "General", emergency: str = "Yes"):
+    return {
+        "id": id, "name": f"Hospital {id}", "borough": "", "latitude": latitude, "longitude": longitude,
+        "address": "", "zip_code": None, "phone": None, "specialty": specialty, "description": None,
+        "website": None, "emergency_department": emergency, "beds": None, "asthma_specialists": None,
+    }
+
+
+def random_hospitals(rng, first_id: int, count: int):
+    """Spread over the globe, with extra hospitals near the poles, the equator and the antimeridian"""
+    rows = []
+    for id in range(first_id, first_id + count):
+        latitude = [rng.uniform(-90, 90), rng.uniform(85, 90), rng.uniform(-90, -85), rng.uniform(-1, 1)][rng.integers(4)]
+        longitude = [rng.uniform(-180, 180), rng.uniform(179, 180), rng.uniform(-180, -179)][rng.integers(3)]
+        rows.append(hospital(
+            id, float(latitude), float(longitude),
+            specialty=["Pulmonology", "General", "Pediatric pulmonology"][id % 3],
+            emergency=["Yes", "No", None][id % 3 if id % 2 else 0],
+        ))
+    return rows
+
+
+def brute_force(rows, latitude, longitude, limit, radius_km=None, specialty=None, emergency=None):
+    """(id, distance) of the nearest matching hospitals by checking every one"""
+    found = []
+    distances = haversine_km(
+        math.radians(latitude), math.radians(longitude),
+        np.radians([row["latitude"] for row in rows]), np.radians([row["longitude"] for row in rows])
+    )
+    for row, distance in zip(rows, distances):
+        if radius_km is not None and distance > radius_km:
+            continue
+        if specialty and specialty.lower() not in (row["specialty"] or "").lower():
+            continue
+        if emergency is not None and (row["emergency_department"] == "Yes") != emergency:
+            continue
+        found.append((float(distance), row["id"]))
+    return [(id, distance) for distance, id in sorted(found)[:limit]]
+
+
+@pytest.mark.parametrize("cell_degrees", [0.05, 1.0, 7.0])
+def test_matches_brute_force(cell_degrees):
+    rng = np.random.default_rng(7)
+    index = HospitalIndex(cell_degrees)
+    rows = []
+    # Searches between batches of adds also cover merging new hospitals into the sorted layout
+    for batch in range(3):
+        for row in random_hospitals(rng, len(rows) + 1, 400):
+            rows.append(row)
+            index.add(row)
+        for _ in range(200):
+            latitude = float([rng.uniform(-90, 90), rng.uniform(88, 90), -90.0, 0.0][rng.integers(4)])
+            longitude = float([rng.uniform(-180, 180), 179.99, -179.99, 180.0][rng.integers(4)])
+            filters = {
+                "limit": int(rng.integers(1, 25)),
+                "radius_km": [None, 50.0, 500.0, 5000.0][rng.integers(4)],
+                "specialty": [None, "pulmo", "GENERAL", "none such"][rng.integers(4)],
+                "emergency": [None, True, False][rng.integers(3)],
+            }
+            expected = brute_force(rows, latitude, longitude, **filters)
+            found = index.search(latitude, longitude, **filters)
+            context = (cell_degrees, batch, latitude, longitude, filters)
+            assert len(found) == len(expected), context
+            # Compared by distance, so floating-point near-ties cannot swap ids and fail the test
+            assert [distance for _, distance in found] == pytest.approx(
+                [distance for _, distance in expected], abs=1e-6), context
+            assert len({row["id"] for row, _ in found}) == len(found)
+
+
+def test_ties_are_ordered_by_id():
+    index = HospitalIndex()
+    for id in (5, 2, 9, 1):
+        index.add(hospital(id, 40.75, -73.98))
+    index.add(hospital(3, 40.80, -73.95))
+    found = index.search(40.75, -73.98, limit=3)
+    assert [row["id"] for row, _ in found] == [1, 2, 5]
+    assert [distance for _, distance in found] == [0.0, 0.0, 0.0]
+
+
+def test_empty_index_and_unknown_specialty():
+    index = HospitalIndex()
+    assert index.search(40.75, -73.98) == []
+    index.add(hospital(1, 40.75, -73.98))
+    assert index.search(40.75, -73.98, specialty="cardiology") == []
+    assert index.search(40.75, -73.98, radius_km=1)[0][0]["id"] == 1
+
+
+def test_searches_during_a_full_reload_see_the_previous_hospitals(database):
+    index = HospitalIndex()
+    seen_during_reload = []
+
+    def search_during_reload(conn, cursor, statement, parameters, context, executemany):
+        # The full reload is the only hospitals query without a WHERE clause
+        if "FROM hospitals" in statement and "ORDER BY hospitals.id" in statement and "WHERE" not in statement:
+            seen_during_reload.append([row["name"] for row, _ in index.search(-61.5, 101.25, limit=2, radius_km=50)])
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            kept, deleted = (Hospital(
+                name=f"Reload Hospital {name}", borough="Test Reload", latitude=-61.5, longitude=101.25,
+                address="1 Test Street", specialty="Pulmonology", emergency_department="Yes"
+            ) for name in ("kept", "deleted"))
+            db.add_all([kept, deleted])
+            await db.flush()
+            await db.execute(bump_data_version(db.get_bind().dialect.name, Hospital.__tablename__))
+            await db.commit()
+            await index.refresh(db)
+            assert len(index.search(-61.5, 101.25, limit=2, radius_km=50)) == 2
+
+            # A deleted row makes the count differ, so the next refresh reloads everything
+            await db.execute(delete(Hospital).where(Hospital.id == deleted.id))
+            await db.execute(bump_data_version(db.get_bind().dialect.name, Hospital.__tablename__))
+            await db.commit()
+            event.listen(async_engine.sync_engine, "before_cursor_execute", search_during_reload)
+            try:
+                await index.refresh(db)
+            finally:
+                event.remove(async_engine.sync_engine, "before_cursor_execute", search_during_reload)
+            return [row["name"] for row, _ in index.search(-61.5, 101.25, limit=2, radius_km=50)]
+
+    after = run(scenario())
+    assert seen_during_reload == [["Reload Hospital kept", "Reload Hospital deleted"]]
+    assert after == ["Reload Hospital kept"]
+
+
+def test_nearby_endpoint_sees_new_hospitals(client):
+    def nearest():
+        response = client.get("/api/hospitals/nearby", params={"latitude": -60.5, "longitude": 100.25, "limit": 1})
+        assert response.status_code == 200
+        return response.json()
+
+    before = nearest()
+    created = client.post("/api/hospitals/", json={
+        "name": "Index Test Hospital", "borough": "Test Index", "latitude": -60.5, "longitude": 100.25,
+        "address": "1 Test Street", "specialty": "Pulmonology", "emergency_department": "Yes"
+    }).json()
+    after = nearest()
+    assert not before or before[0]["id"] != created["id"]
+    assert [(row["id"], row["distance_km"]) for row in after] == [(created["id"], 0.0)]
+
+    response = client.get("/api/hospitals/nearby", params={
+        "latitude": -60.5, "longitude": 100.25, "radius_km": 10, "emergency": "false"
+    })
+    assert response.json() == []
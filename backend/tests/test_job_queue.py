@@ -0,0 +1,149 @@
+"""Durable job queue (app.services.job_queue): deduplication, re-claim after a lost lease, fencing"""
+import pytest
+from sqlalchemy import delete, select, update
+from app.db.database import AsyncSessionLocal
+from app.db.write_queue import write_queue
+from app.models.job import Job, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING
+from app.services.job_queue import JobQueue, _utcnow, job_handler
+from conftest import run
+
+
+@job_handler("test_succeeds")
+async def _succeeds(payload):
+    return None
+
+
+@job_handler("test_fails")
+async def _fails(payload):
+    raise RuntimeError(payload["message"])
+
+
+def worker(name: str, visibility_timeout: float = 600) -> JobQueue:
+    """A queue whose claims expire after visibility_timeout seconds (0: at once)"""
+    queue = JobQueue(workers=0, visibility_timeout=visibility_timeout)
+    queue.worker_id = name
+    return queue
+
+
+async def jobs():
+    async with AsyncSessionLocal() as db:
+        return (await db.scalars(select(Job).order_by(Job.id))).all()
+
+
+async def set_status(key: str, **values):
+    async def apply(session):
+        await session.execute(update(Job).where(Job.job_key == key).values(**values))
+    await write_queue.submit(apply)
+
+
+@pytest.fixture(autouse=True)
+def empty_jobs(database):
+    """Claims take any due job, so each test starts from an empty jobs table"""
+    async def clear(session):
+        await session.execute(delete(Job))
+    run(write_queue.submit(clear))
+
+
+def test_same_key_is_queued_once():
+    async def main():
+        queue = worker("w1")
+        first = await queue.enqueue("test_succeeds", key="dedup")
+        second = await queue.enqueue("test_succeeds", {"other": 1}, key="dedup")
+        unkeyed = [await queue.enqueue("test_succeeds") for _ in range(2)]
+        return first, second, unkeyed, await jobs()
+
+    first, second, unkeyed, stored = run(main())
+    assert (first, second, unkeyed) == (True, False, [True, True])
+    assert len(stored) == 3
+    assert [job.payload for job in stored if job.job_key == "dedup"] == ["{}"]
+
+
+def test_done_job_is_rearmed_only_after_rerun_interval():
+    async def main():
+        queue = worker("w1")
+        await queue.enqueue("test_succeeds", key="rerun")
+        await set_status("rerun", status=JOB_DONE, attempts=1, finished_at=_utcnow())
+        too_soon = await queue.enqueue("test_succeeds", key="rerun", rerun_after_seconds=3600)
+        rearmed = await queue.enqueue("test_succeeds", key="rerun", rerun_after_seconds=0)
+        return too_soon, rearmed, await jobs()
+
+    too_soon, rearmed, stored = run(main())
+    assert (too_soon, rearmed) == (False, True)
+    assert [(job.status, job.attempts, job.finished_at) for job in stored] == [(JOB_QUEUED, 0, None)]
+
+
+def test_failed_job_is_always_rearmed():
+    async def main():
+        queue = worker("w1")
+        await queue.enqueue("test_succeeds", key="failed")
+        await set_status("failed", status=JOB_FAILED, attempts=5, finished_at=_utcnow(), last_error="boom")
+        rearmed = await queue.enqueue("test_succeeds", key="failed", rerun_after_seconds=3600)
+        return rearmed, await jobs()
+
+    rearmed, stored = run(main())
+    assert rearmed is True
+    assert [(job.status, job.attempts, job.last_error) for job in stored] == [(JOB_QUEUED, 0, None)]
+
+
+def test_running_job_is_not_claimed_twice():
+    async def main():
+        first, second = worker("w1"), worker("w2")
+        await first.enqueue("test_succeeds", key="claim")
+        return await first._claim(), await second._claim()
+
+    claimed, again = run(main())
+    assert claimed["attempts"] == 1
+    assert again is None
+
+
+def test_expired_lease_is_reclaimed_and_fences_the_old_worker():
+    async def main():
+        first, second = worker("w1", visibility_timeout=0), worker("w2")
+        await first.enqueue("test_succeeds", key="lease")
+        lost = await first._claim()
+        reclaimed = await second._claim()
+        # The first worker finishes late: its outcome must not overwrite the new claim
+        stale = await first._set(lost, status=JOB_DONE, finished_at=_utcnow(), locked_until=None)
+        while_reclaimed = await jobs()
+        recorded = await second._set(reclaimed, status=JOB_DONE, finished_at=_utcnow(), locked_until=None)
+        return lost, reclaimed, stale, while_reclaimed, recorded, await jobs()
+
+    lost, reclaimed, stale, while_reclaimed, recorded, stored = run(main())
+    assert reclaimed["id"] == lost["id"]
+    assert (lost["attempts"], reclaimed["attempts"]) == (1, 2)
+    assert stale is False
+    assert [(job.status, job.locked_by, job.attempts) for job in while_reclaimed] == [(JOB_RUNNING, "w2", 2)]
+    assert recorded is True
+    assert [job.status for job in stored] == [JOB_DONE]
+
+
+def test_expired_last_attempt_is_marked_failed():
+    async def main():
+        first, second = worker("w1", visibility_timeout=0), worker("w2")
+        await first.enqueue("test_succeeds", key="last", max_attempts=1)
+        await first._claim()
+        return await second._claim(), await jobs()
+
+    claimed, stored = run(main())
+    assert claimed is None
+    assert [(job.status, job.attempts, job.last_error) for job in stored] == [
+        (JOB_FAILED, 1, "Visibility timeout expired on attempt 1")
+    ]
+
+
+def test_execute_records_success_and_retries_failures():
+    async def main():
+        queue = worker("w1")
+        await queue.enqueue("test_succeeds", key="ok")
+        await queue.enqueue("test_fails", {"message": "flaky"}, key="retry", max_attempts=2)
+        await queue.enqueue("test_fails", {"message": "broken"}, key="give-up", max_attempts=1)
+        while (job := await queue._claim()) is not None:
+            await queue._execute(job)
+        return {job.job_key: job for job in await jobs()}
+
+    stored = run(main())
+    assert stored["ok"].status == JOB_DONE and stored["ok"].finished_at is not None
+    # Retried later with backoff, so not claimable again right away
+    assert (stored["retry"].status, stored["retry"].attempts, stored["retry"].last_error) == (JOB_QUEUED, 1, "flaky")
+    assert stored["retry"].run_at > _utcnow()
+    assert (stored["give-up"].status, stored["give-up"].last_error) == (JOB_FAILED, "broken")
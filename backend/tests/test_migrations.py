@@ -0,0 +1,129 @@
+"""Schema migrations (app.db.migrations) from a baseline database that holds duplicate hot keys"""
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from app.db.database import Base, create_db_engine
+from app.db.migrations import MIGRATIONS, run_migrations
+import app.db.init_db  # noqa: F401  Registers every model on Base.metadata
+
+# Tables as created before the first migration: no unique keys, gas names on every row
+BASELINE_SCHEMA = [
+    """CREATE TABLE nyc_climate_data (
+        id INTEGER PRIMARY KEY, zip_code VARCHAR NOT NULL, date DATE NOT NULL,
+        aqi FLOAT, pm25 FLOAT, pm10 FLOAT, o3 FLOAT, no2 FLOAT, co FLOAT,
+        temperature FLOAT, humidity FLOAT, wind_speed FLOAT, wind_direction FLOAT, pressure FLOAT,
+        visibility FLOAT, uv_index FLOAT, pollen_count INTEGER, asthma_index FLOAT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME)""",
+    "CREATE INDEX ix_nyc_climate_data_zip_code ON nyc_climate_data (zip_code)",
+    "CREATE INDEX ix_nyc_climate_data_date ON nyc_climate_data (date)",
+    """CREATE TABLE travel_recommendations (
+        id INTEGER PRIMARY KEY, zip_code VARCHAR NOT NULL, date DATE NOT NULL,
+        recommendation_level VARCHAR NOT NULL, risk_score FLOAT NOT NULL,
+        air_quality_score FLOAT, weather_score FLOAT, pollen_score FLOAT,
+        overall_message TEXT, air_quality_message TEXT, weather_message TEXT, pollen_message TEXT,
+        general_advice TEXT, best_time_of_day VARCHAR, outdoor_activity_safe BOOLEAN NOT NULL,
+        exercise_recommendation VARCHAR, created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME)""",
+    "CREATE INDEX ix_travel_recommendations_zip_code ON travel_recommendations (zip_code)",
+    """CREATE TABLE gas_data (
+        id INTEGER PRIMARY KEY, gas_type VARCHAR NOT NULL, region VARCHAR NOT NULL, date DATE NOT NULL,
+        value FLOAT NOT NULL, unit VARCHAR NOT NULL, source VARCHAR, notes VARCHAR,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME)""",
+    "CREATE INDEX ix_gas_data_gas_type ON gas_data (gas_type)",
+    "CREATE INDEX ix_gas_data_region ON gas_data (region)",
+    "CREATE INDEX ix_gas_data_date ON gas_data (date)",
+]
+
+BASELINE_ROWS = [
+    # Two copies of 10001 on 2024-01-01; the later one (higher id) is kept
+    "INSERT INTO nyc_climate_data (id, zip_code, date, aqi) VALUES "
+    "(1, '10001', '2024-01-01', 40), (2, '10001', '2024-01-02', 41), (3, '10001', '2024-01-01', 45), "
+    "(4, '11201', '2024-01-01', 30)",
+    "INSERT INTO travel_recommendations (id, zip_code, date, recommendation_level, risk_score, outdoor_activity_safe) "
+    "VALUES (1, '10001', '2024-01-01', 'safe', 10, 1), (2, '10001', '2024-01-01', 'caution', 60, 0), "
+    "(3, '10001', '2024-01-02', 'safe', 12, 1)",
+    "INSERT INTO gas_data (id, gas_type, region, date, value, unit, source) VALUES "
+    "(1, 'CO2', 'Global', '2024-01-01', 420.0, 'ppm', 'NOAA'), "
+    "(2, 'CO2', 'Global', '2024-01-01', 421.5, 'ppm', 'NOAA'), "
+    "(3, 'CH4', 'Global', '2024-01-01', 1.9, 'ppb', NULL), "
+    "(4, 'CO2', 'US', '2024-01-02', 418.0, 'ppm', 'EDGAR')",
+]
+
+
+@pytest.fixture
+def migrated(tmp_path):
+    """Engine of a baseline database after create_all and all migrations (as init_db does)"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'baseline.db'}", sqlite_tuning=False)
+    with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA + BASELINE_ROWS:
+            conn.execute(text(statement))
+    Base.metadata.create_all(bind=engine)
+    version = run_migrations(engine)
+    yield engine, version
+    engine.dispose()
+
+
+def test_reaches_the_latest_version_once(migrated):
+    engine, version = migrated
+    assert version == MIGRATIONS[-1][0]
+    with engine.connect() as conn:
+        applied = conn.execute(text("SELECT version FROM schema_version ORDER BY version")).scalars().all()
+    assert applied == [number for number, _, _ in MIGRATIONS]
+    # Nothing left to apply
+    assert run_migrations(engine) == version
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_version")).scalar() == len(MIGRATIONS)
+
+
+def test_duplicates_are_removed_keeping_the_latest_row(migrated):
+    engine, _ = migrated
+    with engine.connect() as conn:
+        climate = conn.execute(text("SELECT id, zip_code, date, aqi FROM nyc_climate_data ORDER BY id")).all()
+        travel = conn.execute(text("SELECT id, risk_score FROM travel_recommendations ORDER BY id")).all()
+    assert [(row.id, row.aqi) for row in climate] == [(2, 41), (3, 45), (4, 30)]
+    assert [(row.id, row.risk_score) for row in travel] == [(2, 60), (3, 12)]
+
+
+@pytest.mark.parametrize("statement", [
+    "INSERT INTO nyc_climate_data (zip_code, date) VALUES ('10001', '2024-01-01')",
+    "INSERT INTO travel_recommendations (zip_code, date, recommendation_level, risk_score, outdoor_activity_safe) "
+    "VALUES ('10001', '2024-01-02', 'safe', 1, 1)",
+])
+def test_hot_keys_are_unique_afterwards(migrated, statement):
+    engine, _ = migrated
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(text(statement))
+
+
+def test_gas_names_move_to_dimension_ids(migrated):
+    engine, _ = migrated
+    columns = {column["name"] for column in inspect(engine).get_columns("gas_data")}
+    assert {"gas_type", "region", "unit", "source"}.isdisjoint(columns)
+    assert {"gas_type_id", "region_id", "unit_id", "source_id"} <= columns
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT gas_data.id, gas_types.name, gas_regions.name, gas_units.name, gas_sources.name, value "
+            "FROM gas_data "
+            "JOIN gas_types ON gas_types.id = gas_type_id "
+            "JOIN gas_regions ON gas_regions.id = region_id "
+            "JOIN gas_units ON gas_units.id = unit_id "
+            "LEFT JOIN gas_sources ON gas_sources.id = source_id "
+            "ORDER BY gas_data.id"
+        )).all()
+    assert [tuple(row) for row in rows] == [
+        (2, "CO2", "Global", "ppm", "NOAA", 421.5),
+        (3, "CH4", "Global", "ppb", None, 1.9),
+        (4, "CO2", "US", "ppm", "EDGAR", 418.0),
+    ]
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO gas_data (gas_type_id, region_id, unit_id, date, value) "
+                "SELECT gas_type_id, region_id, unit_id, date, 1 FROM gas_data WHERE id = 2"
+            ))
+
+
+def test_climate_source_column_is_added(migrated):
+    engine, _ = migrated
+    assert "source" in {column["name"] for column in inspect(engine).get_columns("nyc_climate_data")}
@@ -0,0 +1,131 @@
+"""Keyset cursor pagination (app.api.pagination) on the gas, hospital and user lists"""
+import base64
+from datetime import date
+import pytest
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+REGION = "Test Paging"
+BOROUGH = "Test Paging Borough"
+GAS_TYPES = ["CO2", "CH4", "N2O"]
+DATES = ["2024-05-01", "2024-05-02", "2024-05-03", "2024-05-04"]
+
+
+def all_pages(client, url, limit, **params):
+    """Follow X-Next-Cursor from the first page to the last; returns the pages"""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(url, params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+        assert len(pages) < 100, "pagination does not terminate"
+
+
+@pytest.fixture
+def gas_rows(client):
+    """Three gas types per date, so several rows share each date; inserted out of date order"""
+    if not client.get("/api/data/gas", params={"region": REGION}).json():
+        for gas_type in GAS_TYPES:
+            for day in reversed(DATES) if gas_type == "CH4" else DATES:
+                response = client.post("/api/data/gas", json={
+                    "gas_type": gas_type, "region": REGION, "date": day, "value": 1.0, "unit": "ppm"
+                })
+                assert response.status_code == 201
+    return client.get("/api/data/gas", params={"region": REGION, "limit": 1000}).json()
+
+
+@pytest.fixture
+def hospitals(client):
+    """Six hospitals in a borough of their own"""
+    existing = client.get("/api/hospitals/", params={"borough": BOROUGH, "limit": 1000}).json()
+    for i in range(len(existing), 6):
+        response = client.post("/api/hospitals/", json={
+            "name": f"Paging Hospital {i}", "borough": BOROUGH, "latitude": 40.7, "longitude": -74.0,
+            "address": f"{i} Test Street"
+        })
+        assert response.status_code == 201
+    return client.get("/api/hospitals/", params={"borough": BOROUGH, "limit": 1000}).json()
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"date": date(2024, 5, 1), "id": 7})
+    assert "=" not in cursor
+    assert decode_cursor(cursor, ["date", "id"], date_fields=["date"]) == {"date": date(2024, 5, 1), "id": 7}
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 12, 13])
+def test_gas_pages_cover_ties_on_date_exactly_once(client, gas_rows, limit):
+    assert len(gas_rows) == 12
+    keys = [(row["date"], row["id"]) for row in gas_rows]
+    assert keys == sorted(keys, reverse=True)
+
+    pages = all_pages(client, "/api/data/gas", limit, region=REGION)
+    # Every page but the last is full, and a total divisible by the limit has no empty trailing page
+    assert [len(page) for page in pages[:-1]] == [limit] * (len(pages) - 1)
+    assert 1 <= len(pages[-1]) <= limit
+    assert len(pages) == -(-len(gas_rows) // limit)
+    assert [row["id"] for page in pages for row in page] == [row["id"] for row in gas_rows]
+
+
+def test_gas_cursor_combines_with_filters(client, gas_rows):
+    expected = [row["id"] for row in gas_rows if row["gas_type"] == "CH4"]
+    pages = all_pages(client, "/api/data/gas", 2, region=REGION, gas_type="CH4")
+    assert [len(page) for page in pages] == [2, 2]
+    assert [row["id"] for page in pages for row in page] == expected
+
+
+@pytest.mark.parametrize("limit", [1, 3, 4, 6])
+def test_hospital_pages_cover_every_row_once(client, hospitals, limit):
+    pages = all_pages(client, "/api/hospitals/", limit, borough=BOROUGH)
+    assert len(pages) == -(-len(hospitals) // limit)
+    assert [row["id"] for page in pages for row in page] == [row["id"] for row in hospitals]
+
+
+def test_rows_inserted_between_pages_do_not_shift_later_pages(client, hospitals):
+    first = client.get("/api/hospitals/", params={"borough": BOROUGH, "limit": 3})
+    client.post("/api/hospitals/", json={
+        "name": "Paging Hospital late", "borough": BOROUGH, "latitude": 40.7, "longitude": -74.0,
+        "address": "99 Test Street"
+    })
+    second = client.get("/api/hospitals/", params={
+        "borough": BOROUGH, "limit": 1000, "cursor": first.headers[NEXT_CURSOR_HEADER]
+    }).json()
+    seen = [row["id"] for row in first.json()] + [row["id"] for row in second]
+    # Nothing repeated or skipped; the new row comes last
+    assert len(seen) == len(set(seen)) == len(hospitals) + 1
+    assert seen[:len(hospitals)] == [row["id"] for row in hospitals]
+    assert second[-1]["name"] == "Paging Hospital late"
+
+
+def test_user_pages_cover_every_row_once(client):
+    for i in range(5):
+        response = client.post("/api/auth/signup", json={
+            "name": f"Paging User {i}", "email": f"paging-{i}@example.com",
+            "password": "secret123", "confirmPassword": "secret123"
+        })
+        assert response.status_code == 201
+    everyone = client.get("/api/users/", params={"limit": 1000}).json()
+    assert len(everyone) >= 5
+    for limit in (1, 2, len(everyone)):
+        pages = all_pages(client, "/api/users/", limit)
+        assert [row["id"] for page in pages for row in page] == [row["id"] for row in everyone]
+
+
+@pytest.mark.parametrize("url", ["/api/data/gas", "/api/hospitals/", "/api/users/"])
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"[1, 2]").decode(),
+    encode_cursor({"other": 1}),
+])
+def test_invalid_cursor_is_a_400(client, url, cursor):
+    response = client.get(url, params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_gas_cursor_needs_a_valid_date(client):
+    response = client.get("/api/data/gas", params={"cursor": encode_cursor({"date": "May 1", "id": 1})})
+    assert response.status_code == 400
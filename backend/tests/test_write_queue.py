@@ -0,0 +1,136 @@
+"""Single-writer queue (app.db.write_queue): group commit, per-intent failures, drain on stop"""
+import asyncio
+import sqlite3
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.db.database import create_async_db_engine
+from app.db.write_queue import WriteQueue
+
+
+def insert_value(value: int, delay: float = 0):
+    async def intent(session):
+        if delay:
+            await asyncio.sleep(delay)
+        await session.execute(text("INSERT INTO items (value) VALUES (:value)"), {"value": value})
+        return value
+    return intent
+
+
+async def stored_values(session_factory):
+    async with session_factory() as session:
+        return sorted((await session.scalars(text("SELECT value FROM items"))).all())
+
+
+@pytest.fixture
+def scratch(tmp_path):
+    """Session factory on a fresh database with an items table (unique values)"""
+    engine = create_async_db_engine(f"sqlite:///{tmp_path / 'queue.db'}")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE items (value INTEGER UNIQUE)"))
+
+    asyncio.run(create())
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def test_batches_submitted_intents_into_few_commits(scratch):
+    async def main():
+        queue = WriteQueue(scratch, max_batch=100, max_delay_ms=20)
+        results = await asyncio.gather(*(queue.submit(insert_value(i)) for i in range(50)))
+        await queue.stop()
+        return queue, results, await stored_values(scratch)
+
+    queue, results, stored = asyncio.run(main())
+    assert results == list(range(50))
+    assert stored == list(range(50))
+    assert queue.intents_committed == 50
+
+
+def test_batch_is_invisible_to_other_connections_until_committed(scratch, tmp_path):
+    """Each intent's SAVEPOINT is nested in the batch transaction; releasing it does not commit"""
+    def committed_count():
+        other = sqlite3.connect(tmp_path / "queue.db")
+        try:
+            return other.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        finally:
+            other.close()
+
+    seen_mid_batch = []
+
+    async def look(session):
+        seen_mid_batch.append(committed_count())
+
+    async def main():
+        queue = WriteQueue(scratch, max_batch=100, max_delay_ms=50)
+        await asyncio.gather(queue.submit(insert_value(1)), queue.submit(insert_value(2)), queue.submit(look))
+        after = committed_count()
+        await queue.stop()
+        return queue, after
+
+    queue, after = asyncio.run(main())
+    assert queue.batches_committed == 1
+    assert seen_mid_batch == [0]
+    assert after == 2
+
+
+def test_failing_intent_is_rolled_back_alone(scratch):
+    async def main():
+        queue = WriteQueue(scratch, max_delay_ms=20)
+        outcomes = await asyncio.gather(
+            queue.submit(insert_value(1)),
+            queue.submit(insert_value(1)),  # Duplicate: fails in its savepoint
+            queue.submit(insert_value(2)),
+            return_exceptions=True
+        )
+        await queue.stop()
+        return outcomes, await stored_values(scratch)
+
+    outcomes, stored = asyncio.run(main())
+    assert outcomes[0] == 1 and outcomes[2] == 2
+    assert isinstance(outcomes[1], IntegrityError)
+    assert stored == [1, 2]
+
+
+def test_stop_commits_the_batch_in_progress(scratch):
+    async def main():
+        queue = WriteQueue(scratch, max_batch=100, max_delay_ms=5)
+        # Slow intents: the writer is still inside the batch when stop() is called
+        futures = [asyncio.ensure_future(queue.submit(insert_value(i, delay=0.02))) for i in range(10)]
+        await asyncio.sleep(0.03)
+        await queue.stop()
+        assert all(future.done() for future in futures)
+        return [future.result() for future in futures], await stored_values(scratch)
+
+    results, stored = asyncio.run(main())
+    assert results == list(range(10))
+    assert stored == list(range(10))
+
+
+def test_stop_commits_intents_still_queued(scratch):
+    async def main():
+        queue = WriteQueue(scratch, max_batch=2, max_delay_ms=1)
+        futures = [asyncio.ensure_future(queue.submit(insert_value(i, delay=0.005))) for i in range(9)]
+        await asyncio.sleep(0)  # Let every submit reach the queue
+        await queue.stop()
+        return [future.result() for future in futures], await stored_values(scratch)
+
+    results, stored = asyncio.run(main())
+    assert results == list(range(9))
+    assert stored == list(range(9))
+
+
+def test_submit_after_stop_restarts_the_writer(scratch):
+    async def main():
+        queue = WriteQueue(scratch)
+        await queue.submit(insert_value(1))
+        await queue.stop()
+        await queue.submit(insert_value(2))
+        await queue.stop()
+        await queue.stop()  # Stopping a stopped queue is a no-op
+        return await stored_values(scratch)
+
+    assert asyncio.run(main()) == [1, 2]
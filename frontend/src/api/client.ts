@@ -179,6 +179,7 @@ class ApiClient {
     end_date?: string
     skip?: number
     limit?: number
+    max_points?: number
   }): Promise<GasDataResponse[]> {
     const queryParams = new URLSearchParams()
     if (params) {
@@ -237,10 +238,11 @@ class ApiClient {
   }
 
   // NYC Climate Data endpoints
-  async getNYCClimateData(zipCode: string, startDate?: string, endDate?: string): Promise<NYCClimateDataResponse[]> {
+  async getNYCClimateData(zipCode: string, startDate?: string, endDate?: string, maxPoints?: number): Promise<NYCClimateDataResponse[]> {
     const params = new URLSearchParams({ zip_code: zipCode })
     if (startDate) params.append('start_date', startDate)
     if (endDate) params.append('end_date', endDate)
+    if (maxPoints) params.append('max_points', maxPoints.toString())
     return this.request<NYCClimateDataResponse[]>(`/api/nyc/climate?${params.toString()}`)
   }
 